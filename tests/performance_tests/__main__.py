@@ -0,0 +1,56 @@
+"""
+Command-line benchmark runner. Run from the repository root:
+
+    python -m tests.performance_tests --output results.json
+    python -m tests.performance_tests --baseline results.json --threshold 0.2
+"""
+
+import sys
+import argparse
+
+from tests.performance_tests.benchmarks import BENCHMARKS, SIZES, run_benchmarks
+from tests.performance_tests.runner import compare, load_results, save_results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m tests.performance_tests', description='Run versionedobj benchmarks')
+    parser.add_argument('-o', '--output', default=None, help="File to write JSON results to ('-' for stdout)")
+    parser.add_argument('-b', '--baseline', default=None, help='JSON results file to compare against')
+    parser.add_argument('-t', '--threshold', type=float, default=0.2, help='Maximum allowed slowdown compared to '
+                                                                           'the baseline, as a fraction (default: 0.2)')
+    parser.add_argument('-s', '--size', choices=sorted(SIZES), default='small', help='Object dimensions to use')
+    parser.add_argument('-r', '--repeats', type=int, default=20, help='Number of timed repeats per benchmark')
+    parser.add_argument('-w', '--warmup', type=int, default=3, help='Number of untimed calls before timing')
+    parser.add_argument('names', nargs='*', metavar='NAME', help=f"Benchmarks to run (default: all). "
+                                                                 f"Available: {', '.join(BENCHMARKS)}")
+    args = parser.parse_args(args)
+
+    for name in args.names:
+        if name not in BENCHMARKS:
+            parser.error(f"Unknown benchmark '{name}'")
+
+    progress = lambda name: print(f"running {name}", file=sys.stderr)
+    results = run_benchmarks(args.names or None, args.size, args.repeats, args.warmup, progress)
+
+    extra = {"size": args.size, "params": SIZES[args.size], "warmup": args.warmup}
+    if args.output is not None:
+        save_results(args.output, results, extra)
+
+    for name, summary in results.items():
+        print(f"{name:<24} median {summary['median_ns'] / 1000:>12.1f}us   min {summary['min_ns'] / 1000:>12.1f}us",
+              file=sys.stderr)
+
+    if args.baseline is not None:
+        comparisons, regressions = compare(results, load_results(args.baseline), args.threshold)
+        for name, ratio in comparisons.items():
+            flag = "  REGRESSION" if name in regressions else ""
+            print(f"{name:<24} {ratio:6.2f}x baseline{flag}", file=sys.stderr)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,225 @@
+"""
+Comparative baseline benchmarks. Runs the same operations on the same object shapes with
+VersionedObject + Serializer, with stdlib dataclasses + dataclasses.asdict + json, and with
+plain dicts + json, and reports the overhead ratio of versionedobj against each baseline.
+Run from the repository root:
+
+    python -m tests.performance_tests.baselines
+    python -m tests.performance_tests.baselines --size large --max-overhead 20 --output baselines.json
+"""
+
+import sys
+import json
+import argparse
+import dataclasses
+
+from versionedobj import Serializer, VersionedObject
+from versionedobj.utils import _copy_json
+
+from tests.performance_tests.benchmarks import SIZES
+from tests.performance_tests.classgen import make_class, make_list_class
+from tests.performance_tests.runner import time_ns, summarize, save_results
+
+
+# Names of the implementations compared, versionedobj first
+IMPLEMENTATIONS = ["versionedobj", "dataclasses", "dict"]
+
+# Names of the operations compared
+OPERATIONS = ["to_dict", "to_json", "from_dict", "from_json", "listfield_to_dict", "listfield_from_dict"]
+
+
+def make_dataclass(cls):
+    """
+    Generate a dataclass equivalent to a generated VersionedObject class, with the same\
+    field names, default values and nesting
+
+    :param cls: VersionedObject class generated by classgen
+
+    :return: dataclass. Nested VersionedObject classes become nested dataclasses, and\
+        ListField attributes become lists of dataclass instances.
+    """
+    fields = []
+    for n, value in cls.__dict__.items():
+        if n.startswith('__') or n.startswith('_vobj__'):
+            continue
+
+        if isinstance(value, type) and issubclass(value, VersionedObject):
+            nested = make_dataclass(value)
+            fields.append((n, nested, dataclasses.field(default_factory=nested)))
+        elif hasattr(value, '_obj_class'):
+            element = make_dataclass(value._obj_class)
+            fields.append((n, list, dataclasses.field(default_factory=list, metadata={"element": element})))
+        else:
+            fields.append((n, type(value), dataclasses.field(default=value)))
+
+    return dataclasses.make_dataclass(cls.__name__ + "Dataclass", fields)
+
+
+def load_dataclass(dc, attrs):
+    """
+    Create a dataclass instance from a dict produced by dataclasses.asdict. Unexpected or\
+    missing fields raise TypeError, which is the closest stdlib equivalent to validation.
+
+    :param dc: dataclass to create
+    :param dict attrs: dict to load
+    """
+    kwargs = {}
+    for f in dataclasses.fields(dc):
+        value = attrs[f.name]
+        if dataclasses.is_dataclass(f.type):
+            value = load_dataclass(f.type, value)
+        elif "element" in f.metadata:
+            value = [load_dataclass(f.metadata["element"], v) for v in value]
+
+        kwargs[f.name] = value
+
+    return dc(**kwargs)
+
+
+def _nested_ops(params):
+    # Maps implementation names to operations on a nested object, for each implementation
+    cls = make_class(params["depth"], params["width"], version="1.0.0")
+    obj = cls()
+    ser = Serializer()
+    attrs = ser.to_dict(obj)
+    jsonstr = ser.to_json(obj)
+
+    dc = make_dataclass(cls)
+    dc_obj = dc()
+
+    return {
+        "versionedobj": {
+            "to_dict": lambda: ser.to_dict(obj),
+            "to_json": lambda: ser.to_json(obj),
+            "from_dict": lambda: ser.from_dict(attrs, obj),
+            "from_json": lambda: ser.from_json(jsonstr, obj),
+        },
+        "dataclasses": {
+            "to_dict": lambda: dataclasses.asdict(dc_obj),
+            "to_json": lambda: json.dumps(dataclasses.asdict(dc_obj)),
+            "from_dict": lambda: load_dataclass(dc, attrs),
+            "from_json": lambda: load_dataclass(dc, json.loads(jsonstr)),
+        },
+        # Plain dicts are their own object data, so converting to or from a dict is a deep copy
+        "dict": {
+            "to_dict": lambda: _copy_json(attrs),
+            "to_json": lambda: json.dumps(attrs),
+            "from_dict": lambda: _copy_json(attrs),
+            "from_json": lambda: json.loads(jsonstr),
+        },
+    }
+
+
+def _list_ops(params):
+    # Maps implementation names to operations on an object with a list of objects
+    cls, obj = make_list_class(params["list_length"])
+    ser = Serializer()
+    attrs = ser.to_dict(obj)
+    target = cls()
+
+    dc = make_dataclass(cls)
+    dc_obj = load_dataclass(dc, attrs)
+
+    return {
+        "versionedobj": {
+            "listfield_to_dict": lambda: ser.to_dict(obj),
+            "listfield_from_dict": lambda: ser.from_dict(attrs, target),
+        },
+        "dataclasses": {
+            "listfield_to_dict": lambda: dataclasses.asdict(dc_obj),
+            "listfield_from_dict": lambda: load_dataclass(dc, attrs),
+        },
+        "dict": {
+            "listfield_to_dict": lambda: _copy_json(attrs),
+            "listfield_from_dict": lambda: _copy_json(attrs),
+        },
+    }
+
+
+def overheads(results, key="median_ns"):
+    """
+    Calculate the overhead ratio of versionedobj against each baseline implementation
+
+    :param dict results: results returned by run_baselines
+    :param str key: name of the summary value to compare
+
+    :return: maps operation names to a dict, which maps baseline implementation names to the\
+        ratio of the versionedobj value to the baseline value
+    :rtype: dict
+    """
+    ret = {}
+    for op, impls in results.items():
+        ret[op] = {name: impls["versionedobj"][key] / impls[name][key]
+                   for name in IMPLEMENTATIONS[1:] if impls[name][key]}
+
+    return ret
+
+
+def run_baselines(size="small", repeats=20, warmup=3, progress=None):
+    """
+    Run each operation with each implementation, and summarize the timings
+
+    :param str size: name of object dimensions to use, from benchmarks.SIZES
+    :param int repeats: number of timed repeats per operation
+    :param int warmup: number of untimed calls per operation, before timing starts
+    :param callable progress: if set, called with each operation name before it runs
+
+    :return: maps operation names to a dict, which maps implementation names to result summaries
+    :rtype: dict
+    """
+    params = SIZES[size]
+    ops = {}
+    for setup in (_nested_ops, _list_ops):
+        for impl, impl_ops in setup(params).items():
+            for op, func in impl_ops.items():
+                ops.setdefault(op, {})[impl] = func
+
+    results = {}
+    for op in OPERATIONS:
+        if progress is not None:
+            progress(op)
+
+        results[op] = {impl: summarize(time_ns(ops[op][impl], repeats, warmup)) for impl in IMPLEMENTATIONS}
+
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m tests.performance_tests.baselines',
+                                     description='Compare versionedobj against stdlib-only baselines')
+    parser.add_argument('-o', '--output', default=None, help="File to write JSON results to ('-' for stdout)")
+    parser.add_argument('-s', '--size', choices=sorted(SIZES), default='small', help='Object dimensions to use')
+    parser.add_argument('-r', '--repeats', type=int, default=20, help='Number of timed repeats per operation')
+    parser.add_argument('-w', '--warmup', type=int, default=3, help='Number of untimed calls before timing')
+    parser.add_argument('-m', '--max-overhead', type=float, default=None, help='Maximum allowed overhead ratio '
+                                                                               'against dataclasses')
+    args = parser.parse_args(args)
+
+    progress = lambda op: print(f"running {op}", file=sys.stderr)
+    results = run_baselines(args.size, args.repeats, args.warmup, progress)
+    ratios = overheads(results)
+
+    if args.output is not None:
+        save_results(args.output, results, {"size": args.size, "params": SIZES[args.size], "overheads": ratios})
+
+    print(f"{'operation':<22}" + ''.join(f"{impl:>16}" for impl in IMPLEMENTATIONS)
+          + ''.join(f"{'vs ' + impl:>16}" for impl in IMPLEMENTATIONS[1:]), file=sys.stderr)
+
+    failed = []
+    for op, impls in results.items():
+        times = ''.join(f"{impls[impl]['median_ns'] / 1000:>14.1f}us" for impl in IMPLEMENTATIONS)
+        ratio = ''.join(f"{ratios[op].get(impl, 0.0):>15.2f}x" for impl in IMPLEMENTATIONS[1:])
+        print(f"{op:<22}{times}{ratio}", file=sys.stderr)
+
+        if (args.max_overhead is not None) and (ratios[op].get("dataclasses", 0.0) > args.max_overhead):
+            failed.append(op)
+
+    if failed:
+        print(f"Overhead against dataclasses exceeds {args.max_overhead}x: {', '.join(failed)}", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
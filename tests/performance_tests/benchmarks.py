@@ -0,0 +1,154 @@
+"""
+Benchmarks for the main VersionedObject operations
+"""
+
+from versionedobj import Serializer
+
+from tests.performance_tests.classgen import make_class, make_list_class, make_migrated_class
+from tests.performance_tests.runner import time_ns, summarize
+
+
+# Object dimensions used for each benchmark size
+SIZES = {
+    "small": {"depth": 4, "width": 20, "list_length": 200, "chain_length": 10},
+    "large": {"depth": 10, "width": 100, "list_length": 5000, "chain_length": 40},
+}
+
+# Maps benchmark names to setup functions. Each setup function takes a dict of object dimensions,
+# and returns a function with no arguments that performs the benchmarked operation once.
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Decorator for registering a benchmark setup function
+    """
+    def _inner(setup):
+        BENCHMARKS[name] = setup
+        return setup
+
+    return _inner
+
+
+def _nested_setup(params):
+    cls = make_class(params["depth"], params["width"], version="1.0.0")
+    obj = cls()
+    ser = Serializer()
+    return cls, obj, ser
+
+
+@benchmark("construction")
+def _construction(params):
+    cls, _, _ = _nested_setup(params)
+    return cls
+
+
+@benchmark("to_dict")
+def _to_dict(params):
+    _, obj, ser = _nested_setup(params)
+    return lambda: ser.to_dict(obj)
+
+
+@benchmark("to_json")
+def _to_json(params):
+    _, obj, ser = _nested_setup(params)
+    return lambda: ser.to_json(obj)
+
+
+@benchmark("from_dict")
+def _from_dict(params):
+    _, obj, ser = _nested_setup(params)
+    attrs = ser.to_dict(obj)
+    return lambda: ser.from_dict(attrs, obj)
+
+
+@benchmark("from_dict_no_validate")
+def _from_dict_no_validate(params):
+    _, obj, ser = _nested_setup(params)
+    attrs = ser.to_dict(obj)
+    return lambda: ser.from_dict(attrs, obj, validate=False)
+
+
+@benchmark("from_json")
+def _from_json(params):
+    _, obj, ser = _nested_setup(params)
+    jsonstr = ser.to_json(obj)
+    return lambda: ser.from_json(jsonstr, obj)
+
+
+@benchmark("validate_dict")
+def _validate_dict(params):
+    _, obj, ser = _nested_setup(params)
+    attrs = ser.to_dict(obj)
+    return lambda: ser.validate_dict(attrs, obj)
+
+
+@benchmark("from_dict_shape_cache")
+def _from_dict_shape_cache(params):
+    _, obj, _ = _nested_setup(params)
+    ser = Serializer(shape_cache_size=8)
+    attrs = ser.to_dict(obj)
+    return lambda: ser.from_dict(attrs, obj)
+
+
+@benchmark("validate_dict_shape_cache")
+def _validate_dict_shape_cache(params):
+    _, obj, _ = _nested_setup(params)
+    ser = Serializer(shape_cache_size=8)
+    attrs = ser.to_dict(obj)
+    return lambda: ser.validate_dict(attrs, obj)
+
+
+@benchmark("migration")
+def _migration(params):
+    cls, attrs = make_migrated_class(params["chain_length"], params["width"])
+    obj = cls()
+    ser = Serializer()
+
+    # Migrations modify the dict, so each call gets a fresh (shallow) copy
+    return lambda: ser.from_dict(dict(attrs), obj)
+
+
+@benchmark("listfield_to_dict")
+def _listfield_to_dict(params):
+    _, obj = make_list_class(params["list_length"])
+    ser = Serializer()
+    return lambda: ser.to_dict(obj)
+
+
+@benchmark("listfield_from_dict")
+def _listfield_from_dict(params):
+    cls, obj = make_list_class(params["list_length"])
+    ser = Serializer()
+    attrs = ser.to_dict(obj)
+    target = cls()
+    return lambda: ser.from_dict(attrs, target)
+
+
+def run_benchmarks(names=None, size="small", repeats=20, warmup=3, progress=None):
+    """
+    Run benchmarks, and summarize the timings
+
+    :param list names: names of benchmarks to run. If unset, all benchmarks are run.
+    :param str size: name of object dimensions to use, from SIZES
+    :param int repeats: number of timed repeats per benchmark
+    :param int warmup: number of untimed calls per benchmark, before timing starts
+    :param callable progress: if set, called with each benchmark name before it runs
+
+    :return: maps benchmark names to result summaries
+    :rtype: dict
+    """
+    if names is None:
+        names = list(BENCHMARKS)
+
+    params = SIZES[size]
+    results = {}
+
+    for name in names:
+        if progress is not None:
+            progress(name)
+
+        func = BENCHMARKS[name](params)
+        results[name] = summarize(time_ns(func, repeats, warmup))
+
+    return results
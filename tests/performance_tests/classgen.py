@@ -0,0 +1,108 @@
+"""
+Generates VersionedObject classes and object data in memory, for benchmarks
+"""
+
+import random
+import string
+
+from versionedobj import VersionedObject, ListField, migration
+
+
+def random_string(rng, length=16):
+    return ''.join(rng.choices(string.ascii_letters + string.digits, k=length))
+
+
+def make_class(depth=1, width=10, version=None, name="BenchConfig", seed=0):
+    """
+    Generate a VersionedObject class with nested VersionedObject classes
+
+    :param int depth: number of nesting levels, including the top-level class
+    :param int width: number of leaf attributes at each nesting level
+    :param version: version attribute for the top-level class. If None, class is unversioned.
+    :param str name: name of the top-level class
+    :param int seed: random seed for generating default values
+
+    :return: generated class. Each class has leaf attributes named 'var0' to 'var<width - 1>',\
+        and each class except the innermost class has a nested object attribute named 'nested'.
+    """
+    rng = random.Random(seed)
+    nested = None
+
+    for level in reversed(range(depth)):
+        attrs = {}
+        if (level == 0) and (version is not None):
+            attrs['version'] = version
+
+        for i in range(width):
+            kind = i % 4
+            if kind == 0:
+                attrs[f"var{i}"] = random_string(rng)
+            elif kind == 1:
+                attrs[f"var{i}"] = rng.randrange(1 << 30)
+            elif kind == 2:
+                attrs[f"var{i}"] = rng.random()
+            else:
+                attrs[f"var{i}"] = bool(rng.randrange(2))
+
+        if nested is not None:
+            attrs['nested'] = nested
+
+        clsname = name if level == 0 else f"{name}Level{level}"
+        nested = type(VersionedObject)(clsname, (VersionedObject,), attrs)
+
+    return nested
+
+
+def make_list_class(length, width=4, name="BenchListConfig", seed=0):
+    """
+    Generate a VersionedObject class with a ListField, and an instance with a populated list
+
+    :param int length: number of elements in the list
+    :param int width: number of attributes of each list element
+
+    :return: tuple of the form (class, populated instance)
+    """
+    element_class = make_class(1, width, name=f"{name}Element", seed=seed)
+    cls = type(VersionedObject)(name, (VersionedObject,), {"items": ListField(element_class)})
+
+    obj = cls()
+    for _ in range(length):
+        obj.items.append(element_class())
+
+    return cls, obj
+
+
+def make_migrated_class(chain_length, width=10, name="BenchMigratedConfig"):
+    """
+    Generate a VersionedObject class with a chain of migrations from version 0 to the current\
+    version, and object data at version 0
+
+    :param int chain_length: number of migrations from the oldest version to the current version
+    :param int width: number of leaf attributes
+
+    :return: tuple of the form (class, oldest object data as a dict)
+    """
+    cls = make_class(1, width, version=chain_length, name=name)
+
+    for v in range(chain_length):
+        def _migrate(attrs, v=v):
+            attrs['var0'] = f"migrated{v}"
+            return attrs
+
+        migration(cls, v, v + 1)(_migrate)
+
+    attrs = {n: getattr(cls, n) for n in cls.__dict__ if n.startswith('var')}
+    attrs['version'] = 0
+    return cls, attrs
+
+
+def dict_size(attrs):
+    """
+    Count the number of leaf values in object data
+    """
+    if isinstance(attrs, dict):
+        return sum(dict_size(v) for v in attrs.values())
+    elif isinstance(attrs, list):
+        return sum(dict_size(v) for v in attrs)
+
+    return 1
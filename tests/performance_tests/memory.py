@@ -0,0 +1,184 @@
+"""
+Memory and allocation benchmarks, measured with tracemalloc. Results are written as JSON with
+sorted keys and integer values, so results from different runs can be compared with diff. Run
+from the repository root:
+
+    python -m tests.performance_tests.memory --output memory.json
+    python -m tests.performance_tests.memory --baseline memory.json --threshold 0.1
+"""
+
+import os
+import gc
+import sys
+import argparse
+import tempfile
+import tracemalloc
+
+from versionedobj import Serializer
+from versionedobj.utils import _ObjField
+
+from tests.performance_tests.classgen import make_class, make_list_class, dict_size
+from tests.performance_tests.runner import compare, load_results, save_results
+
+
+# Object dimensions used for each benchmark size
+SIZES = {
+    "small": {"depth": 4, "width": 20, "instances": 200, "list_length": 200},
+    "large": {"depth": 10, "width": 100, "instances": 1000, "list_length": 5000},
+}
+
+
+class _ObjFieldCounter(object):
+    """
+    Context manager that counts _ObjField instances created while it is active
+    """
+    def __enter__(self):
+        self.count = 0
+        self._orig_init = _ObjField.__init__
+
+        def _counting_init(field, *args, **kwargs):
+            self.count += 1
+            self._orig_init(field, *args, **kwargs)
+
+        _ObjField.__init__ = _counting_init
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        _ObjField.__init__ = self._orig_init
+
+
+def measure(func):
+    """
+    Measure the memory used by a single call of a function
+
+    :param callable func: function to measure, called with no arguments
+
+    :return: tuple of the form (return value, dict with 'peak_bytes', 'retained_bytes' and\
+        'retained_blocks' (memory still allocated after the call, including the return value)\
+        and 'objfields' (number of _ObjField instances created))
+    :rtype: tuple
+    """
+    gc.collect()
+
+    # Tracing is started for each measurement, so the peak and the traced blocks only include
+    # allocations made by the call (tracemalloc.reset_peak requires python 3.9)
+    tracemalloc.start()
+    try:
+        start_bytes, _ = tracemalloc.get_traced_memory()
+
+        with _ObjFieldCounter() as counter:
+            ret = func()
+
+        end_bytes, peak_bytes = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+    finally:
+        tracemalloc.stop()
+
+    blocks = sum(stat.count for stat in after.statistics('filename'))
+    return ret, {
+        "peak_bytes": peak_bytes - start_bytes,
+        "retained_bytes": end_bytes - start_bytes,
+        "retained_blocks": blocks,
+        "objfields": counter.count,
+    }
+
+
+def run_memory_benchmarks(size="small"):
+    """
+    Run all memory benchmarks
+
+    :param str size: name of object dimensions to use, from SIZES
+
+    :return: maps benchmark names to results
+    :rtype: dict
+    """
+    params = SIZES[size]
+    results = {}
+
+    cls = make_class(params["depth"], params["width"], version="1.0.0", name="MemoryConfig")
+    leaves = params["depth"] * params["width"] + 1
+
+    # Construction: bytes per instance and per leaf field
+    count = params["instances"]
+    instances, result = measure(lambda: [cls() for _ in range(count)])
+    result["bytes_per_instance"] = result["retained_bytes"] // count
+    result["bytes_per_leaf"] = result["retained_bytes"] // (count * leaves)
+    results["construction"] = result
+    del instances
+
+    obj = cls()
+    ser = Serializer()
+    attrs = ser.to_dict(obj)
+    jsonstr = ser.to_json(obj)
+
+    ops = {
+        "to_dict": lambda: ser.to_dict(obj),
+        "to_json": lambda: ser.to_json(obj),
+        "from_dict": lambda: ser.from_dict(attrs, obj),
+        "from_dict_no_validate": lambda: ser.from_dict(attrs, obj, validate=False),
+        "from_json": lambda: ser.from_json(jsonstr, obj),
+        "validate_dict": lambda: ser.validate_dict(attrs, obj),
+    }
+
+    with tempfile.TemporaryDirectory() as tempdir:
+        filename = os.path.join(tempdir, "memory.json")
+        ser.to_file(filename, obj)
+        ops["to_file"] = lambda: ser.to_file(filename, obj)
+        ops["from_file"] = lambda: ser.from_file(filename, obj)
+
+        for name, func in ops.items():
+            # Warm up, so that one-time costs like compiled validators are not measured
+            func()
+            _, results[name] = measure(func)
+            results[name]["leaves"] = leaves
+
+    _, list_obj = make_list_class(params["list_length"], name="MemoryListConfig")
+    list_attrs = ser.to_dict(list_obj)
+    list_target = list_obj.__class__()
+
+    ops = {
+        "listfield_to_dict": lambda: ser.to_dict(list_obj),
+        "listfield_from_dict": lambda: ser.from_dict(list_attrs, list_target),
+    }
+
+    for name, func in ops.items():
+        func()
+        _, results[name] = measure(func)
+        results[name]["leaves"] = dict_size(list_attrs)
+
+    return results
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m tests.performance_tests.memory',
+                                     description='Measure versionedobj memory usage')
+    parser.add_argument('-o', '--output', default=None, help="File to write JSON results to ('-' for stdout)")
+    parser.add_argument('-b', '--baseline', default=None, help='JSON results file to compare peak memory against')
+    parser.add_argument('-t', '--threshold', type=float, default=0.1, help='Maximum allowed increase in peak memory '
+                                                                           'compared to the baseline, as a fraction '
+                                                                           '(default: 0.1)')
+    parser.add_argument('-s', '--size', choices=sorted(SIZES), default='small', help='Object dimensions to use')
+    args = parser.parse_args(args)
+
+    results = run_memory_benchmarks(args.size)
+    if args.output is not None:
+        save_results(args.output, results, {"size": args.size, "params": SIZES[args.size]})
+
+    for name, r in results.items():
+        print(f"{name:<24} peak {r['peak_bytes']:>12,} bytes   retained {r['retained_bytes']:>12,} bytes   "
+              f"_ObjField {r['objfields']:>8,}", file=sys.stderr)
+
+    if args.baseline is not None:
+        comparisons, regressions = compare(results, load_results(args.baseline), args.threshold, key="peak_bytes")
+        for name, ratio in comparisons.items():
+            flag = "  REGRESSION" if name in regressions else ""
+            print(f"{name:<24} {ratio:6.2f}x baseline peak{flag}", file=sys.stderr)
+
+        if regressions:
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Timing, result formatting, and baseline comparison for benchmarks
+"""
+
+import gc
+import sys
+import json
+import time
+import platform
+import statistics
+
+import versionedobj
+
+
+def time_ns(func, repeats=20, warmup=3, number=1):
+    """
+    Time a function with time.perf_counter_ns. Garbage collection is disabled while timing.
+
+    :param callable func: function to time, called with no arguments
+    :param int repeats: number of timed repeats
+    :param int warmup: number of untimed calls before timing starts
+    :param int number: number of calls per timed repeat
+
+    :return: list of nanoseconds per call, one for each repeat
+    :rtype: list
+    """
+    for _ in range(warmup):
+        func()
+
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter_ns()
+            for _ in range(number):
+                func()
+
+            times.append((time.perf_counter_ns() - start) // number)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return times
+
+
+def summarize(times):
+    """
+    Summarize a list of timings
+
+    :param list times: nanoseconds per call, one for each repeat
+
+    :return: summary, suitable for passing to the json library
+    :rtype: dict
+    """
+    return {
+        "min_ns": min(times),
+        "median_ns": int(statistics.median(times)),
+        "mean_ns": int(statistics.mean(times)),
+        "stdev_ns": int(statistics.stdev(times)) if len(times) > 1 else 0,
+        "repeats": len(times),
+    }
+
+
+def environment():
+    """
+    Describe the environment benchmarks were run in
+    """
+    return {
+        "python": sys.version.split()[0],
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "versionedobj": versionedobj.__version__,
+        "timestamp": int(time.time()),
+    }
+
+
+def compare(results, baseline, threshold=0.2, key="median_ns"):
+    """
+    Compare benchmark results against stored baseline results
+
+    :param dict results: maps benchmark names to result summaries
+    :param dict baseline: maps benchmark names to result summaries
+    :param float threshold: maximum allowed slowdown, as a fraction of the baseline value
+    :param str key: name of the summary value to compare
+
+    :return: tuple of the form (comparisons, regressions). 'comparisons' maps each benchmark name\
+        found in both results to the ratio of the new value to the baseline value, and 'regressions'\
+        is a sorted list of names of benchmarks where the ratio exceeds 1 + threshold.
+    :rtype: tuple
+    """
+    comparisons = {}
+    regressions = []
+
+    for name, summary in results.items():
+        if (name not in baseline) or (not baseline[name].get(key)):
+            continue
+
+        ratio = summary[key] / baseline[name][key]
+        comparisons[name] = ratio
+        if ratio > (1.0 + threshold):
+            regressions.append(name)
+
+    return comparisons, sorted(regressions)
+
+
+def load_results(filename):
+    """
+    Load benchmark results saved with save_results
+
+    :return: maps benchmark names to result summaries
+    :rtype: dict
+    """
+    with open(filename, 'r') as fh:
+        return json.load(fh)["results"]
+
+
+def save_results(filename, results, extra=None):
+    """
+    Save benchmark results as JSON
+
+    :param str filename: name of file to write, or '-' for stdout
+    :param dict results: maps benchmark names to result summaries
+    :param dict extra: additional top-level data to save
+    """
+    data = {"environment": environment(), "results": results}
+    if extra:
+        data.update(extra)
+
+    jsonstr = json.dumps(data, indent=2, sort_keys=True)
+    if filename == '-':
+        print(jsonstr)
+    else:
+        with open(filename, 'w') as fh:
+            fh.write(jsonstr + '\n')
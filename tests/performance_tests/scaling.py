@@ -0,0 +1,194 @@
+"""
+Complexity-scaling harness. Sweeps each object dimension independently, fits the growth
+exponent of each operation's run time against the swept dimension, and fails if any
+operation grows faster than linearly. Run from the repository root:
+
+    python -m tests.performance_tests.scaling
+    python -m tests.performance_tests.scaling --max-exponent 1.3 --output scaling.json
+"""
+
+import sys
+import math
+import argparse
+
+from versionedobj import Serializer
+
+from tests.performance_tests.classgen import make_class, make_list_class, make_migrated_class
+from tests.performance_tests.runner import time_ns, save_results
+
+
+def _object_ops(cls):
+    # Operations on a generated nested object class, that should scale with the number of fields
+    obj = cls()
+    ser = Serializer()
+    attrs = ser.to_dict(obj)
+    jsonstr = ser.to_json(obj)
+
+    return {
+        "construction": cls,
+        "to_dict": lambda: ser.to_dict(obj),
+        "to_json": lambda: ser.to_json(obj),
+        "from_dict": lambda: ser.from_dict(attrs, obj),
+        "from_dict_no_validate": lambda: ser.from_dict(attrs, obj, validate=False),
+        "from_json": lambda: ser.from_json(jsonstr, obj),
+        "validate_dict": lambda: ser.validate_dict(attrs, obj),
+        "iterate": lambda: list(obj),
+    }
+
+
+def _width_ops(n):
+    return _object_ops(make_class(1, n, name=f"Width{n}"))
+
+
+def _depth_ops(n):
+    return _object_ops(make_class(n, 4, name=f"Depth{n}"))
+
+
+def _list_ops(n):
+    cls, obj = make_list_class(n, name=f"List{n}")
+    ser = Serializer()
+    attrs = ser.to_dict(obj)
+    target = cls()
+
+    return {
+        "to_dict": lambda: ser.to_dict(obj),
+        "from_dict": lambda: ser.from_dict(attrs, target),
+    }
+
+
+def _filter_ops(n):
+    # 'only' list where only the last name matches, so every name is checked for every field
+    cls = make_class(2, 50, name=f"Filter{n}")
+    obj = cls()
+    ser = Serializer()
+    only = [f"nomatch{i}" for i in range(n - 1)] + ["var"]
+    attrs = ser.to_dict(obj, only=only)
+
+    return {
+        "to_dict": lambda: ser.to_dict(obj, only=only),
+        "from_dict": lambda: ser.from_dict(attrs, obj, only=only),
+        "from_dict_no_validate": lambda: ser.from_dict(attrs, obj, validate=False, only=only),
+    }
+
+
+def _migration_ops(n):
+    cls, attrs = make_migrated_class(n, name=f"Migration{n}")
+    obj = cls()
+    ser = Serializer()
+
+    return {
+        "migrate": lambda: ser.from_dict(dict(attrs), obj),
+    }
+
+
+# Maps each swept dimension to (list of dimension values, function that takes a dimension
+# value and returns a dict mapping operation names to functions that perform the operation once)
+SWEEPS = {
+    "width": ([50, 100, 200, 400, 800], _width_ops),
+    "depth": ([8, 16, 32, 64, 128], _depth_ops),
+    "list_length": ([250, 500, 1000, 2000, 4000], _list_ops),
+    "filter_length": ([8, 16, 32, 64, 128], _filter_ops),
+    "migration_chain": ([10, 20, 40, 80, 160], _migration_ops),
+}
+
+
+def fit_exponent(sizes, times):
+    """
+    Fit the exponent k of the model time = c * size^k, with a least-squares fit of\
+    log(time) against log(size)
+
+    :param list sizes: dimension values
+    :param list times: measured times, one for each dimension value
+
+    :return: fitted exponent
+    :rtype: float
+    """
+    xs = [math.log(s) for s in sizes]
+    ys = [math.log(max(t, 1)) for t in times]
+    xmean = sum(xs) / len(xs)
+    ymean = sum(ys) / len(ys)
+
+    num = sum((x - xmean) * (y - ymean) for x, y in zip(xs, ys))
+    den = sum((x - xmean) ** 2 for x in xs)
+    return num / den
+
+
+def run_sweeps(names=None, repeats=5, warmup=1, progress=None):
+    """
+    Run dimension sweeps, and fit the growth exponent of each operation
+
+    :param list names: names of dimensions to sweep. If unset, all dimensions are swept.
+    :param int repeats: number of timed repeats per measurement. The fastest repeat is used.
+    :param int warmup: number of untimed calls per measurement, before timing starts
+    :param callable progress: if set, called with the dimension name and value before each measurement
+
+    :return: maps each dimension name to a dict, which maps each operation name to a dict\
+        with the dimension values, measured times in nanoseconds, and fitted exponent
+    :rtype: dict
+    """
+    if names is None:
+        names = list(SWEEPS)
+
+    results = {}
+    for name in names:
+        sizes, make_ops = SWEEPS[name]
+        times = {}
+
+        for size in sizes:
+            if progress is not None:
+                progress(name, size)
+
+            for op, func in make_ops(size).items():
+                times.setdefault(op, []).append(min(time_ns(func, repeats, warmup)))
+
+        results[name] = {op: {"sizes": sizes, "times_ns": t, "exponent": fit_exponent(sizes, t)}
+                         for op, t in times.items()}
+
+    return results
+
+
+def find_superlinear(results, max_exponent):
+    """
+    Find operations that grew faster than allowed
+
+    :return: list of tuples of the form (dimension name, operation name, exponent)
+    :rtype: list
+    """
+    return [(name, op, r["exponent"]) for name, ops in results.items() for op, r in ops.items()
+            if r["exponent"] > max_exponent]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m tests.performance_tests.scaling',
+                                     description='Check that versionedobj operations scale linearly')
+    parser.add_argument('-m', '--max-exponent', type=float, default=1.3, help='Maximum allowed growth exponent '
+                                                                               '(default: 1.3)')
+    parser.add_argument('-o', '--output', default=None, help="File to write JSON results to ('-' for stdout)")
+    parser.add_argument('-r', '--repeats', type=int, default=5, help='Number of timed repeats per measurement')
+    parser.add_argument('names', nargs='*', metavar='DIMENSION', help=f"Dimensions to sweep (default: all). "
+                                                                      f"Available: {', '.join(SWEEPS)}")
+    args = parser.parse_args(args)
+
+    for name in args.names:
+        if name not in SWEEPS:
+            parser.error(f"Unknown dimension '{name}'")
+
+    progress = lambda name, size: print(f"sweeping {name}={size}", file=sys.stderr)
+    results = run_sweeps(args.names or None, args.repeats, progress=progress)
+
+    if args.output is not None:
+        save_results(args.output, results, {"max_exponent": args.max_exponent})
+
+    for name, ops in results.items():
+        for op, r in ops.items():
+            print(f"{name:<16} {op:<24} exponent {r['exponent']:5.2f}", file=sys.stderr)
+
+    failures = find_superlinear(results, args.max_exponent)
+    for name, op, exponent in failures:
+        print(f"FAILED: {op} grows as O(n^{exponent:.2f}) with {name}", file=sys.stderr)
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
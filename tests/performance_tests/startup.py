@@ -0,0 +1,170 @@
+"""
+Startup benchmark. Generates a module that defines several hundred VersionedObject classes,
+and times importing versionedobj, importing the generated module (defining the classes), and
+creating the first instance of each class, each in a fresh python process. Fails if the total
+exceeds a budget. Run from the repository root:
+
+    python -m tests.performance_tests.startup
+    python -m tests.performance_tests.startup --classes 500 --budget-ms 60 --output startup.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+from tests.performance_tests.runner import save_results
+
+
+# Default total time budget for importing versionedobj, defining the classes and creating the
+# first instance of each class, in milliseconds
+DEFAULT_BUDGET_MS = 50.0
+
+# Script run in each fresh process, prints the timings as JSON
+_CHILD_SCRIPT = """
+import sys
+import time
+
+start = time.perf_counter_ns()
+import versionedobj
+imported = time.perf_counter_ns()
+import {module}
+defined = time.perf_counter_ns()
+for cls in {module}.TOP_LEVEL:
+    cls()
+instantiated = time.perf_counter_ns()
+json_imported = "json" in sys.modules
+
+import json
+print(json.dumps({{"import_ns": imported - start, "define_ns": defined - imported,
+                  "first_instance_ns": instantiated - defined,
+                  "json_imported": json_imported}}))
+"""
+
+
+def make_module_source(num_classes, width=8):
+    """
+    Generate the source code of a module that defines VersionedObject classes, like a\
+    typical application config module. Every fourth class is a versioned top-level class\
+    with a migration and a ListField, the other classes are nested in the top-level classes.
+
+    :param int num_classes: number of VersionedObject classes to define
+    :param int width: number of plain attributes per class
+
+    :return: module source code. The module has a TOP_LEVEL attribute, which is a list of\
+        all top-level classes.
+    :rtype: str
+    """
+    lines = ["from versionedobj import VersionedObject, ListField, migration", "", "TOP_LEVEL = []", ""]
+    nested = []
+
+    for i in range(num_classes):
+        lines.append(f"class Config{i}(VersionedObject):")
+        if (i % 4) == 3:
+            lines.append('    version = "1.0.1"')
+            for n in nested:
+                lines.append(f"    {n.lower()} = {n}")
+
+            lines.append(f"    items = ListField(Config{i - 1})")
+
+        for j in range(width):
+            value = [f'"value{j}"', str(j), f"{j}.5", "True"][j % 4]
+            lines.append(f"    var{j} = {value}")
+
+        lines.append("")
+
+        if (i % 4) == 3:
+            lines += [f'@migration(Config{i}, "1.0.0", "1.0.1")',
+                      f"def migrate_{i}(attrs):",
+                      "    return attrs",
+                      "",
+                      f"TOP_LEVEL.append(Config{i})",
+                      ""]
+            nested = []
+        else:
+            nested.append(f"Config{i}")
+
+    return '\n'.join(lines) + '\n'
+
+
+def run_once(dirname, module):
+    """
+    Time importing versionedobj and a generated module, in a fresh python process
+
+    :return: timings, as a dict
+    :rtype: dict
+    """
+    root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([dirname, root] + [p for p in [env.get("PYTHONPATH")] if p])
+
+    # Installed applications have compiled bytecode, so make sure it is written and used
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+    env["PYTHONPYCACHEPREFIX"] = os.path.join(dirname, "__pycache__")
+
+    output = subprocess.check_output([sys.executable, "-c", _CHILD_SCRIPT.format(module=module)], env=env)
+    return json.loads(output)
+
+
+def run_startup(num_classes=400, repeats=10):
+    """
+    Generate a module with VersionedObject classes, and time startup in fresh processes
+
+    :param int num_classes: number of VersionedObject classes to define
+    :param int repeats: number of fresh processes to time. One extra untimed process is run\
+        first, so that the generated module is compiled before timing.
+
+    :return: maps each timing name ('import_ns', 'define_ns', 'first_instance_ns', 'total_ns')\
+        to the median value, and 'json_imported' to True if any run imported the json module
+    :rtype: dict
+    """
+    module = "versionedobj_startup_bench"
+
+    with tempfile.TemporaryDirectory() as dirname:
+        with open(os.path.join(dirname, module + ".py"), 'w') as fh:
+            fh.write(make_module_source(num_classes))
+
+        run_once(dirname, module)
+        runs = [run_once(dirname, module) for _ in range(repeats)]
+
+    for run in runs:
+        run["total_ns"] = run["import_ns"] + run["define_ns"] + run["first_instance_ns"]
+
+    ret = {k: int(statistics.median(run[k] for run in runs))
+           for k in ("import_ns", "define_ns", "first_instance_ns", "total_ns")}
+    ret["json_imported"] = any(run["json_imported"] for run in runs)
+    return ret
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m tests.performance_tests.startup',
+                                     description='Time importing versionedobj and defining VersionedObject classes')
+    parser.add_argument('-o', '--output', default=None, help="File to write JSON results to ('-' for stdout)")
+    parser.add_argument('-c', '--classes', type=int, default=400, help='Number of classes to define (default: 400)')
+    parser.add_argument('-r', '--repeats', type=int, default=10, help='Number of fresh processes to time')
+    parser.add_argument('-b', '--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f'Maximum allowed total startup time, in milliseconds (default: {DEFAULT_BUDGET_MS})')
+    args = parser.parse_args(args)
+
+    results = run_startup(args.classes, args.repeats)
+    if args.output is not None:
+        save_results(args.output, results, {"classes": args.classes, "budget_ms": args.budget_ms})
+
+    for name in ("import_ns", "define_ns", "first_instance_ns", "total_ns"):
+        print(f"{name[:-3]:<18} {results[name] / 1000000:>8.2f}ms", file=sys.stderr)
+
+    if results["json_imported"]:
+        print("note: json was imported at startup", file=sys.stderr)
+
+    if (results["total_ns"] / 1000000) > args.budget_ms:
+        print(f"Startup time exceeds budget of {args.budget_ms}ms", file=sys.stderr)
+        return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
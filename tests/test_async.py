@@ -0,0 +1,330 @@
+import os
+import json
+import time
+import asyncio
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from unittest import TestCase, skipIf
+
+from versionedobj import (VersionedObject, Serializer, AsyncFileLoader, ListField, LoadObjectError,
+                          InputValidationError, migration)
+from versionedobj.utils import _FileLock
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class AsyncConfig(VersionedObject):
+    counter = 0
+    name = "test"
+
+
+class AsyncItem(VersionedObject):
+    value = 1
+
+
+class AsyncListConfig(VersionedObject):
+    items = ListField(AsyncItem)
+
+
+class MigratedConfig(VersionedObject):
+    version = "1.0.1"
+    var1 = 1
+    var2 = 2
+
+
+@migration(MigratedConfig, "1.0.0", "1.0.1")
+def migrate_100_to_101(attrs):
+    attrs['var2'] = 3
+    return attrs
+
+
+class _SlowExecutor(ThreadPoolExecutor):
+    # Executor that sleeps before running each function, so tasks can be cancelled mid-call
+    def submit(self, fn, *args, **kwargs):
+        def _slow():
+            time.sleep(0.1)
+            return fn(*args, **kwargs)
+
+        return super().submit(_slow)
+
+
+class _LoopTestCase(TestCase):
+    """
+    Base class for tests that cancel tasks while an executor call is still running. The event loop
+    is kept open until the executors have finished, so finished calls can still be reported to it.
+    """
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tempdir.name, "config.json")
+        self.loop = asyncio.new_event_loop()
+        self.executors = []
+
+    def tearDown(self):
+        for executor in self.executors:
+            executor.shutdown(wait=True)
+
+        # Handle the results of executor calls that finished after their tasks were cancelled
+        self.loop.run_until_complete(asyncio.sleep(0))
+        self.loop.close()
+        self.tempdir.cleanup()
+
+    def _executor(self, executor_class=ThreadPoolExecutor):
+        executor = executor_class(max_workers=1)
+        self.executors.append(executor)
+        return executor
+
+
+class TestAsyncSerializer(_LoopTestCase):
+
+    def test_round_trip(self):
+        """
+        Tests that to_file_async and from_file_async write and read the same data as to_file and from_file
+        """
+        async def _run():
+            obj = AsyncListConfig()
+            obj.items.append(AsyncItem())
+            obj.items[0].value = 5
+            await Serializer(obj).to_file_async(self.filename, indent=4)
+
+            loaded = AsyncListConfig()
+            await Serializer().from_file_async(self.filename, loaded)
+            return loaded
+
+        loaded = asyncio.run(_run())
+        self.assertEqual(len(loaded.items), 1)
+        self.assertEqual(loaded.items[0].value, 5)
+
+        with open(self.filename, 'r') as fh:
+            self.assertEqual(fh.read(), Serializer().to_json(loaded, indent=4))
+
+    def test_gather(self):
+        """
+        Tests loading and saving many files concurrently with asyncio.gather, using a custom executor
+        """
+        filenames = [os.path.join(self.tempdir.name, f"config{i}.json") for i in range(20)]
+
+        async def _run(executor):
+            objs = [AsyncConfig() for _ in filenames]
+            for i, obj in enumerate(objs):
+                obj.counter = i
+
+            ser = Serializer()
+            await asyncio.gather(*[ser.to_file_async(f, obj, executor=executor) for f, obj in zip(filenames, objs)])
+
+            loaded = [AsyncConfig() for _ in filenames]
+            await asyncio.gather(*[ser.from_file_async(f, obj, executor=executor)
+                                   for f, obj in zip(filenames, loaded)])
+            return loaded
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            loaded = asyncio.run(_run(executor))
+
+        self.assertEqual([obj.counter for obj in loaded], list(range(len(filenames))))
+
+    def test_errors(self):
+        """
+        Tests that from_file_async raises the same exceptions as from_file
+        """
+        ser = Serializer(AsyncConfig())
+
+        with open(self.filename, 'w') as fh:
+            fh.write("{ not json")
+
+        self.assertRaises(LoadObjectError, asyncio.run, ser.from_file_async(self.filename))
+
+        with open(self.filename, 'w') as fh:
+            json.dump({"counter": 1, "name": "x", "extra": 2}, fh)
+
+        self.assertRaises(InputValidationError, asyncio.run, ser.from_file_async(self.filename))
+        self.assertRaises(FileNotFoundError, asyncio.run,
+                          ser.from_file_async(os.path.join(self.tempdir.name, "missing.json")))
+
+    def test_process_pool_rejected(self):
+        """
+        Tests that from_file_async and to_file_async raise ValueError for executors that are not thread pools
+        """
+        ser = Serializer(AsyncConfig())
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            self.assertRaises(ValueError, self.loop.run_until_complete,
+                              ser.to_file_async(self.filename, executor=executor))
+            self.assertRaises(ValueError, self.loop.run_until_complete,
+                              ser.from_file_async(self.filename, executor=executor))
+
+        self.assertFalse(os.path.exists(self.filename))
+
+    def test_write_back(self):
+        """
+        Tests that migrated object data is written back to the file by from_file_async when write_back is set
+        """
+        with open(self.filename, 'w') as fh:
+            json.dump({"var1": 5, "var2": 2, "version": "1.0.0"}, fh, indent=4)
+
+        obj = MigratedConfig()
+        result = asyncio.run(Serializer().from_file_async(self.filename, obj, write_back=True))
+        self.assertTrue(result.success)
+        self.assertEqual(obj.var2, 3)
+
+        with open(self.filename, 'r') as fh:
+            jsonstr = fh.read()
+
+        self.assertEqual(json.loads(jsonstr), {"var1": 5, "var2": 3, "version": "1.0.1"})
+        self.assertTrue(jsonstr.startswith("{\n    "))
+
+    def test_cancel_from_file(self):
+        """
+        Tests that cancelling from_file_async before the data is loaded leaves the object unchanged
+        """
+        with open(self.filename, 'w') as fh:
+            json.dump({"counter": 5, "name": "loaded"}, fh)
+
+        obj = AsyncConfig()
+
+        async def _run(executor):
+            task = asyncio.ensure_future(Serializer(obj).from_file_async(self.filename, executor=executor))
+            await asyncio.sleep(0.02)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        self.loop.run_until_complete(_run(self._executor(_SlowExecutor)))
+
+        self.assertEqual(obj.counter, 0)
+        self.assertEqual(obj.name, "test")
+
+    def test_cancel_to_file(self):
+        """
+        Tests that cancelling to_file_async while writing does not leave a partially written file
+        """
+        obj = AsyncConfig()
+        obj.counter = 7
+
+        async def _run(executor):
+            task = asyncio.ensure_future(Serializer(obj).to_file_async(self.filename, atomic=True,
+                                                                       executor=executor))
+            await asyncio.sleep(0.02)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        executor = self._executor(_SlowExecutor)
+        self.loop.run_until_complete(_run(executor))
+
+        # Executor is shut down after the write has finished
+        executor.shutdown(wait=True)
+        with open(self.filename, 'r') as fh:
+            self.assertEqual(json.load(fh), {"counter": 7, "name": "test"})
+
+    def test_profile_events(self):
+        """
+        Tests that from_file_async and to_file_async emit read, decode, encode and write events
+        """
+        events = []
+        ser = Serializer(AsyncConfig(), profile_hook=events.append)
+
+        asyncio.run(ser.to_file_async(self.filename))
+        asyncio.run(ser.from_file_async(self.filename))
+
+        phases = [(e.operation, e.phase) for e in events if e.phase in ('read', 'decode', 'encode', 'write')]
+        self.assertEqual(phases, [('to_file_async', 'encode'), ('to_file_async', 'write'),
+                                  ('from_file_async', 'read'), ('from_file_async', 'decode')])
+
+
+class TestAsyncFileLoader(_LoopTestCase):
+
+    def test_file_loader(self):
+        """
+        Tests that AsyncFileLoader creates, loads and saves a file
+        """
+        async def _run():
+            async with AsyncFileLoader(AsyncConfig, self.filename) as cfg:
+                self.assertEqual(cfg.counter, 0)
+                cfg.counter = 1
+
+            async with AsyncFileLoader(AsyncConfig, self.filename) as cfg:
+                self.assertEqual(cfg.counter, 1)
+                cfg.counter += 1
+
+        asyncio.run(_run())
+
+        with open(self.filename, 'r') as fh:
+            self.assertEqual(json.load(fh), {"counter": 2, "name": "test"})
+
+    def test_invalid_arg(self):
+        """
+        Tests that AsyncFileLoader raises ValueError for an invalid first argument, or a process pool executor
+        """
+        self.assertRaises(ValueError, AsyncFileLoader, "AsyncConfig", self.filename)
+
+        with ProcessPoolExecutor(max_workers=1) as executor:
+            self.assertRaises(ValueError, AsyncFileLoader, AsyncConfig, self.filename, executor=executor)
+
+    @skipIf(fcntl is None, "fcntl is not available")
+    def test_lock_no_lost_updates(self):
+        """
+        Tests that concurrent AsyncFileLoader tasks with lock=True do not lose updates
+        """
+        async def _increment(count):
+            for _ in range(count):
+                async with AsyncFileLoader(AsyncConfig, self.filename, lock=True) as cfg:
+                    cfg.counter += 1
+                    await asyncio.sleep(0)
+
+        async def _run():
+            await asyncio.gather(*[_increment(5) for _ in range(4)])
+
+        asyncio.run(_run())
+
+        with open(self.filename, 'r') as fh:
+            self.assertEqual(json.load(fh)["counter"], 20)
+
+        self.assertFalse(os.path.exists(self.filename + ".tmp"))
+
+    @skipIf(fcntl is None, "fcntl is not available")
+    def test_lock_released_on_cancel(self):
+        """
+        Tests that the lock is released if an AsyncFileLoader task is cancelled while waiting for the lock
+        """
+        released = threading.Event()
+
+        async def _enter(executor):
+            async with AsyncFileLoader(AsyncConfig, self.filename, lock=True, executor=executor) as cfg:
+                cfg.counter = 99
+
+        async def _run(executor):
+            task = asyncio.ensure_future(_enter(executor))
+            await asyncio.sleep(0.1)
+            task.cancel()
+            released.set()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        def _hold():
+            # Hold the lock until the task waiting for it has been cancelled
+            with _FileLock(self.filename, True):
+                started.set()
+                released.wait(5)
+                time.sleep(0.05)
+
+        started = threading.Event()
+        holder = threading.Thread(target=_hold)
+        holder.start()
+        started.wait(5)
+        executor = self._executor()
+        self.loop.run_until_complete(_run(executor))
+
+        holder.join()
+        executor.shutdown(wait=True)
+
+        # Lock taken by the cancelled task must have been released
+        fd = os.open(self.filename + ".lock", os.O_RDWR)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            fcntl.flock(fd, fcntl.LOCK_UN)
+        finally:
+            os.close(fd)
+
+        self.assertFalse(os.path.exists(self.filename))
@@ -0,0 +1,229 @@
+import io
+import os
+import json
+import tempfile
+from contextlib import redirect_stdout, redirect_stderr
+from unittest import TestCase
+
+from versionedobj import VersionedObject, migration
+from versionedobj.batch import migrate_files, migrate_jsonl
+from versionedobj.__main__ import main
+
+
+class BatchConfig(VersionedObject):
+    version = "1.0.1"
+    var1 = 1
+    var2 = 2
+
+
+@migration(BatchConfig, "1.0.0", "1.0.1")
+def migrate_100_to_101(attrs):
+    attrs['var2'] = attrs['var1'] * 2
+    return attrs
+
+
+class TestBatchMigration(TestCase):
+    def _write_files(self, dirname):
+        docs = {
+            "a.json": {"version": "1.0.0", "var1": 5},
+            "b.json": {"version": "1.0.1", "var1": 6, "var2": 7},
+            os.path.join("sub", "c.json"): {"version": "1.0.0", "var1": 8},
+            "d.json": {"version": "0.9.0", "var1": 9},
+        }
+
+        os.makedirs(os.path.join(dirname, "sub"))
+        for name, attrs in docs.items():
+            with open(os.path.join(dirname, name), 'w') as fh:
+                json.dump(attrs, fh)
+
+        with open(os.path.join(dirname, "bad.json"), 'w') as fh:
+            fh.write("{")
+
+    def _read(self, filename):
+        with open(filename, 'r') as fh:
+            return json.load(fh)
+
+    def test_migrate_files(self):
+        """
+        Tests that a directory of JSON files is migrated, in place and to an output
+        directory, with and without a process pool
+        """
+        for processes in [1, 2]:
+            with tempfile.TemporaryDirectory() as tempdir:
+                indir = os.path.join(tempdir, "in")
+                outdir = os.path.join(tempdir, "out")
+                self._write_files(indir)
+
+                report = migrate_files(BatchConfig, indir, outdir, processes=processes)
+                self.assertEqual((report.total, report.migrated, report.unchanged, report.failed), (5, 2, 1, 2))
+                self.assertEqual(report.source_versions, {"1.0.0": 2, "1.0.1": 1, "0.9.0": 1, None: 1})
+                self.assertEqual(sorted(os.path.basename(s) for s, _ in report.failures), ["bad.json", "d.json"])
+
+                self.assertEqual(self._read(os.path.join(outdir, "sub", "c.json")),
+                                 {"version": "1.0.1", "var1": 8, "var2": 16})
+                self.assertEqual(self._read(os.path.join(outdir, "b.json")), {"version": "1.0.1", "var1": 6, "var2": 7})
+                self.assertFalse(os.path.exists(os.path.join(outdir, "d.json")))
+                self.assertEqual(self._read(os.path.join(indir, "a.json")), {"version": "1.0.0", "var1": 5})
+
+                # Migrate in place
+                report = migrate_files(BatchConfig, indir, processes=processes)
+                self.assertEqual(report.migrated, 2)
+                self.assertEqual(self._read(os.path.join(indir, "a.json")), {"version": "1.0.1", "var1": 5, "var2": 10})
+                self.assertEqual(self._read(os.path.join(indir, "d.json")), {"version": "0.9.0", "var1": 9})
+
+    def test_migrate_files_indent(self):
+        """
+        Tests that files migrated in place keep their original indentation, unless an
+        indentation level is given
+        """
+        with tempfile.TemporaryDirectory() as tempdir:
+            indented = os.path.join(tempdir, "indented.json")
+            compact = os.path.join(tempdir, "compact.json")
+            with open(indented, 'w') as fh:
+                json.dump({"version": "1.0.0", "var1": 5}, fh, indent=4)
+
+            with open(compact, 'w') as fh:
+                # Trailing newline must not be mistaken for an indented line
+                json.dump({"version": "1.0.0", "var1": 6}, fh)
+                fh.write('\n')
+
+            report = migrate_files(BatchConfig, tempdir, processes=1)
+            self.assertEqual(report.migrated, 2)
+
+            with open(indented, 'r') as fh:
+                self.assertEqual(fh.read(), json.dumps({"version": "1.0.1", "var1": 5, "var2": 10}, indent=4))
+
+            with open(compact, 'r') as fh:
+                self.assertEqual(fh.read(), json.dumps({"version": "1.0.1", "var1": 6, "var2": 12}))
+
+            with open(compact, 'w') as fh:
+                json.dump({"version": "1.0.0", "var1": 6}, fh)
+
+            migrate_files(BatchConfig, compact, processes=1, indent=2)
+            with open(compact, 'r') as fh:
+                self.assertEqual(fh.read(), json.dumps({"version": "1.0.1", "var1": 6, "var2": 12}, indent=2))
+
+    def test_migrate_jsonl(self):
+        """
+        Tests that a JSON Lines stream is migrated in order, and that lines that fail to
+        migrate are written unchanged
+        """
+        lines = [
+            '{"version": "1.0.0", "var1": 1}',
+            '',
+            '{"version": "1.0.1", "var1": 2, "var2": 3}',
+            'not json',
+            '{"version": "1.0.0", "var1": 4, "var3": 5}',
+        ]
+
+        for processes in [1, 2]:
+            out = io.StringIO()
+            report = migrate_jsonl(BatchConfig, io.StringIO('\n'.join(lines)), out, processes=processes)
+            self.assertEqual((report.total, report.migrated, report.unchanged, report.failed), (4, 1, 1, 2))
+            self.assertEqual([s for s, _ in report.failures], [4, 5])
+
+            outlines = out.getvalue().splitlines()
+            self.assertEqual(json.loads(outlines[0]), {"version": "1.0.1", "var1": 1, "var2": 2})
+            self.assertEqual(outlines[1:], lines[1:])
+
+    def test_migration_errors(self):
+        """
+        Tests that a document whose migration function raises an exception is reported as
+        a failure, and does not stop the other documents from being migrated
+        """
+        for processes in [1, 2]:
+            with tempfile.TemporaryDirectory() as tempdir:
+                # Migration function raises KeyError, since 'var1' is missing
+                docs = {"a.json": {"version": "1.0.0", "var1": 5}, "b.json": {"version": "1.0.0"},
+                        "c.json": {"version": "1.0.0", "var1": 7}}
+                for name, attrs in docs.items():
+                    with open(os.path.join(tempdir, name), 'w') as fh:
+                        json.dump(attrs, fh)
+
+                report = migrate_files(BatchConfig, tempdir, processes=processes)
+                self.assertEqual((report.total, report.migrated, report.failed), (3, 2, 1))
+                self.assertEqual(os.path.basename(report.failures[0][0]), "b.json")
+                self.assertIn("KeyError", report.failures[0][1])
+
+                self.assertEqual(self._read(os.path.join(tempdir, "b.json")), {"version": "1.0.0"})
+                self.assertEqual(self._read(os.path.join(tempdir, "c.json")), {"version": "1.0.1", "var1": 7, "var2": 14})
+
+            lines = ['{"version": "1.0.0", "var1": 1}', '{"version": "1.0.0"}', '{"version": "1.0.0", "var1": 3}']
+            out = io.StringIO()
+            report = migrate_jsonl(BatchConfig, io.StringIO('\n'.join(lines)), out, processes=processes)
+            self.assertEqual((report.total, report.migrated, report.failed), (3, 2, 1))
+            self.assertEqual(report.failures[0][0], 2)
+            self.assertIn("KeyError", report.failures[0][1])
+            self.assertEqual(out.getvalue().splitlines()[1], lines[1])
+
+    def test_migrate_jsonl_streaming(self):
+        """
+        Tests that a JSON Lines stream is read and written one chunk at a time, and that
+        a file can be migrated in place
+        """
+        from versionedobj.batch import _JSONL_CHUNK_SIZE
+
+        num_lines = (_JSONL_CHUNK_SIZE * 3) + 1
+        line = '{"version": "1.0.0", "var1": 1}\n'
+        consumed = []
+
+        def _input():
+            for i in range(num_lines):
+                consumed.append(i)
+                yield line
+
+        class _Output(object):
+            def __init__(self):
+                self.writes = []
+
+            def write(self, data):
+                # Number of lines read, and written, when each chunk is written
+                self.writes.append((len(consumed), data.count('\n')))
+
+        for processes in [1, 2]:
+            consumed.clear()
+            out = _Output()
+            report = migrate_jsonl(BatchConfig, _input(), out, processes=processes)
+            self.assertEqual(report.migrated, num_lines)
+            self.assertEqual([n for _, n in out.writes], [_JSONL_CHUNK_SIZE] * 3 + [1])
+
+            if processes == 1:
+                self.assertEqual(out.writes[0][0], _JSONL_CHUNK_SIZE)
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            filename = os.path.join(tempdir, "data.jsonl")
+            with open(filename, 'w') as fh:
+                fh.write(line * num_lines)
+
+            report = migrate_jsonl(BatchConfig, filename, filename, processes=2)
+            self.assertEqual(report.migrated, num_lines)
+
+            with open(filename, 'r') as fh:
+                outlines = fh.read().splitlines()
+
+            self.assertEqual(len(outlines), num_lines)
+            self.assertEqual(json.loads(outlines[-1]), {"version": "1.0.1", "var1": 1, "var2": 2})
+            self.assertEqual(os.listdir(tempdir), ["data.jsonl"])
+
+    def test_cli(self):
+        """
+        Tests migrating files with 'python -m versionedobj migrate'
+        """
+        with tempfile.TemporaryDirectory() as tempdir:
+            self._write_files(tempdir)
+            stdout = io.StringIO()
+            with redirect_stdout(stdout), redirect_stderr(io.StringIO()):
+                ret = main(["migrate", f"{__name__}:BatchConfig", tempdir, "-j", "1", "--json-report"])
+
+            self.assertEqual(ret, 1)
+            self.assertEqual(json.loads(stdout.getvalue())["migrated"], 2)
+            self.assertEqual(self._read(os.path.join(tempdir, "a.json")), {"version": "1.0.1", "var1": 5, "var2": 10})
+
+            # Unknown classes are reported as usage errors
+            for name in ["no_such_module:Config", f"{__name__}:NoSuchClass", f"{__name__}:TestCase", "BatchConfig"]:
+                stderr = io.StringIO()
+                with redirect_stderr(stderr), self.assertRaises(SystemExit) as cm:
+                    main(["migrate", name, tempdir])
+
+                self.assertEqual(cm.exception.code, 2)
+                self.assertIn(f"cannot load class '{name}'", stderr.getvalue())
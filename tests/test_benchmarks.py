@@ -0,0 +1,93 @@
+from unittest import TestCase
+
+from tests.performance_tests.benchmarks import BENCHMARKS, run_benchmarks
+from tests.performance_tests.runner import compare
+from tests.performance_tests.scaling import fit_exponent, find_superlinear
+from tests.performance_tests.memory import run_memory_benchmarks
+from tests.performance_tests.baselines import (IMPLEMENTATIONS, OPERATIONS, make_dataclass, load_dataclass,
+                                               run_baselines, overheads)
+from tests.performance_tests.classgen import make_class, make_list_class
+from tests.performance_tests.startup import run_startup
+
+
+class TestBenchmarks(TestCase):
+    def test_run_benchmarks(self):
+        """
+        Tests that all benchmarks run, and produce a summary for each benchmark
+        """
+        results = run_benchmarks(repeats=1, warmup=0)
+        self.assertEqual(sorted(results), sorted(BENCHMARKS))
+        for summary in results.values():
+            self.assertGreater(summary["median_ns"], 0)
+            self.assertEqual(summary["repeats"], 1)
+
+    def test_compare(self):
+        """
+        Tests that benchmarks slower than the baseline by more than the threshold are reported
+        """
+        baseline = {"a": {"median_ns": 100}, "b": {"median_ns": 100}, "c": {"median_ns": 100}}
+        results = {"a": {"median_ns": 110}, "b": {"median_ns": 130}, "d": {"median_ns": 500}}
+
+        comparisons, regressions = compare(results, baseline, threshold=0.2)
+        self.assertEqual(comparisons, {"a": 1.1, "b": 1.3})
+        self.assertEqual(regressions, ["b"])
+
+    def test_fit_exponent(self):
+        """
+        Tests that growth exponents are fitted correctly, and that superlinear operations are reported
+        """
+        sizes = [10, 20, 40, 80]
+        self.assertAlmostEqual(fit_exponent(sizes, [5 * s for s in sizes]), 1.0)
+        self.assertAlmostEqual(fit_exponent(sizes, [s * s for s in sizes]), 2.0)
+
+        results = {"width": {"a": {"exponent": 1.0}, "b": {"exponent": 1.9}}}
+        self.assertEqual(find_superlinear(results, 1.3), [("width", "b", 1.9)])
+
+    def test_memory_benchmarks(self):
+        """
+        Tests that memory benchmarks run, and that serialization does not create _ObjField instances
+        """
+        results = run_memory_benchmarks("small")
+        self.assertGreater(results["construction"]["bytes_per_instance"], 0)
+        self.assertGreater(results["to_json"]["peak_bytes"], 0)
+        self.assertEqual(results["to_dict"]["objfields"], 0)
+        self.assertEqual(results["from_dict"]["objfields"], 0)
+
+    def test_baseline_dataclasses(self):
+        """
+        Tests that generated dataclasses produce the same object data as the equivalent VersionedObject classes
+        """
+        import dataclasses
+        from versionedobj import Serializer
+
+        nested_class = make_class(3, 8, version="1.0.0")
+
+        for cls, obj in ((nested_class, nested_class()), make_list_class(5)):
+            attrs = Serializer().to_dict(obj)
+            dc = make_dataclass(cls)
+            self.assertEqual(dataclasses.asdict(load_dataclass(dc, attrs)), attrs)
+
+    def test_run_baselines(self):
+        """
+        Tests that all operations run with all implementations, and that overhead ratios are reported
+        """
+        results = run_baselines(repeats=1, warmup=0)
+        self.assertEqual(list(results), OPERATIONS)
+        for impls in results.values():
+            self.assertEqual(sorted(impls), sorted(IMPLEMENTATIONS))
+
+        ratios = overheads(results)
+        for op in OPERATIONS:
+            self.assertEqual(sorted(ratios[op]), ["dataclasses", "dict"])
+            self.assertGreater(ratios[op]["dict"], 0.0)
+
+    def test_startup(self):
+        """
+        Tests that the startup benchmark runs, and that importing versionedobj, defining
+        classes and creating instances does not import the json module
+        """
+        results = run_startup(num_classes=40, repeats=1)
+        self.assertGreater(results["import_ns"], 0)
+        self.assertGreater(results["define_ns"], 0)
+        self.assertGreater(results["first_instance_ns"], 0)
+        self.assertFalse(results["json_imported"])
@@ -254,3 +254,58 @@ class TestVersionedObjectExceptions(TestCase):
             var2 = NestedConfig2
 
         self.assertRaises(InvalidVersionAttributeError, TestConfig1)
+
+    def test_validate_dict_all_errors(self):
+        """
+        Tests that validate_dict reports all unrecognized and missing attributes with
+        a single exception
+        """
+        class NestedConfig(VersionedObject):
+            val1 = "a"
+            val2 = "bb"
+
+        class TestConfig(VersionedObject):
+            version = "1.0.0"
+            val1 = 1
+            val2 = NestedConfig
+            val3 = NestedConfig
+
+        ser = Serializer(TestConfig())
+        try:
+            ser.validate_dict({"version": "1.0.0", "val1": 1, "val4": 2, "val2": {"val1": 1, "val9": 3}, "val3": 5})
+        except InputValidationError as e:
+            self.assertEqual(e.errors, ["Unrecognized attribute name 'val4' in dict",
+                                        "Unrecognized attribute name 'val2.val9' in dict",
+                                        "Unrecognized attribute name 'val3' in dict",
+                                        "Attribute missing from dict: 'val2.val2'",
+                                        "Attribute missing from dict: 'val3.val1'",
+                                        "Attribute missing from dict: 'val3.val2'"])
+        else:
+            self.fail("InputValidationError not raised")
+
+        # Validators are compiled once per class and filter combination
+        self.assertEqual(list(TestConfig._vobj__validators), [((), ())])
+        ser.validate_dict({"val1": 1}, only=['val1'])
+        ser.validate_dict({"val1": 1, "val2": {"val1": "x", "val2": "y"}, "val3": {"val1": "x", "val2": "y"}})
+        self.assertEqual(list(TestConfig._vobj__validators), [((), ()), (('val1',), ())])
+        self.assertRaises(InputValidationError, ser.validate_dict, [1, 2])
+
+    def test_from_dict_validation_failure_leaves_object_unchanged(self):
+        """
+        Tests that from_dict does not change any object values when validation fails,
+        even for values that were seen before the invalid attribute
+        """
+        class NestedConfig(VersionedObject):
+            val1 = "a"
+            val2 = "bb"
+
+        class TestConfig(VersionedObject):
+            val1 = 1
+            val2 = NestedConfig
+
+        cfg = TestConfig()
+        ser = Serializer(cfg)
+        d = {"val1": 5, "val2": {"val1": "q", "val2": "r", "val3": "s"}}
+        self.assertRaises(InputValidationError, ser.from_dict, d)
+        self.assertEqual(cfg, TestConfig())
+        self.assertEqual(d, {"val1": 5, "val2": {"val1": "q", "val2": "r", "val3": "s"}})
@@ -0,0 +1,188 @@
+import os
+import sys
+import time
+import tempfile
+import threading
+import multiprocessing
+from unittest import TestCase, skipIf
+
+from versionedobj import VersionedObject, Serializer, FileLoader, LoadObjectError
+from versionedobj.utils import _FileLock
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+class LockConfig(VersionedObject):
+    counter = 0
+    name = "test"
+
+
+def _increment(filename, count):
+    # Worker process for test_file_loader_no_lost_updates
+    for _ in range(count):
+        with FileLoader(LockConfig, filename, lock=True) as cfg:
+            cfg.counter += 1
+
+
+@skipIf(fcntl is None, "fcntl is not available")
+class TestFileLocking(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.tempdir.name, "config.json")
+
+    def tearDown(self):
+        self.tempdir.cleanup()
+
+    def _run_blocked(self, func, lock):
+        # Run func in a thread while holding a lock, and check whether it finished before the lock was released
+        done = threading.Event()
+
+        def _run():
+            func()
+            done.set()
+
+        with lock:
+            thread = threading.Thread(target=_run)
+            thread.start()
+            finished_while_locked = done.wait(0.2)
+
+        thread.join(5)
+        self.assertTrue(done.is_set())
+        return not finished_while_locked
+
+    def test_locked_write_and_read(self):
+        """
+        Tests that locked writes and reads use a sidecar lock file, and load the same data
+        """
+        cfg = LockConfig()
+        cfg.counter = 12
+
+        ser = Serializer()
+        ser.to_file(self.filename, cfg, lock=True)
+        self.assertTrue(os.path.isfile(self.filename + '.lock'))
+
+        loaded = LockConfig()
+        ser.from_file(self.filename, loaded, lock=True)
+        self.assertEqual(loaded.counter, 12)
+
+    def test_readers_and_writers(self):
+        """
+        Tests that locked reads wait for writers but not for other readers, and that locked
+        writes wait for readers
+        """
+        Serializer().to_file(self.filename, LockConfig())
+
+        read = lambda: Serializer().from_file(self.filename, LockConfig(), lock=True)
+        write = lambda: Serializer().to_file(self.filename, LockConfig(), lock=True)
+
+        self.assertFalse(self._run_blocked(read, _FileLock(self.filename, False)))
+        self.assertTrue(self._run_blocked(read, _FileLock(self.filename, True)))
+        self.assertTrue(self._run_blocked(write, _FileLock(self.filename, False)))
+
+    def test_atomic_write(self):
+        """
+        Tests that atomic writes replace the file, leaving no temporary files behind
+        """
+        Serializer().to_file(self.filename, LockConfig())
+        inode = os.stat(self.filename).st_ino
+
+        cfg = LockConfig()
+        cfg.name = "replaced"
+        Serializer().to_file(self.filename, cfg, atomic=True)
+
+        self.assertNotEqual(os.stat(self.filename).st_ino, inode)
+        self.assertEqual(os.listdir(self.tempdir.name), ["config.json"])
+
+        loaded = LockConfig()
+        Serializer().from_file(self.filename, loaded)
+        self.assertEqual(loaded.name, "replaced")
+
+    def test_atomic_write_fsync(self):
+        """
+        Tests that atomic writes flush the new file to disk before replacing the old file,
+        and flush the directory after
+        """
+        from unittest import mock
+
+        synced = []
+
+        def _fsync(fd):
+            # Record whether each flushed fd is the temporary file or the directory
+            st = os.fstat(fd)
+            synced.append(('dir' if os.path.isdir(self.tempdir.name) and os.path.samestat(
+                st, os.stat(self.tempdir.name)) else 'file', os.path.exists(self.filename)))
+
+        with mock.patch('os.fsync', side_effect=_fsync):
+            Serializer().to_file(self.filename, LockConfig(), atomic=True)
+
+        # Temporary file is flushed before it replaces the file, directory is flushed after
+        self.assertEqual(synced, [('file', False), ('dir', True)])
+
+    def test_file_loader_no_lost_updates(self):
+        """
+        Tests that concurrent FileLoader read-modify-write cycles from multiple processes
+        do not lose updates when locking is enabled
+        """
+        Serializer().to_file(self.filename, LockConfig())
+
+        ctx = multiprocessing.get_context('fork')
+        procs = [ctx.Process(target=_increment, args=(self.filename, 10)) for _ in range(4)]
+        for p in procs:
+            p.start()
+
+        for p in procs:
+            p.join(30)
+            self.assertEqual(p.exitcode, 0)
+
+        cfg = LockConfig()
+        Serializer().from_file(self.filename, cfg)
+        self.assertEqual(cfg.counter, 40)
+
+    def _assert_unlocked(self, filename):
+        # Check that an exclusive lock can be taken on the sidecar lock file without waiting
+        fd = os.open(filename + '.lock', os.O_RDWR | os.O_CREAT)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        finally:
+            os.close(fd)
+
+    def test_file_loader_releases_lock(self):
+        """
+        Tests that FileLoader releases its lock on exit, and when loading fails on entry
+        """
+        with FileLoader(LockConfig, self.filename, lock=True) as cfg:
+            cfg.counter = 5
+
+        self._assert_unlocked(self.filename)
+
+        with open(self.filename, 'w') as fh:
+            fh.write("not json")
+
+        loader = FileLoader(LockConfig, self.filename, lock=True)
+        self.assertRaises(LoadObjectError, loader.__enter__)
+        self._assert_unlocked(self.filename)
+
+
+class TestFileLockingUnavailable(TestCase):
+    def test_no_fcntl(self):
+        """
+        Tests that NotImplementedError is raised for locked I/O when fcntl is not available
+        """
+        saved = sys.modules.get('fcntl', None)
+        sys.modules['fcntl'] = None
+        try:
+            with tempfile.TemporaryDirectory() as tempdir:
+                filename = os.path.join(tempdir, "config.json")
+                self.assertRaises(NotImplementedError, Serializer().to_file, filename, LockConfig(), lock=True)
+                self.assertRaises(NotImplementedError, FileLoader(LockConfig, filename, lock=True).__enter__)
+
+                # Unlocked I/O still works
+                Serializer().to_file(filename, LockConfig())
+        finally:
+            if saved is None:
+                del sys.modules['fcntl']
+            else:
+                sys.modules['fcntl'] = saved
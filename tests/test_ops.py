@@ -0,0 +1,91 @@
+import copy
+from unittest import TestCase
+
+from versionedobj import VersionedObject, Serializer, ops, add_migration_ops, migration
+from versionedobj.ops import _OpsMigration, _fuse_ops
+
+
+class TestMigrationOps(TestCase):
+    def test_ops_migration_chain(self):
+        """
+        Tests that consecutive declarative migrations are fused, and produce the same
+        result as applying each operation in turn
+        """
+        class DisplayConfig(VersionedObject):
+            volumes = [0.5]
+            mode = "windowed"
+
+        class TestConfig(VersionedObject):
+            version = "1.0.3"
+            username = ""
+            display = DisplayConfig
+            level = 1
+
+        add_migration_ops(TestConfig, None, "1.0.0", [
+            ops.rename('name', 'username'),
+            ops.default('level', 0),
+        ])
+
+        add_migration_ops(TestConfig, "1.0.0", "1.0.1", [
+            ops.move('volume', 'display.volumes'),
+            ops.transform('display.volumes', lambda v: [v]),
+            ops.drop('display.resolution'),
+        ])
+
+        @migration(TestConfig, "1.0.1", "1.0.2")
+        def migrate_101_to_102(attrs):
+            attrs['level'] += 1
+            return attrs
+
+        add_migration_ops(TestConfig, "1.0.2", "1.0.3", [
+            ops.rename('display.display_mode', 'mode'),
+        ])
+
+        ser = Serializer()
+        cfg = TestConfig()
+        data = {"name": "bob", "volume": 0.2, "display": {"resolution": "800x600", "display_mode": "full"}}
+        result = ser.from_dict(data, cfg)
+
+        self.assertTrue(result.success)
+        self.assertEqual(result.path, [None, "1.0.0", "1.0.1", "1.0.2", "1.0.3"])
+        self.assertEqual(ser.to_dict(cfg), {"version": "1.0.3", "username": "bob", "level": 1,
+                                            "display": {"volumes": [0.2], "mode": "full"}})
+
+        # First two migrations are fused into one migration function
+        steps = TestConfig._vobj__migration_paths[(None, "1.0.3")]
+        self.assertEqual([versions for _, versions in steps], [["1.0.0", "1.0.1"], ["1.0.2"], ["1.0.3"]])
+        self.assertEqual(len(steps[0][0].ops), 5)
+
+    def test_fused_ops_match_sequential_ops(self):
+        """
+        Tests that fused operations give the same result as applying operations one at a time,
+        including operations that touch the same fields
+        """
+        op_list = [
+            ops.rename('a', 'b'),
+            ops.rename('b', 'c'),
+            ops.default('d', 4),
+            ops.transform('d', lambda v: v * 2),
+            ops.move('e.f', 'g'),
+            ops.drop('e'),
+            ops.default('e.h', 5),
+            ops.move('missing', 'c'),
+        ]
+
+        for data in [{"a": 1, "b": 2, "e": {"f": 3}}, {"b": 2, "d": 1}, {}]:
+            expected = copy.deepcopy(data)
+            for op in op_list:
+                expected = _OpsMigration([op])(expected)
+
+            self.assertEqual(_OpsMigration(op_list)(copy.deepcopy(data)), expected)
+
+        self.assertEqual(len(_fuse_ops(op_list)), 3)
+
+    def test_invalid_ops(self):
+        """
+        Tests that invalid migration operations are rejected
+        """
+        self.assertRaises(ValueError, ops.rename, 'a.b', 'c.d')
+        self.assertRaises(ValueError, ops.move, 'a', 'a.b')
+        self.assertRaises(ValueError, ops.transform, 'a', 5)
+        self.assertRaises(ValueError, _OpsMigration, [lambda attrs: attrs])
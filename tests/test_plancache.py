@@ -0,0 +1,224 @@
+import os
+import sys
+import tempfile
+import importlib
+from unittest import TestCase
+
+from versionedobj import Serializer, InputValidationError, plan_cache
+
+
+MODULE_SOURCE = """
+from versionedobj import VersionedObject
+
+class Nested(VersionedObject):
+    val1: int = 1
+    val2 = "two"
+
+class Config(VersionedObject):
+    version = "1.0.0"
+    nested = Nested
+    val3 = 3.0
+"""
+
+
+class TestPlanCache(TestCase):
+    def setUp(self):
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.cachedir = os.path.join(self.tempdir.name, "cache")
+        self.module_file = os.path.join(self.tempdir.name, "plancache_test_module.py")
+        with open(self.module_file, 'w') as fh:
+            fh.write(MODULE_SOURCE)
+
+        sys.path.insert(0, self.tempdir.name)
+        self.module = importlib.import_module("plancache_test_module")
+
+    def tearDown(self):
+        plan_cache.disable()
+        sys.path.remove(self.tempdir.name)
+        sys.modules.pop("plancache_test_module", None)
+        self.tempdir.cleanup()
+
+    def _cache_file(self):
+        # Name of the cache file for the test module
+        plan_cache.directory = os.path.abspath(self.cachedir)
+        try:
+            return plan_cache._filename("plancache_test_module", os.path.abspath(self.module_file))
+        finally:
+            plan_cache.directory = None
+
+    def _validate(self, attrs):
+        # Validate with a fresh plan cache state, as if in a new process
+        self.module.Config._vobj__validators.clear()
+        plan_cache.enable(self.cachedir)
+        plan_cache.hits = 0
+        plan_cache.misses = 0
+
+        try:
+            Serializer(check_types=True).validate_dict(attrs, self.module.Config())
+        finally:
+            plan_cache.flush()
+
+    def test_cached_validator(self):
+        """
+        Tests that validators are cached on disk, and that cached validators find the same problems
+        """
+        attrs = {"version": "1.0.0", "nested": {"val1": 5, "val2": "x"}, "val3": 1.5}
+
+        self._validate(attrs)
+        self.assertEqual((plan_cache.hits, plan_cache.misses), (0, 1))
+        self.assertTrue(os.path.isfile(self._cache_file()))
+
+        self._validate(attrs)
+        self.assertEqual((plan_cache.hits, plan_cache.misses), (1, 0))
+
+        bad_attrs = {"version": "1.0.0", "nested": {"val1": "5", "val4": 1}, "val3": 1.5}
+        with self.assertRaises(InputValidationError) as cm:
+            self._validate(bad_attrs)
+
+        self.assertEqual(plan_cache.hits, 1)
+        self.assertEqual(cm.exception.errors,
+                         ["Unrecognized attribute name 'nested.val4' in dict",
+                          "Attribute missing from dict: 'nested.val2'",
+                          "Invalid type for attribute 'nested.val1': expected int, got str"])
+
+    def test_changed_module(self):
+        """
+        Tests that cached validators are not used after the module defining the class is modified
+        """
+        attrs = {"version": "1.0.0", "nested": {"val1": 5, "val2": "x"}, "val3": 1.5}
+        self._validate(attrs)
+
+        with open(self.module_file, 'a') as fh:
+            fh.write("\n# modified\n")
+
+        self._validate(attrs)
+        self.assertEqual((plan_cache.hits, plan_cache.misses), (0, 1))
+
+    def test_changed_class_not_cached(self):
+        """
+        Tests that cached validators are not used for classes changed at runtime, or for classes
+        containing them
+        """
+        attrs = {"version": "1.0.0", "nested": {"val1": 5, "val2": "x"}, "val3": 1.5}
+        self._validate(attrs)
+
+        self.module.Nested.val5 = 5
+        attrs["nested"]["val5"] = 6
+        self._validate(attrs)
+        self.assertEqual((plan_cache.hits, plan_cache.misses), (0, 0))
+
+    def test_same_module_name(self):
+        """
+        Tests that modules with the same name in different directories do not share cached validators
+        """
+        sources = {
+            "a": "from versionedobj import VersionedObject\n\nclass Config(VersionedObject):\n    name = 'x'\n",
+            "b": "from versionedobj import VersionedObject\n\nclass Config(VersionedObject):\n"
+                 "    host = 'x'\n    port = 1\n",
+        }
+        attrs = {"a": {"name": "y"}, "b": {"host": "y", "port": 2}}
+        plan_cache.hits = 0
+
+        for dirname in ["a", "b", "a"]:
+            path = os.path.join(self.tempdir.name, dirname)
+            if not os.path.isdir(path):
+                os.makedirs(path)
+                with open(os.path.join(path, "plancache_same_name.py"), 'w') as fh:
+                    fh.write(sources[dirname])
+
+            sys.path.insert(0, path)
+            try:
+                module = importlib.import_module("plancache_same_name")
+                plan_cache.enable(self.cachedir)
+                Serializer().validate_dict(attrs[dirname], module.Config())
+                plan_cache.flush()
+            finally:
+                sys.path.remove(path)
+                sys.modules.pop("plancache_same_name", None)
+
+        self.assertEqual(plan_cache.hits, 1)
+        self.assertEqual(len(os.listdir(self.cachedir)), 2)
+
+    def test_runtime_attributes(self):
+        """
+        Tests that cached validators are not used when the attributes defined by an unmodified
+        module file depend on runtime state
+        """
+        source = ("import os\nfrom versionedobj import VersionedObject\n\nclass Config(VersionedObject):\n"
+                  "    a = 1\n    if os.environ.get('PLANCACHE_TEST_ATTR_B'):\n        b = 2\n")
+        path = os.path.join(self.tempdir.name, "runtime")
+        os.makedirs(path)
+        with open(os.path.join(path, "plancache_runtime.py"), 'w') as fh:
+            fh.write(source)
+
+        plan_cache.hits = 0
+        sys.path.insert(0, path)
+        try:
+            for env_value, attrs in [("", {"a": 1}), ("1", {"a": 1, "b": 3}), ("1", {"a": 1, "b": 3})]:
+                os.environ['PLANCACHE_TEST_ATTR_B'] = env_value
+                module = importlib.import_module("plancache_runtime")
+                plan_cache.enable(self.cachedir)
+                try:
+                    Serializer().validate_dict(attrs, module.Config())
+                finally:
+                    plan_cache.flush()
+                    sys.modules.pop("plancache_runtime", None)
+        finally:
+            os.environ.pop('PLANCACHE_TEST_ATTR_B', None)
+            sys.path.remove(path)
+
+        # Only the last run can use the validator cached by the run before it
+        self.assertEqual(plan_cache.hits, 1)
+
+    def test_main_scripts(self):
+        """
+        Tests that the '__main__' modules of different scripts do not share cached validators
+        """
+        import subprocess
+
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        env = dict(os.environ, VERSIONEDOBJ_PLAN_CACHE=self.cachedir, PYTHONPATH=root)
+        scripts = [
+            "class Config(VersionedObject):\n    name = 'x'\n\nattrs = {'name': 'y'}\n",
+            "class Config(VersionedObject):\n    host = 'x'\n    port = 1\n\nattrs = {'host': 'y', 'port': 2}\n",
+        ]
+
+        for i, script in enumerate(scripts):
+            path = os.path.join(self.tempdir.name, f"script{i}")
+            os.makedirs(path)
+            filename = os.path.join(path, "main.py")
+            with open(filename, 'w') as fh:
+                fh.write("from versionedobj import VersionedObject, Serializer\n\n" + script +
+                         "Serializer().from_dict(attrs, Config())\n")
+
+            subprocess.check_call([sys.executable, filename], env=env)
+
+    def test_corrupt_cache_file(self):
+        """
+        Tests that an unreadable cache file is ignored, and replaced
+        """
+        attrs = {"version": "1.0.0", "nested": {"val1": 5, "val2": "x"}, "val3": 1.5}
+        os.makedirs(self.cachedir)
+        with open(self._cache_file(), 'wb') as fh:
+            fh.write(b"\x00garbage")
+
+        self._validate(attrs)
+        self.assertEqual((plan_cache.hits, plan_cache.misses), (0, 1))
+
+        self._validate(attrs)
+        self.assertEqual((plan_cache.hits, plan_cache.misses), (1, 0))
+
+    def test_local_classes_not_cached(self):
+        """
+        Tests that classes defined inside functions are not cached
+        """
+        from versionedobj import VersionedObject
+
+        class LocalConfig(VersionedObject):
+            val = 1
+
+        plan_cache.enable(self.cachedir)
+        Serializer().validate_dict({"val": 2}, LocalConfig())
+        plan_cache.flush()
+
+        self.assertEqual(os.listdir(self.cachedir), [])
@@ -1,7 +1,8 @@
 import os
 from unittest import TestCase
 
-from versionedobj import (VersionedObject, FileLoader, LoadObjectError, InvalidFilterError, Serializer, CustomValue, migration, ListField)
+from versionedobj import (VersionedObject, FileLoader, LoadObjectError, InvalidFilterError, InputValidationError, Serializer,
+                          CustomValue, migration, ListField)
 
 
 class TestVersionedObjectSerializer(TestCase):
@@ -1919,3 +1920,516 @@ class TestVersionedObjectSerializer(TestCase):
         config2 = TestConfig()
         self.assertEqual(len(config.var1), 1)
         self.assertEqual(len(config2.var1), 0)
+
+    def test_shape_cache(self):
+        """
+        Tests that validation is skipped for dicts with a structure that has already
+        passed validation, when the shape cache is enabled
+        """
+        class NestedConfig(VersionedObject):
+            var1 = 1
+
+        class TestConfig(VersionedObject):
+            var1 = 1
+            var2 = NestedConfig
+
+        ser = Serializer(shape_cache_size=2)
+        cfg = TestConfig()
+
+        ser.from_dict({"var1": 2, "var2": {"var1": 3}}, cfg)
+        self.assertEqual((ser.shape_cache_hits, ser.shape_cache_misses), (0, 1))
+
+        ser.from_dict({"var1": 4, "var2": {"var1": 5}}, cfg)
+        self.assertEqual((ser.shape_cache_hits, ser.shape_cache_misses), (1, 1))
+        self.assertEqual(cfg.var1, 4)
+        self.assertEqual(cfg.var2.var1, 5)
+
+        # Different structure is validated
+        self.assertRaises(InputValidationError, ser.from_dict, {"var1": 4, "var2": {"var2": 5}}, cfg)
+        self.assertEqual((ser.shape_cache_hits, ser.shape_cache_misses), (1, 2))
+
+        # Failed validation is not cached
+        self.assertRaises(InputValidationError, ser.validate_dict, {"var1": 4, "var2": {"var2": 5}}, cfg)
+        self.assertEqual((ser.shape_cache_hits, ser.shape_cache_misses), (1, 3))
+
+        # Same structure with different filters is validated separately
+        ser.from_dict({"var1": 6}, cfg, only=['var1'])
+        ser.validate_dict({"var1": 6}, cfg, only=['var1'])
+        self.assertEqual((ser.shape_cache_hits, ser.shape_cache_misses), (2, 4))
+
+        # Least recently used structure is forgotten when the cache is full
+        ser.validate_dict({"var2": {"var1": 6}, "var1": 5}, cfg)
+        ser.validate_dict({"var1": 6, "var2": {"var1": 3}}, cfg)
+        self.assertEqual((ser.shape_cache_hits, ser.shape_cache_misses), (2, 6))
+
+        ser.clear_shape_cache()
+        self.assertEqual((ser.shape_cache_hits, ser.shape_cache_misses), (0, 0))
+        self.assertEqual(len(ser._shape_cache), 0)
+
+    def test_shape_cache_single_traversal(self):
+        """
+        Tests that a shape cache hit validates and collects values in a single traversal,
+        without the full check that a cache miss needs
+        """
+        from unittest import mock
+        from versionedobj.validation import _ValidatorNode
+
+        class NestedConfig(VersionedObject):
+            var1 = 1
+
+        class TestConfig(VersionedObject):
+            var1 = 1
+            var2 = NestedConfig
+
+        ser = Serializer(shape_cache_size=2)
+        cfg = TestConfig()
+
+        with mock.patch.object(_ValidatorNode, 'check', autospec=True, side_effect=_ValidatorNode.check) as check, \
+                mock.patch.object(_ValidatorNode, 'collect_shape', autospec=True,
+                                  side_effect=_ValidatorNode.collect_shape) as collect_shape:
+            ser.from_dict({"var1": 2, "var2": {"var1": 3}}, cfg)
+            self.assertEqual(check.call_count, 2)
+            self.assertEqual(collect_shape.call_count, 2)
+
+            check.reset_mock()
+            collect_shape.reset_mock()
+            ser.from_dict({"var1": 4, "var2": {"var1": 5}}, cfg)
+
+            # One call per nesting level, and no checks
+            self.assertEqual(check.call_count, 0)
+            self.assertEqual(collect_shape.call_count, 2)
+
+        self.assertEqual((cfg.var1, cfg.var2.var1), (4, 5))
+
+    def test_check_types(self):
+        """
+        Tests that attribute value types are validated when type checking is enabled,
+        including when validation is skipped by the shape cache
+        """
+        from typing import Optional, List
+
+        class NestedConfig(VersionedObject):
+            var1 = 1.0
+            var2: List[int] = []
+
+        class TestConfig(VersionedObject):
+            var1 = 1
+            var2: Optional[str] = None
+            var3 = None
+            var4 = NestedConfig
+            var5 = False
+
+        cfg = TestConfig()
+        valid = {"var1": 2, "var2": None, "var3": "x", "var4": {"var1": 3, "var2": [1]}, "var5": True}
+        invalid = {"var1": "2", "var2": 5, "var3": 1, "var4": {"var1": 3.5, "var2": {}}, "var5": 0}
+
+        # Types are not checked by default
+        Serializer().validate_dict(invalid, cfg)
+
+        ser = Serializer(shape_cache_size=4, check_types=True)
+        ser.from_dict(valid, cfg)
+        self.assertEqual(cfg.var4.var1, 3)
+
+        for _ in range(2):
+            with self.assertRaises(InputValidationError) as ctx:
+                ser.from_dict(invalid, cfg)
+
+            self.assertEqual(ctx.exception.errors, [
+                "Invalid type for attribute 'var1': expected int, got str",
+                "Invalid type for attribute 'var2': expected NoneType or str, got int",
+                "Invalid type for attribute 'var5': expected bool, got int",
+                "Invalid type for attribute 'var4.var2': expected list, got dict",
+            ])
+
+            # Object is not modified when type checking fails
+            self.assertEqual(cfg.var1, 2)
+
+        self.assertEqual((ser.shape_cache_hits, ser.shape_cache_misses), (2, 1))
+
+    def test_from_dict_preserve_input(self):
+        """
+        Tests that the input dict is not modified or shared with the object when
+        preserve_input is set, including when migrations are performed
+        """
+        import copy
+
+        class NestedConfig(VersionedObject):
+            var1 = 1
+            var2 = [1]
+
+        class TestConfig(VersionedObject):
+            version = "1.0.0"
+            var1 = 1
+            var2 = NestedConfig
+            var3 = []
+
+        @migration(TestConfig, None, "1.0.0")
+        def migrate_none_to_100(attrs):
+            attrs['var1'] = attrs['old_var1']
+            del attrs['old_var1']
+            attrs['var2']['var1'] += 1
+            attrs['var2']['var2'].append(2)
+            attrs['var3'][0]['a'] = 5
+            return attrs
+
+        data = {"old_var1": 3, "var2": {"var1": 4, "var2": [1]}, "var3": [{"a": 1}]}
+        original = copy.deepcopy(data)
+
+        ser = Serializer()
+        for validate in [True, False]:
+            cfg = TestConfig()
+            result = ser.from_dict(data, cfg, validate=validate, preserve_input=True)
+            self.assertTrue(result.success)
+            self.assertEqual(data, original)
+
+            self.assertEqual(cfg.var1, 3)
+            self.assertEqual(cfg.var2.var1, 5)
+            self.assertEqual(cfg.var2.var2, [1, 2])
+            self.assertEqual(cfg.var3, [{"a": 5}])
+
+            # Modifying the object does not modify the input
+            cfg.var3[0]['a'] = 6
+            self.assertEqual(data, original)
+
+        # Version number is not removed from the input when validation is skipped
+        data = {"version": "1.0.0", "var1": 2}
+        ser.from_dict(data, cfg, validate=False)
+        self.assertEqual(data, {"version": "1.0.0", "var1": 2})
+        self.assertEqual(cfg.var1, 2)
+
+    def test_migration_graph(self):
+        """
+        Tests that migrations registered out of order are chained, that the shortest
+        migration path is used, and that the path taken is reported
+        """
+        class TestConfig(VersionedObject):
+            version = "1.0.3"
+            var1 = 1
+
+        calls = []
+
+        def make_migration(name):
+            def _migrate(attrs):
+                calls.append(name)
+                attrs['var1'] += 1
+                return attrs
+
+            return _migrate
+
+        migration(TestConfig, "1.0.2", "1.0.3")(make_migration("102_103"))
+        migration(TestConfig, "1.0.1", "1.0.2")(make_migration("101_102"))
+        migration(TestConfig, "1.0.0", "1.0.1")(make_migration("100_101"))
+        migration(TestConfig, "1.0.0", "1.0.2")(make_migration("100_102"))
+
+        ser = Serializer()
+        cfg = TestConfig()
+        result = ser.from_dict({"version": "1.0.1", "var1": 0}, cfg)
+        self.assertTrue(result.success)
+        self.assertEqual(result.path, ["1.0.1", "1.0.2", "1.0.3"])
+        self.assertEqual(calls, ["101_102", "102_103"])
+        self.assertEqual(cfg.var1, 2)
+
+        calls.clear()
+        result = ser.from_dict({"version": "1.0.0", "var1": 0}, cfg)
+        self.assertTrue(result.success)
+        self.assertEqual(result.path, ["1.0.0", "1.0.2", "1.0.3"])
+        self.assertEqual(calls, ["100_102", "102_103"])
+
+        # Paths are planned once per version pair
+        self.assertEqual(len(TestConfig._vobj__migration_paths), 2)
+        ser.from_dict({"version": "1.0.0", "var1": 0}, cfg)
+        self.assertEqual(len(TestConfig._vobj__migration_paths), 2)
+
+        # Registering a new migration replans paths
+        migration(TestConfig, "1.0.0", "1.0.3")(make_migration("100_103"))
+        self.assertEqual(len(TestConfig._vobj__migration_paths), 0)
+
+        calls.clear()
+        result = ser.from_dict({"version": "1.0.0", "var1": 0}, cfg)
+        self.assertEqual(result.path, ["1.0.0", "1.0.3"])
+        self.assertEqual(calls, ["100_103"])
+
+        # No path to the current version
+        result = ser.from_dict({"version": "0.9.0", "var1": 0}, cfg)
+        self.assertFalse(result.success)
+        self.assertEqual(result.path, ["0.9.0"])
+
+    def test_from_file_write_back(self):
+        """
+        Tests that migrated object data is written back to the file when write_back is set,
+        with the same indentation, and only if the migration succeeded
+        """
+        import json
+        import tempfile
+
+        class TestConfig(VersionedObject):
+            version = "1.0.1"
+            var1 = 1
+            var2 = 2
+
+        calls = []
+
+        @migration(TestConfig, "1.0.0", "1.0.1")
+        def migrate_100_to_101(attrs):
+            calls.append(attrs['var1'])
+            attrs['var2'] = 3
+            return attrs
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            filename = os.path.join(tempdir, "config.json")
+            with open(filename, 'w') as fh:
+                json.dump({"var1": 5, "version": "1.0.0"}, fh, indent=4)
+
+            ser = Serializer()
+            result = ser.from_file(filename, TestConfig(), only=['var1'], write_back=True)
+            self.assertTrue(result.success)
+
+            with open(filename, 'r') as fh:
+                data = fh.read()
+
+            self.assertEqual(json.loads(data), {"version": "1.0.1", "var1": 5, "var2": 3})
+            self.assertEqual(data, json.dumps(json.loads(data), indent=4))
+
+            # File is not migrated again
+            self.assertIs(ser.from_file(filename, TestConfig()), None)
+            self.assertEqual(calls, [5])
+
+            # File is written back by FileLoader on entry
+            with open(filename, 'w') as fh:
+                json.dump({"version": "1.0.0", "var1": 6}, fh)
+
+            with FileLoader(TestConfig, filename, write_back=True) as cfg:
+                with open(filename, 'r') as fh:
+                    self.assertEqual(json.load(fh), {"version": "1.0.1", "var1": 6, "var2": 3})
+
+            # Compact single-line file with a trailing newline stays on one line
+            with open(filename, 'w') as fh:
+                fh.write('{"version": "1.0.0", "var1": 7}\n')
+
+            ser.from_file(filename, TestConfig(), write_back=True)
+            with open(filename, 'r') as fh:
+                self.assertEqual(fh.read(), json.dumps({"version": "1.0.1", "var1": 7, "var2": 3}))
+
+            # Failed migrations are not written back
+            with open(filename, 'w') as fh:
+                json.dump({"version": "0.9.0", "var1": 6}, fh)
+
+            result = ser.from_file(filename, TestConfig(), write_back=True)
+            self.assertFalse(result.success)
+            with open(filename, 'r') as fh:
+                self.assertEqual(json.load(fh), {"version": "0.9.0", "var1": 6})
+
+    def test_migration_steps(self):
+        """
+        Tests that each migration step is recorded in the MigrationResult, passed to the
+        migration hook, and added to the aggregate counters
+        """
+        class TestConfig(VersionedObject):
+            version = "1.0.2"
+            var1 = 1
+            var2 = 2
+
+        @migration(TestConfig, "1.0.0", "1.0.1")
+        def migrate_100_to_101(attrs):
+            attrs['var2'] = [1, 2]
+            return attrs
+
+        @migration(TestConfig, "1.0.1", "1.0.2")
+        def migrate_101_to_102(attrs):
+            attrs['var2'] = 2
+            return attrs
+
+        hook_steps = []
+        ser = Serializer(migration_hook=hook_steps.append)
+        result = ser.from_dict({"version": "1.0.0", "var1": 3}, TestConfig())
+
+        self.assertEqual([(s.from_version, s.to_version) for s in result.steps],
+                         [("1.0.0", "1.0.1"), ("1.0.1", "1.0.2")])
+        self.assertEqual(hook_steps, result.steps)
+        self.assertEqual([(s.input_size, s.output_size) for s in result.steps], [(3, 6), (6, 4)])
+        self.assertEqual(result.duration_ns, sum(s.duration_ns for s in result.steps))
+
+        ser.from_dict({"version": "1.0.1", "var1": 3, "var2": []}, TestConfig())
+        self.assertEqual(ser.migration_stats[("1.0.0", "1.0.1")].count, 1)
+        self.assertEqual(ser.migration_stats[("1.0.1", "1.0.2")].count, 2)
+        self.assertEqual(ser.migration_stats[("1.0.1", "1.0.2")].total_input_size, 10)
+
+        # Sizes are not measured without a hook
+        ser = Serializer()
+        result = ser.from_dict({"version": "1.0.0", "var1": 3}, TestConfig())
+        self.assertEqual(result.steps[0].input_size, None)
+        self.assertEqual(ser.migration_stats[("1.0.0", "1.0.1")].total_input_size, 0)
+
+        ser.clear_migration_stats()
+        self.assertEqual(ser.migration_stats, {})
+
+    def test_profile_hook(self):
+        """
+        Tests that the profile hook receives an event for each phase of each operation
+        """
+        import tempfile
+
+        class Element(VersionedObject):
+            val = 0
+
+        class TestConfig(VersionedObject):
+            version = "1.0.1"
+            var1 = 1
+            var2 = ListField(Element)
+
+        @migration(TestConfig, "1.0.0", "1.0.1")
+        def migrate_100_to_101(attrs):
+            attrs['var2'] = []
+            return attrs
+
+        events = []
+        ser = Serializer(profile_hook=events.append)
+        cfg = TestConfig()
+
+        with tempfile.TemporaryDirectory() as tempdir:
+            filename = os.path.join(tempdir, "config.json")
+            with open(filename, 'w') as fh:
+                fh.write('{"version": "1.0.0", "var1": 5}')
+
+            ser.from_file(filename, cfg)
+            self.assertEqual([(e.operation, e.phase) for e in events],
+                             [("from_file", "read"), ("from_file", "decode"), ("from_file", "migrate"),
+                              ("from_file", "validate"), ("from_file", "assign"), ("from_file", "custom_decode")])
+            self.assertEqual(events[0].bytes, 31)
+            self.assertEqual(events[3].fields, 2)
+            self.assertEqual(events[5].fields, 1)
+            self.assertTrue(all(e.cls is TestConfig for e in events))
+            self.assertTrue(all(e.duration_ns >= 0 for e in events))
+
+            events.clear()
+            ser.to_file(filename, cfg)
+            self.assertEqual([(e.operation, e.phase) for e in events],
+                             [("to_file", "walk"), ("to_file", "custom_encode"), ("to_file", "encode"),
+                              ("to_file", "write")])
+            self.assertEqual(events[0].fields, 3)
+            self.assertEqual(events[2].bytes, events[3].bytes)
+
+        events.clear()
+        ser.from_dict({"version": "1.0.1", "var1": 2}, cfg, validate=False)
+        self.assertEqual([e.phase for e in events], ["walk", "assign"])
+
+    def test_runtime_stats(self):
+        """
+        Tests that runtime stats are only counted while enabled, and count operations,
+        fields, elements, migrations, validation failures and bytes for all Serializers
+        """
+        import asyncio
+        import tempfile
+        from versionedobj import runtime_stats, AsyncFileLoader
+
+        class Element(VersionedObject):
+            val = 0
+
+        class TestConfig(VersionedObject):
+            version = "1.0.1"
+            var1 = 1
+            var2 = ListField(Element)
+
+        @migration(TestConfig, "1.0.0", "1.0.1")
+        def migrate_100_to_101(attrs):
+            attrs['var2'] = [{"val": 1}, {"val": 2}]
+            return attrs
+
+        cfg = TestConfig()
+        runtime_stats.reset()
+        Serializer().to_dict(cfg)
+        self.assertEqual(runtime_stats.classes, {})
+
+        runtime_stats.enable()
+        try:
+            with tempfile.TemporaryDirectory() as tempdir:
+                filename = os.path.join(tempdir, "config.json")
+                with open(filename, 'w') as fh:
+                    fh.write('{"version": "1.0.0", "var1": 5}')
+
+                Serializer().from_file(filename, cfg)
+                Serializer(cfg).to_file(filename)
+
+            self.assertRaises(InputValidationError, Serializer().validate_dict, {"var1": 1}, cfg)
+        finally:
+            runtime_stats.disable()
+
+        stats = runtime_stats.as_dict()
+        name = f"{TestConfig.__module__}.{TestConfig.__qualname__}"
+        self.assertEqual(stats["classes"][name]["operations"], {"from_file": 1, "to_file": 1, "validate_dict": 1})
+        self.assertGreater(stats["classes"][name]["time_ns"], 0)
+        self.assertEqual(stats["listfield_elements_decoded"], 2)
+        self.assertEqual(stats["validation_failures"], 1)
+        self.assertEqual(stats["migrations"], 1)
+        self.assertEqual(stats["migration_steps"], 1)
+        self.assertEqual(stats["bytes_read"], 31)
+        self.assertGreater(stats["bytes_written"], 0)
+        self.assertIn("decode", stats["time_ns"])
+
+        # 2 fields loaded, 3 fields written. Fields of list elements are not counted
+        self.assertEqual(stats["fields_walked"], 5)
+
+        runtime_stats.reset()
+        self.assertEqual(runtime_stats.as_dict()["fields_walked"], 0)
+
+        # Loads and saves done by AsyncFileLoader are counted as async operations
+        async def _load_save(filename):
+            async with AsyncFileLoader(cfg, filename) as obj:
+                obj.var1 = 7
+
+        runtime_stats.enable()
+        try:
+            with tempfile.TemporaryDirectory() as tempdir:
+                filename = os.path.join(tempdir, "config.json")
+                Serializer(cfg).to_file(filename)
+                asyncio.run(_load_save(filename))
+        finally:
+            runtime_stats.disable()
+
+        self.assertEqual(runtime_stats.as_dict()["classes"][name]["operations"],
+                         {"to_file": 1, "from_file_async": 1, "to_file_async": 1})
+        runtime_stats.reset()
+
+    def test_runtime_stats_nested_elements(self):
+        """
+        Tests that runtime stats count ListField element conversion once, as part of the
+        containing operation, with no profiling events per element
+        """
+        import time
+        from unittest import mock
+        from versionedobj import runtime_stats
+
+        class Element(VersionedObject):
+            val = 0
+            name = "x"
+
+        class TestConfig(VersionedObject):
+            var1 = 1
+            var2 = ListField(Element)
+
+        cfg = TestConfig()
+        for i in range(200):
+            cfg.var2.append(Element(initial_values={'val': i}))
+
+        ser = Serializer()
+        attrs = ser.to_dict(cfg)
+
+        runtime_stats.reset()
+        runtime_stats.enable()
+        try:
+            with mock.patch.object(runtime_stats, '_add_event', wraps=runtime_stats._add_event) as add_event:
+                start = time.perf_counter_ns()
+                ser.from_dict(attrs, TestConfig())
+                ser.to_dict(cfg)
+                wall_ns = time.perf_counter_ns() - start
+        finally:
+            runtime_stats.disable()
+
+        stats = runtime_stats.as_dict()
+
+        # validate, assign, custom_decode, walk, custom_encode
+        self.assertEqual(add_event.call_count, 5)
+        self.assertLessEqual(sum(stats["time_ns"].values()), wall_ns)
+        self.assertLessEqual(sum(c["time_ns"] for c in stats["classes"].values()), wall_ns)
+        self.assertEqual(list(stats["classes"]), [f"{TestConfig.__module__}.{TestConfig.__qualname__}"])
+        self.assertEqual(stats["listfield_elements_decoded"], 200)
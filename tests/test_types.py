@@ -1,7 +1,10 @@
 import os
+import json
+import array
+import tempfile
 from unittest import TestCase
 
-from versionedobj import types, VersionedObject
+from versionedobj import types, VersionedObject, Serializer, FileLoader, InputValidationError, LoadObjectError
 
 
 class Val(VersionedObject):
@@ -157,3 +160,440 @@ class TestTypes(TestCase):
 
             self.assertEqual(L.to_dict(), expected_dict)
             self.assertEqual(L, L2)
+
+    def test_list_lazy_from_dict(self):
+        """
+        Tests that a lazy types.ListField only loads elements when they are accessed,
+        and passes untouched raw elements through to_dict unchanged
+        """
+        raw_data = [{'val': 1}, {'val': 2}, {'val': 3}]
+
+        L = types.ListField(Val, lazy=True)
+        L.from_dict(raw_data)
+
+        self.assertEqual(len(L), 3)
+        self.assertIs(L._values[0], raw_data[0])
+        self.assertIs(L._values[2], raw_data[2])
+
+        # Accessing by index loads and caches only that element
+        first = L[0]
+        self.assertEqual(first, Val(1))
+        self.assertIs(L[0], first)
+        self.assertIs(L._values[2], raw_data[2])
+
+        # Untouched elements are passed straight through
+        first.val = 11
+        d = L.to_dict()
+        self.assertEqual(d, [{'val': 11}, {'val': 2}, {'val': 3}])
+        self.assertIs(d[1], raw_data[1])
+
+        # Iteration loads the remaining elements
+        self.assertEqual(list(L), [Val(11), Val(2), Val(3)])
+        self.assertEqual(L, [Val(11), Val(2), Val(3)])
+        self.assertTrue(all(isinstance(v, Val) for v in L._values))
+
+    def test_list_lazy_in_object(self):
+        """
+        Tests that a lazy types.ListField works as a field in a VersionedObject
+        """
+        class TestConfig(VersionedObject):
+            vals = types.ListField(Val, lazy=True)
+
+        ser = Serializer()
+        cfg = TestConfig()
+        ser.from_json('{"vals": [{"val": 5}, {"val": 6}]}', cfg)
+
+        self.assertEqual(cfg.vals[1].val, 6)
+        cfg.vals.append(Val(7))
+        self.assertEqual(ser.to_dict(cfg), {'vals': [{'val': 5}, {'val': 6}, {'val': 7}]})
+        self.assertEqual(len(TestConfig().vals), 0)
+
+    def test_columnar_list_basic(self):
+        """
+        Tests that types.ColumnarListField stores element fields as columns, and
+        behaves like a list of row objects
+        """
+        class Record(VersionedObject):
+            name = ""
+            count = 0
+            score = 0.0
+
+        def rec(name, count, score):
+            return Record(initial_values={'name': name, 'count': count, 'score': score})
+
+        x = types.ColumnarListField([rec("a", 1, 1.5), rec("b", 2, 2.5)])
+        self.assertEqual(len(x), 2)
+        self.assertIsInstance(x.column('count'), array.array)
+        self.assertIsInstance(x.column('score'), array.array)
+        self.assertIsInstance(x.column('name'), list)
+
+        # Row views
+        self.assertEqual(x[1].name, "b")
+        self.assertEqual(x[-1].count, 2)
+        self.assertEqual(x[0], rec("a", 1, 1.5))
+        self.assertEqual(x[0].to_object(), rec("a", 1, 1.5))
+
+        x[0].count = 10
+        self.assertEqual(x.column('count').tolist(), [10, 2])
+
+        x.append(rec("c", 3, 3.5))
+        x.insert(0, rec("z", 0, 0.5))
+        self.assertEqual(x.column('name'), ["z", "a", "b", "c"])
+        self.assertEqual(sum(x.column('count')), 15)
+
+        x[1] = rec("q", 7, 7.5)
+        del x[2]
+        self.assertEqual(x, [rec("z", 0, 0.5), rec("q", 7, 7.5), rec("c", 3, 3.5)])
+
+        # Value that does not fit the array type converts the column to a list
+        x[0].count = "many"
+        self.assertIsInstance(x.column('count'), list)
+        self.assertEqual(x[0].count, "many")
+
+        self.assertRaises(AttributeError, setattr, x[0], 'nope', 1)
+        self.assertRaises(ValueError, x.append, Val(1))
+        self.assertRaises(IndexError, x.__getitem__, 3)
+
+    def test_columnar_list_to_from_dict(self):
+        """
+        Tests that types.ColumnarListField can be serialized to and from both row
+        and column layouts
+        """
+        class Record(VersionedObject):
+            name = ""
+            count = 0
+
+        rows = [{'name': 'a', 'count': 1}, {'name': 'b', 'count': 2}]
+        columns = {'name': ['a', 'b'], 'count': [1, 2]}
+
+        x = types.ColumnarListField(Record)
+        x.from_dict(rows)
+        self.assertEqual(x.to_dict(), rows)
+        self.assertEqual(x.to_columns(), columns)
+
+        y = types.ColumnarListField(Record, layout='columns')
+        y.from_dict(columns)
+        self.assertEqual(y.to_dict(), columns)
+        self.assertEqual(x, y)
+
+        self.assertRaises(InputValidationError, x.from_dict, [{'name': 'a'}])
+        self.assertRaises(InputValidationError, x.from_dict, {'name': ['a'], 'count': []})
+        self.assertRaises(ValueError, types.ColumnarListField, Record, 'diagonal')
+
+    def test_columnar_list_in_object(self):
+        """
+        Tests that types.ColumnarListField works as a field in a VersionedObject
+        """
+        class Record(VersionedObject):
+            val = 0
+
+        class Nested(VersionedObject):
+            rec = Record
+
+        class TestConfig(VersionedObject):
+            records = types.ColumnarListField(Record)
+
+        self.assertRaises(ValueError, types.ColumnarListField, Nested)
+
+        ser = Serializer()
+        cfg = TestConfig()
+        ser.from_json('{"records": [{"val": 1}, {"val": 2}]}', cfg)
+        self.assertEqual(cfg.records[1].val, 2)
+        self.assertEqual(ser.to_dict(cfg), {'records': [{'val': 1}, {'val': 2}]})
+        self.assertEqual(len(TestConfig().records), 0)
+
+    def test_map_exceptions(self):
+        """
+        Tests that types.MapField throws all the expected exceptions
+        """
+        self.assertRaises(ValueError, types.MapField, 5)
+        self.assertRaises(ValueError, types.MapField, int)
+        self.assertRaises(ValueError, types.MapField, [Val(1)])
+        self.assertRaises(ValueError, types.MapField, {})
+        self.assertRaises(ValueError, types.MapField, {"a": 1})
+        self.assertRaises(ValueError, types.MapField, {1: Val(1)})
+        self.assertRaises(ValueError, types.MapField, {"a": Val(1), "b": WrongVal(1)})
+
+        x = types.MapField({"a": Val(1)})
+        self.assertRaises(ValueError, x.__setitem__, "b", WrongVal(1))
+        self.assertRaises(ValueError, x.__setitem__, 5, Val(1))
+        self.assertRaises(ValueError, x.update, {"b": WrongVal(1)})
+        self.assertRaises(KeyError, x.__getitem__, "b")
+        self.assertRaises(KeyError, x.__delitem__, "b")
+        self.assertRaises(KeyError, x.pop, "b")
+        self.assertRaises(InputValidationError, x.from_dict, [{"val": 1}])
+
+    def test_map_basic(self):
+        """
+        Tests that types.MapField behaves like a dict for basic/common operations
+        """
+        x = types.MapField(Val)
+        self.assertEqual(len(x), 0)
+
+        x["a"] = Val(1)
+        x["b"] = Val(2)
+        self.assertEqual(len(x), 2)
+        self.assertTrue("a" in x)
+        self.assertFalse("c" in x)
+        self.assertEqual(x["b"], Val(2))
+        self.assertEqual(x.get("c"), None)
+        self.assertEqual(x.get("a"), Val(1))
+        self.assertEqual(list(x), ["a", "b"])
+        self.assertEqual(list(x.keys()), ["a", "b"])
+        self.assertEqual(x.values(), [Val(1), Val(2)])
+        self.assertEqual(x.items(), [("a", Val(1)), ("b", Val(2))])
+        self.assertEqual(x, {"a": Val(1), "b": Val(2)})
+        self.assertEqual(x, types.MapField({"a": Val(1), "b": Val(2)}))
+
+        x.update({"c": Val(3)})
+        self.assertEqual(x.pop("a"), Val(1))
+        self.assertEqual(x.pop("a", None), None)
+        del x["b"]
+        self.assertEqual(x, {"c": Val(3)})
+
+        x.clear()
+        self.assertEqual(len(x), 0)
+
+    def test_map_to_from_dict(self):
+        """
+        Tests that types.MapField behaves as expected when serialized to and from a dict
+        """
+        x = types.MapField({"a": Val(1), "b": Val("q")})
+        expected_dict = {"a": {"val": 1}, "b": {"val": "q"}}
+        self.assertEqual(x.to_dict(), expected_dict)
+
+        y = types.MapField(Val)
+        y.from_dict(expected_dict)
+        self.assertEqual(x, y)
+
+        class TestConfig(VersionedObject):
+            vals = types.MapField(Val)
+
+        ser = Serializer()
+        cfg = TestConfig()
+        ser.from_json('{"vals": {"x": {"val": 5}, "y": {"val": 6}}}', cfg)
+        self.assertEqual(cfg.vals["y"].val, 6)
+        self.assertEqual(ser.to_dict(cfg), {"vals": {"x": {"val": 5}, "y": {"val": 6}}})
+        self.assertEqual(len(TestConfig().vals), 0)
+
+    def test_map_lazy_from_dict(self):
+        """
+        Tests that a lazy types.MapField only loads values when they are accessed
+        """
+        raw_data = {"a": {"val": 1}, "b": {"val": 2}}
+        x = types.MapField(Val, lazy=True)
+        x.from_dict(raw_data)
+
+        self.assertEqual(x["a"], Val(1))
+        self.assertIs(x._values["b"], raw_data["b"])
+
+        d = x.to_dict()
+        self.assertEqual(d, raw_data)
+        self.assertIs(d["b"], raw_data["b"])
+
+        self.assertEqual(x.values(), [Val(1), Val(2)])
+        self.assertIsInstance(x._values["b"], Val)
+
+    def test_list_index(self):
+        """
+        Tests that types.ListField indexes are maintained through all list operations,
+        and used by find_by and filter_by
+        """
+        class Profile(VersionedObject):
+            region = "us"
+
+        class User(VersionedObject):
+            email = ""
+            profile = Profile
+
+        def user(email, region):
+            return User(initial_values={'email': email, 'profile.region': region})
+
+        self.assertRaises(ValueError, types.ListField, User, index=['nope'])
+        self.assertRaises(ValueError, types.ListField, User, lazy=True, index=['email'])
+
+        x = types.ListField(User, index=['email', 'profile.region'])
+        a = user("a@x.com", "us")
+        b = user("b@x.com", "eu")
+        x.append(a)
+        x.append(b)
+
+        self.assertIs(x.find_by('email', "b@x.com"), b)
+        self.assertIs(x.find_by('email', "c@x.com"), None)
+        self.assertEqual(x.filter_by('profile.region', "us"), [a])
+
+        # insert
+        c = user("c@x.com", "us")
+        x.insert(0, c)
+        self.assertEqual(x.filter_by('profile.region', "us"), [c, a])
+        self.assertIs(x.find_by('profile.region', "us"), c)
+
+        # __setitem__
+        d = user("d@x.com", "eu")
+        x[1] = d
+        self.assertIs(x.find_by('email', "a@x.com"), None)
+        self.assertEqual(x.filter_by('profile.region', "eu"), [d, b])
+
+        # __delitem__
+        del x[2]
+        self.assertEqual(x.filter_by('profile.region', "eu"), [d])
+
+        # +=
+        e = user("e@x.com", "eu")
+        x += [e]
+        self.assertIs(x.find_by('email', "e@x.com"), e)
+
+        # reindex after changing an element
+        e.email = "f@x.com"
+        x.reindex()
+        self.assertIs(x.find_by('email', "f@x.com"), e)
+
+        # from_dict
+        x.from_dict([{'email': "g@x.com", 'profile': {'region': "ap"}}])
+        self.assertEqual(x.find_by('profile.region', "ap").email, "g@x.com")
+        self.assertIs(x.find_by('email', "f@x.com"), None)
+
+        # Duplicate values are returned in list order, using recorded list positions
+        # that are kept up to date by append, += and __setitem__
+        x = types.ListField(User, index=['profile.region'])
+        users = [user(f"{i}@x.com", "us") for i in range(4)]
+        x += users[:2]
+        self.assertEqual(x.filter_by('profile.region', "us"), users[:2])
+        positions = x._index_positions
+
+        x.append(users[2])
+        x[0] = users[3]
+        self.assertEqual(x.filter_by('profile.region', "us"), [users[3], users[1], users[2]])
+        self.assertIs(x.find_by('profile.region', "us"), users[3])
+        self.assertIs(x._index_positions, positions)
+
+        # Same element at two positions
+        x[2] = users[1]
+        self.assertIs(x.find_by('profile.region', "us"), users[3])
+        x[0] = user("z@x.com", "eu")
+        self.assertEqual(x.filter_by('profile.region', "us"), [users[1], users[1]])
+
+        # Fields without an index fall back to a search
+        y = types.ListField([a, b])
+        self.assertIs(y.find_by('profile.region', "eu"), b)
+
+    def test_list_journal(self):
+        """
+        Tests that a journaled types.ListField is saved to an append-only side file,
+        and that only changes are appended on each save
+        """
+        class TestConfig(VersionedObject):
+            name = "x"
+            vals = types.ListField(Val, journal=True, compact_after=3)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "config.json")
+            journal_filename = filename + ".vals.jsonl"
+
+            ser = Serializer()
+            cfg = TestConfig()
+            cfg.vals.append(Val(1))
+            cfg.vals.append(Val(2))
+            ser.to_file(filename, cfg)
+
+            with open(filename, 'r') as fh:
+                self.assertEqual(json.load(fh), {"name": "x", "vals": {"journal": "config.json.vals.jsonl"}})
+
+            with open(journal_filename, 'r') as fh:
+                self.assertEqual(fh.read(), '["a", {"val": 1}]\n["a", {"val": 2}]\n')
+
+            # Only new records are appended
+            cfg.vals.append(Val(3))
+            cfg.vals[0] = Val(11)
+            del cfg.vals[1]
+            ser.to_file(filename, cfg)
+
+            with open(journal_filename, 'r') as fh:
+                self.assertEqual(fh.read(), '["a", {"val": 1}]\n["a", {"val": 2}]\n["a", {"val": 3}]\n'
+                                            '["s", 0, {"val": 11}]\n["d", 1]\n')
+
+            cfg2 = TestConfig()
+            ser.from_file(filename, cfg2)
+            self.assertEqual(cfg2.vals, [Val(11), Val(3)])
+
+            # Changes to the loaded list are appended to the same journal
+            cfg2.vals.insert(0, Val(0))
+            ser.to_file(filename, cfg2)
+
+            with FileLoader(TestConfig, filename) as cfg3:
+                self.assertEqual(cfg3.vals, [Val(0), Val(11), Val(3)])
+
+                # Too many tombstones, journal is compacted on save
+                del cfg3.vals[0]
+
+            with open(journal_filename, 'r') as fh:
+                self.assertEqual(fh.read(), '["a", {"val": 11}]\n["a", {"val": 3}]\n')
+
+            # Explicit compaction
+            cfg3.vals[0] = Val(12)
+            ser.to_file(filename, cfg3)
+            cfg3.vals.compact_journal()
+            with open(journal_filename, 'r') as fh:
+                self.assertEqual(fh.read(), '["a", {"val": 12}]\n["a", {"val": 3}]\n')
+
+            # Interrupted save leaves an incomplete record, which is ignored
+            with open(journal_filename, 'a') as fh:
+                fh.write('["a", {"va')
+
+            cfg4 = TestConfig()
+            ser.from_file(filename, cfg4)
+            self.assertEqual(cfg4.vals, [Val(12), Val(3)])
+            cfg4.vals.append(Val(4))
+            ser.to_file(filename, cfg4)
+            ser.from_file(filename, cfg4)
+            self.assertEqual(cfg4.vals, [Val(12), Val(3), Val(4)])
+
+            # Other serialization methods still include the whole list
+            self.assertEqual(ser.to_dict(cfg4), {"name": "x", "vals": [{"val": 12}, {"val": 3}, {"val": 4}]})
+
+    def test_list_journal_paths(self):
+        """
+        Tests that journal file names are resolved against the main file, that loading a\
+        journal reference without a file name fails clearly, and that a copy of a journaled\
+        types.ListField does not append to the journal file of the original
+        """
+        import copy
+
+        class TestConfig(VersionedObject):
+            vals = types.ListField(Val, journal=True)
+
+        with tempfile.TemporaryDirectory() as tmpdir:
+            filename = os.path.join(tmpdir, "config.json")
+
+            ser = Serializer()
+            cfg = TestConfig()
+            cfg.vals.append(Val(1))
+            ser.to_file(filename, cfg)
+
+            # Journal file name is relative to the main file, not the current directory
+            with open(filename, 'r') as fh:
+                attrs = json.load(fh)
+
+            self.assertRaises(LoadObjectError, ser.from_dict, attrs, TestConfig())
+            self.assertRaises(LoadObjectError, ser.from_json, json.dumps(attrs), TestConfig())
+
+            cwd = os.getcwd()
+            os.chdir(tmpdir)
+            try:
+                loaded = TestConfig()
+                ser.from_file("config.json", loaded)
+            finally:
+                os.chdir(cwd)
+
+            self.assertEqual(loaded.vals, [Val(1)])
+
+            # Both lists save to the same file, copy must rewrite the journal instead of appending
+            copied = copy.deepcopy(loaded)
+            loaded.vals.append(Val(2))
+            copied.vals.append(Val(3))
+            ser.to_file(filename, loaded)
+            ser.to_file(filename, copied)
+
+            result = TestConfig()
+            ser.from_file(filename, result)
+            self.assertEqual(result.vals, [Val(1), Val(3)])
@@ -1,7 +1,8 @@
 import os
 from unittest import TestCase
 
-from versionedobj import (VersionedObject, LoadObjectError, InvalidFilterError, Serializer, CustomValue, migration)
+from versionedobj import (VersionedObject, LoadObjectError, InvalidFilterError, InputValidationError, Serializer,
+                          CustomValue, migration)
 
 
 class TestVersionedObject(TestCase):
@@ -878,3 +879,60 @@ class TestVersionedObject(TestCase):
         cfg2 = TestConfig2()
         self.assertEqual(7, len(cfg1))
         self.assertEqual(5, len(cfg2))
+
+    def test_changed_class_defaults(self):
+        """
+        Tests that new instances use the current class attributes, if class attributes
+        are changed, added or deleted after instances have been created
+        """
+        class NestedConfig(VersionedObject):
+            ff = 99
+
+        class TestConfig(VersionedObject):
+            val1 = 66
+            val2 = 88
+
+        self.assertEqual(88, TestConfig().val2)
+
+        TestConfig.val1 = 5
+        TestConfig.nested = NestedConfig
+        del TestConfig.val2
+
+        cfg = TestConfig()
+        self.assertEqual(5, cfg.val1)
+        self.assertEqual(99, cfg.nested.ff)
+        self.assertFalse(hasattr(cfg, 'val2'))
+        self.assertEqual(2, len(cfg))
+
+    def test_changed_class_validation(self):
+        """
+        Tests that input data is validated against the current class attributes, if class
+        attributes of the class or of a nested class are added or deleted after validating
+        """
+        class NestedConfig(VersionedObject):
+            ff = 99
+
+        class TestConfig(VersionedObject):
+            a = 1
+            nested = NestedConfig
+
+        ser = Serializer(shape_cache_size=8)
+        cfg = TestConfig()
+        ser.from_dict({'a': 3, 'nested': {'ff': 1}}, cfg)
+
+        TestConfig.b = 5
+        cfg = TestConfig()
+        ser.from_dict({'a': 3, 'b': 7, 'nested': {'ff': 1}}, cfg)
+        self.assertEqual(7, cfg.b)
+        self.assertRaises(InputValidationError, ser.from_dict, {'a': 3, 'nested': {'ff': 1}}, TestConfig())
+
+        del TestConfig.b
+        ser.from_dict({'a': 4, 'nested': {'ff': 1}}, TestConfig())
+        self.assertRaises(InputValidationError, ser.from_dict, {'a': 3, 'b': 7, 'nested': {'ff': 1}}, TestConfig())
+
+        # Changing a nested class changes the validator of the class containing it
+        NestedConfig.gg = 2
+        cfg = TestConfig()
+        ser.from_dict({'a': 3, 'nested': {'ff': 1, 'gg': 3}}, cfg)
+        self.assertEqual(3, cfg.nested.gg)
+        self.assertRaises(InputValidationError, ser.from_dict, {'a': 3, 'nested': {'ff': 1}}, TestConfig())
@@ -1,6 +1,9 @@
 __version__ = "2.0.4"
 
-from versionedobj.types import ListField
-from versionedobj.object import VersionedObject, CustomValue, migration
-from versionedobj.serializer import Serializer, FileLoader
+from versionedobj.types import ListField, ColumnarListField, MapField
+from versionedobj.object import VersionedObject, CustomValue, migration, add_migration_ops
+from versionedobj import ops
+from versionedobj.serializer import Serializer, FileLoader, AsyncFileLoader
+from versionedobj.stats import RuntimeStats, runtime_stats
+from versionedobj.plancache import PlanCache, plan_cache
 from versionedobj.exceptions import LoadObjectError, InvalidFilterError, InputValidationError, InvalidVersionAttributeError
@@ -0,0 +1,61 @@
+import sys
+import json
+import argparse
+
+from versionedobj.batch import migrate_files, migrate_jsonl, _load_class
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(prog='python -m versionedobj',
+                                     description='Tools for working with saved VersionedObject data')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    migrate = subparsers.add_parser('migrate', help='Migrate saved JSON files or a JSON Lines file to the '
+                                                    'current version of a VersionedObject class')
+    migrate.add_argument('cls', metavar='CLASS', help="VersionedObject class to migrate to, in the form "
+                                                      "'package.module:ClassName'")
+    migrate.add_argument('paths', metavar='PATH', nargs='+', help='JSON files, or directories containing JSON files')
+    migrate.add_argument('-o', '--output', default=None, help='Output directory (or output file, with --jsonl). '
+                                                              'If unset, files are migrated in place.')
+    migrate.add_argument('-j', '--jobs', type=int, default=None, help='Number of worker processes '
+                                                                      '(default: number of CPUs)')
+    migrate.add_argument('-i', '--indent', type=int, default=None, help='Indentation level for migrated JSON files '
+                                                                          '(default: same as the original file)')
+    migrate.add_argument('--jsonl', action='store_true', help='Input is a JSON Lines file, with one object per line')
+    migrate.add_argument('--no-validate', action='store_true', help="Don't validate migrated objects")
+    migrate.add_argument('--json-report', action='store_true', help='Print the migration report as JSON')
+
+    args = parser.parse_args(args)
+
+    try:
+        cls = _load_class(args.cls)
+    except (ImportError, AttributeError, ValueError) as e:
+        migrate.error(f"cannot load class '{args.cls}': {e}")
+    validate = not args.no_validate
+
+    if args.jsonl:
+        if len(args.paths) != 1:
+            parser.error("--jsonl requires exactly one input file")
+
+        output = args.output if args.output is not None else args.paths[0]
+        report = migrate_jsonl(cls, args.paths[0], output, args.jobs, validate)
+    else:
+        report = migrate_files(cls, args.paths, args.output, args.jobs, args.indent, validate)
+
+    if args.json_report:
+        print(json.dumps(report.to_dict(), indent=2))
+    else:
+        print(f"{report.total} documents, {report.migrated} migrated, {report.unchanged} unchanged, "
+              f"{report.failed} failed, {report.elapsed:.3f}s ({report.throughput:.1f} documents/s)")
+
+        for version, count in report.source_versions.items():
+            print(f"  version {version}: {count}")
+
+        for source, message in report.failures:
+            print(f"FAILED {source}: {message}", file=sys.stderr)
+
+    return 1 if report.failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,354 @@
+import os
+import json
+import time
+import importlib
+from collections import deque
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from json.decoder import JSONDecodeError
+
+from versionedobj.object import VersionedObject
+from versionedobj.serializer import Serializer, _detect_indent
+from versionedobj.utils import _atomic_write, _AtomicWriter
+from versionedobj.exceptions import InputValidationError
+
+
+# Number of JSON Lines documents sent to a worker process at once
+_JSONL_CHUNK_SIZE = 256
+
+
+class BatchMigrationReport(object):
+    """
+    Summary of a batch migration, returned by migrate_files and migrate_jsonl
+
+    :ivar int total: number of documents processed
+    :ivar int migrated: number of documents that were successfully migrated to the current version
+    :ivar int unchanged: number of documents that were already at the current version
+    :ivar dict source_versions: maps each version found in the input documents to the number\
+        of documents with that version
+    :ivar list failures: list of tuples of the form (source, message) for each document that\
+        could not be migrated. 'source' is the file name for migrate_files, or the line number\
+        for migrate_jsonl
+    :ivar float elapsed: total time taken, in seconds
+    """
+    def __init__(self):
+        self.total = 0
+        self.migrated = 0
+        self.unchanged = 0
+        self.source_versions = {}
+        self.failures = []
+        self.elapsed = 0.0
+
+    @property
+    def failed(self):
+        """
+        Number of documents that could not be migrated
+        """
+        return len(self.failures)
+
+    @property
+    def throughput(self):
+        """
+        Number of documents processed per second
+        """
+        return (self.total / self.elapsed) if self.elapsed > 0 else 0.0
+
+    def _add(self, source, old_version, status, message):
+        self.total += 1
+        self.source_versions[old_version] = self.source_versions.get(old_version, 0) + 1
+
+        if status == 'migrated':
+            self.migrated += 1
+        elif status == 'unchanged':
+            self.unchanged += 1
+        else:
+            self.failures.append((source, message))
+
+    def to_dict(self):
+        """
+        Convert this report to a dict, suitable for passing to the json library
+
+        :return: report data as a dict
+        :rtype: dict
+        """
+        return {
+            "total": self.total,
+            "migrated": self.migrated,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            "source_versions": {str(k): v for k, v in self.source_versions.items()},
+            "failures": [[str(s), m] for s, m in self.failures],
+            "elapsed": self.elapsed,
+            "throughput": self.throughput,
+        }
+
+
+def _migrate_attrs(cls, attrs, validate):
+    """
+    Migrate a single document to the current version of an object class
+
+    :return: tuple of the form (old version, status, message, migrated document)
+    """
+    if not isinstance(attrs, dict):
+        return None, 'failed', f"Expected a dict, got {type(attrs).__name__}", None
+
+    version = cls.__dict__.get('version', None)
+    old_version = attrs.get('version', None)
+
+    try:
+        result, attrs = cls._vobj__migrate(version, attrs)
+    except Exception as e:
+        # A migration function failed on this document, report it and carry on with the others
+        return old_version, 'failed', f"Migration from version {old_version} raised {type(e).__name__}: {e}", None
+
+    if result is None:
+        return old_version, 'unchanged', None, attrs
+
+    if not result.success:
+        msg = f"Migration from version {old_version} reached version {result.version_reached}, not {version}"
+        return old_version, 'failed', msg, None
+
+    attrs['version'] = version
+
+    if validate:
+        try:
+            Serializer().validate_dict(attrs, cls())
+        except InputValidationError as e:
+            return old_version, 'failed', str(e), None
+        except Exception as e:
+            return old_version, 'failed', f"Validation raised {type(e).__name__}: {e}", None
+
+    return old_version, 'migrated', None, attrs
+
+
+def _migrate_file(cls, filename, output_filename, indent, validate):
+    # Worker for migrate_files
+    try:
+        with open(filename, 'r') as fh:
+            jsonstr = fh.read()
+
+        attrs = json.loads(jsonstr)
+    except (OSError, JSONDecodeError) as e:
+        return filename, None, 'failed', str(e)
+
+    if indent is None:
+        # Keep the formatting of the original file
+        indent = _detect_indent(jsonstr)
+
+    old_version, status, message, attrs = _migrate_attrs(cls, attrs, validate)
+
+    try:
+        if status == 'migrated':
+            _atomic_write(output_filename, json.dumps(attrs, indent=indent))
+        elif (status == 'unchanged') and (os.path.abspath(output_filename) != os.path.abspath(filename)):
+            _atomic_write(output_filename, json.dumps(attrs, indent=indent))
+    except OSError as e:
+        return filename, old_version, 'failed', str(e)
+
+    return filename, old_version, status, message
+
+
+def _migrate_lines(cls, first_lineno, lines, validate):
+    # Worker for migrate_jsonl, migrates a chunk of lines
+    ret = []
+    for i, line in enumerate(lines):
+        lineno = first_lineno + i
+        if not line.strip():
+            # Blank lines are passed through, but are not documents
+            ret.append((lineno, None, 'blank', None, line))
+            continue
+
+        try:
+            attrs = json.loads(line)
+        except JSONDecodeError as e:
+            ret.append((lineno, None, 'failed', str(e), line))
+            continue
+
+        old_version, status, message, attrs = _migrate_attrs(cls, attrs, validate)
+        output = line if attrs is None else json.dumps(attrs)
+        ret.append((lineno, old_version, status, message, output))
+
+    return ret
+
+
+def _check_class(cls):
+    if not (isinstance(cls, type) and issubclass(cls, VersionedObject)):
+        raise ValueError("First argument must be a VersionedObject class object")
+
+
+def _run(func, args_list, processes):
+    # Run a worker function for each set of arguments, in a process pool if processes != 1
+    if (processes == 1) or (not args_list):
+        for args in args_list:
+            yield func(*args)
+
+        return
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        # Send several tasks to a worker at once, to reduce inter-process communication
+        chunksize = max(1, len(args_list) // (processes * 4))
+        for ret in pool.map(func, *zip(*args_list), chunksize=chunksize):
+            yield ret
+
+
+def _run_stream(func, args_iter, processes):
+    # Run a worker function for each set of arguments from an iterator, in a process pool if
+    # processes != 1, and yield the results in order as they become available
+    if processes == 1:
+        for args in args_iter:
+            yield func(*args)
+
+        return
+
+    with ProcessPoolExecutor(max_workers=processes) as pool:
+        # Only a few tasks per worker are queued at once, so memory use does not depend on the input size
+        pending = deque()
+        for args in args_iter:
+            pending.append(pool.submit(func, *args))
+            if len(pending) >= (processes * 4):
+                yield pending.popleft().result()
+
+        while pending:
+            yield pending.popleft().result()
+
+
+def _line_chunks(cls, fh, validate):
+    # Read lines from a file object, and generate arguments for _migrate_lines for each chunk of lines
+    chunk = []
+    first_lineno = 1
+
+    for lineno, line in enumerate(fh, 1):
+        chunk.append(line.rstrip('\r\n'))
+        if len(chunk) == _JSONL_CHUNK_SIZE:
+            yield cls, first_lineno, chunk, validate
+            chunk = []
+            first_lineno = lineno + 1
+
+    if chunk:
+        yield cls, first_lineno, chunk, validate
+
+
+def _resolve_processes(processes):
+    # Number of worker processes to use, if unset
+    if processes is None:
+        return os.cpu_count() or 1
+
+    return processes
+
+
+def _find_files(paths):
+    ret = []
+    for path in paths:
+        if os.path.isdir(path):
+            for dirpath, _, filenames in os.walk(path):
+                ret.extend(os.path.join(dirpath, f) for f in sorted(filenames) if f.endswith('.json'))
+        else:
+            ret.append(path)
+
+    return ret
+
+
+def migrate_files(cls, paths, output_dir=None, processes=None, indent=None, validate=True):
+    """
+    Migrate saved JSON files to the current version of a VersionedObject class, using a pool\
+    of worker processes. Each migrated file is written atomically, so a file is never left\
+    partially written. Files that fail to migrate are not written.
+
+    :param cls: VersionedObject class to migrate files to. Must be importable by worker processes.
+    :param paths: name of a directory, or JSON file, or a list of directories and JSON files.\
+        Directories are searched recursively for files ending in '.json'.
+    :param str output_dir: directory to write migrated files to. If unset, files are migrated\
+        in place. Otherwise, files are written with the same path relative to their input directory,\
+        and files that are already at the current version are also written.
+    :param int processes: number of worker processes. If unset, the number of CPUs is used.\
+        1 migrates all files in the current process.
+    :param int indent: indentation level to use for migrated files, in columns. If unset, each\
+        file is written with the same indentation as the original file.
+    :param bool validate: if true, migrated documents are validated against the object class,\
+        and documents that fail validation are not written
+
+    :return: summary of the batch migration
+    :rtype: BatchMigrationReport
+    """
+    _check_class(cls)
+    processes = _resolve_processes(processes)
+
+    if isinstance(paths, str):
+        paths = [paths]
+
+    args_list = []
+    for path in paths:
+        for filename in _find_files([path]):
+            output_filename = filename
+            if output_dir is not None:
+                base = path if os.path.isdir(path) else os.path.dirname(path)
+                output_filename = os.path.join(output_dir, os.path.relpath(filename, base))
+                os.makedirs(os.path.dirname(os.path.abspath(output_filename)), exist_ok=True)
+
+            args_list.append((cls, filename, output_filename, indent, validate))
+
+    report = BatchMigrationReport()
+    start = time.perf_counter()
+
+    for filename, old_version, status, message in _run(_migrate_file, args_list, processes):
+        report._add(filename, old_version, status, message)
+
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def migrate_jsonl(cls, input_file, output_file, processes=None, validate=True):
+    """
+    Migrate a JSON Lines stream, with one saved object per line, to the current version of a\
+    VersionedObject class, using a pool of worker processes. Documents are written in the same\
+    order they were read. Lines that fail to migrate are written unchanged, so no data is lost,\
+    and are reported in the returned report. The input is read, and the output is written, one\
+    chunk of lines at a time, so memory use does not depend on the size of the input.
+
+    :param cls: VersionedObject class to migrate documents to. Must be importable by worker processes.
+    :param input_file: name of file to read, or a readable file object
+    :param output_file: name of file to write, or a writable file object. If a file name is\
+        given, the file is written atomically, and may be the same as the input file.
+    :param int processes: number of worker processes. If unset, the number of CPUs is used.\
+        1 migrates all documents in the current process.
+    :param bool validate: if true, migrated documents are validated against the object class
+
+    :return: summary of the batch migration
+    :rtype: BatchMigrationReport
+    """
+    _check_class(cls)
+    processes = _resolve_processes(processes)
+
+    report = BatchMigrationReport()
+    start = time.perf_counter()
+
+    # Input is closed before the output replaces it, in case they are the same file
+    out_context = _AtomicWriter(output_file) if isinstance(output_file, str) else nullcontext(output_file)
+    in_context = open(input_file, 'r') if isinstance(input_file, str) else nullcontext(input_file)
+
+    with out_context as out_fh, in_context as in_fh:
+        for chunk in _run_stream(_migrate_lines, _line_chunks(cls, in_fh, validate), processes):
+            for lineno, old_version, status, message, _ in chunk:
+                if status != 'blank':
+                    report._add(lineno, old_version, status, message)
+
+            out_fh.write(''.join(data + '\n' for _, _, _, _, data in chunk))
+
+    report.elapsed = time.perf_counter() - start
+    return report
+
+
+def _load_class(name):
+    """
+    Import a VersionedObject class, given a name of the form 'package.module:ClassName'
+    """
+    if ':' not in name:
+        raise ValueError(f"Invalid class name '{name}', expected 'module:ClassName'")
+
+    modname, _, qualname = name.partition(':')
+    obj = importlib.import_module(modname)
+    for n in qualname.split('.'):
+        obj = getattr(obj, n)
+
+    _check_class(obj)
+    return obj
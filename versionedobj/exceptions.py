@@ -16,8 +16,12 @@ class LoadObjectError(Exception):
 class InputValidationError(Exception):
     """
     Exception raised whenever validation of a serialized object fails
+
+    :ivar list errors: list of error messages, one for each problem found in the input data
     """
-    pass
+    def __init__(self, message, errors=None):
+        super(InputValidationError, self).__init__(message)
+        self.errors = [message] if errors is None else errors
 
 
 class InvalidVersionAttributeError(Exception):
@@ -1,10 +1,16 @@
-import json
-import copy
-import sys
-import inspect
+import time
+from collections import deque
+from collections.abc import Mapping
 
 from versionedobj.exceptions import InvalidVersionAttributeError, InputValidationError
 from versionedobj.utils import _ObjField, _iter_obj_attrs, _walk_obj_attrs, _obj_to_dict
+from versionedobj.ops import _OpsMigration
+
+
+# Kinds of attributes in a class field plan, see VersionedObject._vobj__get_field_plan
+_PLAIN_FIELD = 0
+_NESTED_FIELD = 1
+_CUSTOM_FIELD = 2
 
 
 def add_migration(migration_func, cls, from_version, to_version):
@@ -26,6 +32,27 @@ def add_migration(migration_func, cls, from_version, to_version):
         raise ValueError("Cannot add migration to un-versioned object. Add a 'version' attribute.")
 
     cls._vobj__migrations.append((from_version, to_version, migration_func))
+    cls._vobj__migration_graph.setdefault(from_version, []).append((to_version, migration_func))
+
+    # Previously planned migration paths may no longer be the shortest
+    cls._vobj__migration_paths.clear()
+
+
+def add_migration_ops(cls, from_version, to_version, ops):
+    """
+    Add a migration to an object class, described by a list of declarative migration
+    operations from versionedobj.ops, instead of a migration function. When an object is
+    migrated through several consecutive migrations that were added with this function,
+    the operations of all those migrations are fused together, and applied to the object
+    data in as few passes as possible.
+
+    :param cls: Class object to add migration to
+    :param from_version: Version to migrate from. If you are migrating an object that\
+        previously had no version number, use 'None' here.
+    :param to_version: Version to migrate to
+    :param list ops: List of migration operations, e.g. [ops.rename('volume', 'volumes')]
+    """
+    add_migration(_OpsMigration(ops), cls, from_version, to_version)
 
 
 def migration(cls, from_version, to_version):
@@ -46,6 +73,83 @@ def migration(cls, from_version, to_version):
     return _inner_migration
 
 
+def _attrs_size(attrs):
+    """
+    Count the number of values (including nested dicts and lists) in object data
+    """
+    if isinstance(attrs, Mapping):
+        return 1 + sum(_attrs_size(v) for v in attrs.values())
+    elif isinstance(attrs, list):
+        return 1 + sum(_attrs_size(v) for v in attrs)
+
+    return 1
+
+
+class MigrationStep(object):
+    """
+    Describes a single migration function call performed during an object migration. When\
+    several consecutive migrations were added with add_migration_ops, they are fused into a\
+    single step, from the first from_version to the last to_version.
+
+    :ivar from_version: version of the object data before this step
+    :ivar to_version: version of the object data after this step
+    :ivar int duration_ns: wall-clock duration of the migration function call, in nanoseconds
+    :ivar int input_size: number of values (including nested dicts and lists) in the object\
+        data before this step, or None if sizes were not measured
+    :ivar int output_size: number of values (including nested dicts and lists) in the object\
+        data after this step, or None if sizes were not measured
+    """
+    def __init__(self, from_version, to_version, duration_ns, input_size=None, output_size=None):
+        self.from_version = from_version
+        self.to_version = to_version
+        self.duration_ns = duration_ns
+        self.input_size = input_size
+        self.output_size = output_size
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}({self.from_version!r} -> {self.to_version!r}, "
+                f"{self.duration_ns}ns, size {self.input_size} -> {self.output_size})")
+
+
+class MigrationEdgeStats(object):
+    """
+    Aggregate counters for all migration steps performed between a specific pair of versions
+
+    :ivar int count: number of times the step was performed
+    :ivar int total_ns: total wall-clock duration of all calls, in nanoseconds
+    :ivar int max_ns: wall-clock duration of the slowest call, in nanoseconds
+    :ivar int total_input_size: sum of MigrationStep.input_size for all calls where sizes were measured
+    :ivar int total_output_size: sum of MigrationStep.output_size for all calls where sizes were measured
+    """
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.total_input_size = 0
+        self.total_output_size = 0
+
+    @property
+    def mean_ns(self):
+        """
+        Mean wall-clock duration of all calls, in nanoseconds
+        """
+        return (self.total_ns // self.count) if self.count else 0
+
+    def add(self, step):
+        """
+        Add a migration step to the counters
+
+        :param MigrationStep step: migration step to add
+        """
+        self.count += 1
+        self.total_ns += step.duration_ns
+        self.max_ns = max(self.max_ns, step.duration_ns)
+
+        if step.input_size is not None:
+            self.total_input_size += step.input_size
+            self.total_output_size += step.output_size
+
+
 class MigrationResult(object):
     """
     Value returned by Serializer.from_dict, Serializer.from_file, and Serializer.from_json methods,
@@ -56,12 +160,24 @@ class MigrationResult(object):
     :ivar version_reached: the actual object version after migration (this should\
         match target_version after a successful migration)
     :ivar bool success: True if migration was successful, false otherwise
+    :ivar list path: list of all versions the object data was migrated through, starting\
+        with old_version and ending with version_reached
+    :ivar list steps: list of MigrationStep objects, one for each migration function call performed
     """
-    def __init__(self, old_version, target_version, version_reached, success):
+    def __init__(self, old_version, target_version, version_reached, success, path=None, steps=None):
         self.old_version = old_version
         self.target_version = target_version
         self.version_reached = version_reached
         self.success = success
+        self.path = [old_version] if path is None else path
+        self.steps = [] if steps is None else steps
+
+    @property
+    def duration_ns(self):
+        """
+        Total wall-clock duration of all migration function calls, in nanoseconds
+        """
+        return sum(step.duration_ns for step in self.steps)
 
 
 class CustomValue(object):
@@ -89,12 +205,50 @@ class CustomValue(object):
 
 class __Meta(type):
     """
-    Metaclass for VersionedObject, creates the 'migrations' class attribute
+    Metaclass for VersionedObject, creates the 'migrations' and 'validators' class attributes
     """
+    # Incremented whenever an attribute of any VersionedObject class is changed, added or
+    # deleted. Compiled validators also describe nested classes, so a change to any class
+    # may make the validators of other classes out of date.
+    _vobj__generation = 0
+
     def __new__(cls, name, bases, dic):
         dic['_vobj__migrations'] = []
+
+        # Maps each from_version to a list of (to_version, migration function) tuples
+        dic['_vobj__migration_graph'] = {}
+
+        # Maps (from_version, to_version) tuples to planned migration paths
+        dic['_vobj__migration_paths'] = {}
+
+        dic['_vobj__validators'] = {}
+
+        # Value of _vobj__generation when the validators were compiled
+        dic['_vobj__validators_generation'] = cls._vobj__generation
+
+        # True if attributes were changed after the class was defined
+        dic['_vobj__modified'] = False
+
+        # Attribute names and kinds of default values, created when the first instance is created
+        dic['_vobj__field_plan'] = None
         return super().__new__(cls, name, bases, dic)
 
+    def __setattr__(cls, name, value):
+        super().__setattr__(name, value)
+        if not name.startswith('_vobj__'):
+            cls._vobj__attrs_changed()
+
+    def __delattr__(cls, name):
+        super().__delattr__(name)
+        cls._vobj__attrs_changed()
+
+    def _vobj__attrs_changed(cls):
+        # Default values changed, so the field plan and validators need to be created again
+        super().__setattr__('_vobj__field_plan', None)
+        super().__setattr__('_vobj__validators', {})
+        super().__setattr__('_vobj__modified', True)
+        type(cls)._vobj__generation += 1
+
 
 class VersionedObject(metaclass=__Meta):
     """
@@ -126,6 +280,8 @@ class VersionedObject(metaclass=__Meta):
         return False
 
     def __str__(self):
+        import json
+
         json_str = json.dumps(_obj_to_dict(self))
         if len(json_str) > 36:
             json_str = json_str[:30] + ' ... }'
@@ -165,59 +321,167 @@ class VersionedObject(metaclass=__Meta):
         return not self.__eq__()
 
     def __hash__(self):
+        import json
+
         return hash(json.dumps(_obj_to_dict(self)))
 
     def __len__(self):
         return self._vobj__field_count
 
-    def _vobj__populate_instance(self):
-        for n in _iter_obj_attrs(self.__class__):
-            val = getattr(self.__class__, n)
+    @classmethod
+    def _vobj__get_field_plan(cls):
+        """
+        Get the list of attributes to populate new instances with, creating it if needed
+
+        :return: list of tuples of the form (attribute name, kind, default value). 'kind' is\
+            _PLAIN_FIELD, _NESTED_FIELD (default value is a VersionedObject class), or\
+            _CUSTOM_FIELD (default value is a CustomValue instance to copy).
+        :rtype: list
+        """
+        plan = cls._vobj__field_plan
+        if plan is not None:
+            return plan
+
+        plan = []
+        for n in _iter_obj_attrs(cls):
+            val = getattr(cls, n)
 
             vobj_class = None
             if isinstance(val, VersionedObject):
                 vobj_class = val.__class__
-            elif inspect.isclass(val) and issubclass(val, VersionedObject):
+            elif isinstance(val, type) and issubclass(val, VersionedObject):
                 vobj_class = val
-            elif isinstance(val, CustomValue):
-                val = copy.deepcopy(val)
 
             if vobj_class:
                 if hasattr(val, 'version'):
                     raise InvalidVersionAttributeError(f"{vobj_class.__name__} cannot have a version attribute. "
                                                         "Only the top-level object can have a version attribute.")
 
-                val = vobj_class()
+                plan.append((n, _NESTED_FIELD, vobj_class))
+            elif isinstance(val, CustomValue):
+                plan.append((n, _CUSTOM_FIELD, val))
+            else:
+                plan.append((n, _PLAIN_FIELD, val))
+
+        cls._vobj__field_plan = plan
+        return plan
+
+    def _vobj__populate_instance(self):
+        for n, kind, val in self._vobj__get_field_plan():
+            if kind == _NESTED_FIELD:
+                val = val()
                 self._vobj__field_count += val._vobj__field_count
             else:
+                if kind == _CUSTOM_FIELD:
+                    import copy
+
+                    val = copy.deepcopy(val)
+
                 self._vobj__field_count += 1
 
             setattr(self, n, val)
 
     @classmethod
-    def _vobj__migrate(cls, version, attrs):
+    def _vobj__plan_migration(cls, old_version, version):
+        """
+        Find the shortest sequence of migrations from one version to another. If the target\
+        version cannot be reached, finds the shortest sequence of migrations to the furthest\
+        version that can be reached instead. Paths are planned once per version pair, and cached.
+
+        :param old_version: version to migrate from
+        :param version: version to migrate to
+
+        :return: list of tuples of the form (migration function, list of versions reached),\
+            one for each migration function to call. Consecutive migrations added with\
+            add_migration_ops are fused into a single migration function.
+        :rtype: list
+        """
+        key = (old_version, version)
+        path = cls._vobj__migration_paths.get(key, None)
+        if path is not None:
+            return path
+
+        # Breadth-first search, so the first path found to each version is the shortest.
+        # Maps each version reached to the (previous version, to_version, migration function)
+        # tuple that reached it
+        graph = cls._vobj__migration_graph
+        reached = {old_version: None}
+        queue = deque([old_version])
+        furthest = old_version
+
+        while queue:
+            current_version = queue.popleft()
+            furthest = current_version
+            if current_version == version:
+                break
+
+            for toversion, migrate in graph.get(current_version, ()):
+                if toversion not in reached:
+                    reached[toversion] = (current_version, toversion, migrate)
+                    queue.append(toversion)
+
+        if version in reached:
+            furthest = version
+
+        edges = []
+        while reached[furthest] is not None:
+            fromversion, toversion, migrate = reached[furthest]
+            edges.append((toversion, migrate))
+            furthest = fromversion
+
+        path = []
+        for toversion, migrate in reversed(edges):
+            if path and isinstance(migrate, _OpsMigration) and isinstance(path[-1][0], _OpsMigration):
+                prev_migrate, prev_versions = path[-1]
+                path[-1] = (_OpsMigration(prev_migrate.ops + migrate.ops), prev_versions + [toversion])
+            else:
+                path.append((migrate, [toversion]))
+
+        cls._vobj__migration_paths[key] = path
+        return path
+
+    @classmethod
+    def _vobj__migrate(cls, version, attrs, step_hook=None):
+        """
+        Migrate object data to a new version
+
+        :param version: version to migrate to
+        :param dict attrs: object data to migrate
+        :param callable step_hook: If set, called with a MigrationStep object after each\
+            migration function call, and the size of the object data is measured before\
+            and after each call
+
+        :return: tuple of the form (MigrationResult, migrated object data). The MigrationResult\
+            is None if no migration was required.
+        :rtype: tuple
+        """
         old_version = attrs.get('version', None)
-        version_before_migration = old_version
-        current_version = old_version
 
         result = None
 
         if old_version != version:
-            result = MigrationResult(old_version, version, None, True)
+            path = cls._vobj__plan_migration(old_version, version)
+            versions = [old_version]
+            steps = []
+
+            for migrate, toversions in path:
+                input_size = None if step_hook is None else _attrs_size(attrs)
 
-            # Attempt migrations
-            for fromversion, toversion, migrate in cls._vobj__migrations:
-                if fromversion == current_version:
-                    attrs = migrate(attrs)
+                start = time.perf_counter_ns()
+                attrs = migrate(attrs)
+                duration = time.perf_counter_ns() - start
 
-                    current_version = toversion
-                    if toversion == version:
-                        break
+                output_size = None if step_hook is None else _attrs_size(attrs)
+                step = MigrationStep(versions[-1], toversions[-1], duration, input_size, output_size)
+                steps.append(step)
+                versions.extend(toversions)
 
-            if current_version != version:
-                result.success = False
+                if step_hook is not None:
+                    step_hook(step)
 
-            result.version_reached = current_version
+            current_version = versions[-1]
+            result = MigrationResult(old_version, version, current_version, current_version == version,
+                                     versions, steps)
 
         return result, attrs
 
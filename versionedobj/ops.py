@@ -0,0 +1,250 @@
+"""
+Declarative migration operations. Lists of operations can be registered as migrations with
+versionedobj.object.add_migration_ops, instead of writing a migration function. All field
+names are full dot names, e.g. 'display_config.volume'.
+"""
+
+from collections.abc import Mapping, MutableMapping
+
+
+class _Missing(object):
+    def __repr__(self):
+        return 'MISSING'
+
+
+# Value of a field that does not exist
+_MISSING = _Missing()
+
+
+class _MigrationOp(object):
+    """
+    A single declarative migration operation
+    """
+    def __init__(self, kind, dotname, arg=None):
+        self.kind = kind
+        self.path = tuple(dotname.split('.'))
+        self.arg = arg
+
+    def __repr__(self):
+        return f"{self.kind}({'.'.join(self.path)!r}, {self.arg!r})"
+
+
+def rename(dotname, new_name):
+    """
+    Rename a field, keeping it at the same nesting level. Does nothing if the field does not exist.
+
+    :param str dotname: full dot name of the field to rename
+    :param str new_name: new name for the field (not a dot name)
+    """
+    if '.' in new_name:
+        raise ValueError(f"New name '{new_name}' cannot contain '.', use move() to change the nesting level")
+
+    parents = dotname.split('.')[:-1]
+    return move(dotname, '.'.join(parents + [new_name]))
+
+
+def move(src_dotname, dst_dotname):
+    """
+    Move a field to a different location, creating any missing parent fields at the new location.\
+    Does nothing if the field does not exist.
+
+    :param str src_dotname: full dot name of the field to move
+    :param str dst_dotname: full dot name of the new location
+    """
+    src = tuple(src_dotname.split('.'))
+    dst = tuple(dst_dotname.split('.'))
+    if _paths_overlap(src, dst):
+        raise ValueError(f"Cannot move '{src_dotname}' to '{dst_dotname}'")
+
+    return _MigrationOp('move', src_dotname, dst)
+
+
+def default(dotname, value):
+    """
+    Add a field with a default value, if the field does not already exist
+
+    :param str dotname: full dot name of the field to add
+    :param value: default value for the field
+    """
+    return _MigrationOp('default', dotname, value)
+
+
+def drop(dotname):
+    """
+    Delete a field, if it exists
+
+    :param str dotname: full dot name of the field to delete
+    """
+    return _MigrationOp('drop', dotname)
+
+
+def transform(dotname, func):
+    """
+    Replace the value of a field with the result of calling a function with the old value.\
+    Does nothing if the field does not exist.
+
+    :param str dotname: full dot name of the field to change
+    :param callable func: function that takes the old value, and returns the new value
+    """
+    if not callable(func):
+        raise ValueError("Transform function must be callable")
+
+    return _MigrationOp('transform', dotname, func)
+
+
+def _paths_overlap(path, other):
+    # True if the paths are the same, or one path is a parent of the other
+    n = min(len(path), len(other))
+    return path[:n] == other[:n]
+
+
+def _read(attrs, path):
+    for n in path:
+        if (not isinstance(attrs, Mapping)) or (n not in attrs):
+            return _MISSING
+
+        attrs = attrs[n]
+
+    return attrs
+
+
+def _write(attrs, path, value):
+    for n in path[:-1]:
+        child = attrs.get(n, None)
+        if not isinstance(child, MutableMapping):
+            child = {}
+            attrs[n] = child
+
+        attrs = child
+
+    attrs[path[-1]] = value
+
+
+def _delete(attrs, path):
+    for n in path[:-1]:
+        attrs = attrs.get(n, None)
+        if not isinstance(attrs, MutableMapping):
+            return
+
+    attrs.pop(path[-1], None)
+
+
+def _source(path):
+    return lambda attrs: _read(attrs, path)
+
+
+def _constant(value):
+    return lambda attrs: value
+
+
+def _coalesce(first, second):
+    def _get(attrs):
+        value = first(attrs)
+        return second(attrs) if value is _MISSING else value
+
+    return _get
+
+
+def _transformed(get, func):
+    def _get(attrs):
+        value = get(attrs)
+        return value if value is _MISSING else func(value)
+
+    return _get
+
+
+class _FusedOps(object):
+    """
+    A sequence of migration operations that do not touch overlapping fields, fused into a\
+    single transform. Each operation is compiled into a getter for the final value of the\
+    field it changes, so running the transform reads each source field once, and then\
+    writes or deletes each changed field once.
+    """
+    def __init__(self):
+        # Maps paths of changed fields to a function that returns the new value, given the original dict
+        self.plan = {}
+
+    def touches(self, path):
+        # True if a changed field in this transform overlaps with a path
+        return any(_paths_overlap(path, p) for p in self.plan)
+
+    def current(self, path):
+        # Getter for the value of a field, after all operations added so far
+        return self.plan.get(path, None) or _source(path)
+
+    def add(self, op):
+        if op.kind == 'move':
+            self.plan[op.arg] = _coalesce(self.current(op.path), self.current(op.arg))
+            self.plan[op.path] = _constant(_MISSING)
+        elif op.kind == 'default':
+            self.plan[op.path] = _coalesce(self.current(op.path), _constant(op.arg))
+        elif op.kind == 'drop':
+            self.plan[op.path] = _constant(_MISSING)
+        elif op.kind == 'transform':
+            self.plan[op.path] = _transformed(self.current(op.path), op.arg)
+
+    def __call__(self, attrs):
+        values = [(path, get(attrs)) for path, get in self.plan.items()]
+
+        for path, value in values:
+            if value is _MISSING:
+                _delete(attrs, path)
+            else:
+                _write(attrs, path, value)
+
+        return attrs
+
+
+def _op_paths(op):
+    return (op.path, op.arg) if op.kind == 'move' else (op.path,)
+
+
+def _fuse_ops(ops):
+    """
+    Compile a list of migration operations into as few fused transforms as possible
+
+    :param list ops: list of migration operations
+
+    :return: list of fused transforms
+    :rtype: list
+    """
+    ret = []
+    current = None
+
+    for op in ops:
+        paths = _op_paths(op)
+
+        # An operation that touches a parent or child of a field changed earlier in the same
+        # transform would see the wrong value, so start a new transform
+        if (current is None) or any(current.touches(p) and (p not in current.plan) for p in paths):
+            current = _FusedOps()
+            ret.append(current)
+
+        current.add(op)
+
+    return ret
+
+
+class _OpsMigration(object):
+    """
+    Migration function created from a list of declarative migration operations. Consecutive\
+    _OpsMigration instances on a migration path are fused into a single _OpsMigration.
+
+    :param list ops: list of migration operations
+    """
+    def __init__(self, ops):
+        for op in ops:
+            if not isinstance(op, _MigrationOp):
+                raise ValueError(f"Invalid migration operation: {op!r}")
+
+        self.ops = list(ops)
+        self._transforms = None
+
+    def __call__(self, attrs):
+        if self._transforms is None:
+            self._transforms = _fuse_ops(self.ops)
+
+        for transform in self._transforms:
+            attrs = transform(attrs)
+
+        return attrs
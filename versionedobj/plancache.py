@@ -0,0 +1,251 @@
+import os
+import sys
+import atexit
+import marshal
+
+from versionedobj.utils import _atomic_write
+
+
+# Changed whenever the format of cached plans changes
+_PLAN_FORMAT = 3
+
+
+def _module_file(module_name):
+    # Name of the source file for a module, or None if there isn't one
+    filename = getattr(sys.modules.get(module_name, None), '__file__', None)
+    return None if filename is None else os.path.abspath(filename)
+
+
+class PlanCache(object):
+    """
+    Optional on-disk cache of compiled validators for VersionedObject classes, so that\
+    short-lived processes do not need to compile them again on every start. Disabled by\
+    default. Can also be enabled by setting the VERSIONEDOBJ_PLAN_CACHE environment\
+    variable to a directory name before versionedobj is imported.
+
+    Validators for all classes defined in the same module file are stored in one cache file,\
+    which is named after the module name and the full path of the module file, so modules\
+    with the same name in different directories (including the '__main__' module of different\
+    scripts) never share cached validators. Each cache file is read once per process, and written\
+    atomically when the process exits (or when flush is called), so any number of processes can\
+    share the same cache directory. A cached validator is used only if the source files of the\
+    class, and of all nested object classes, have not been modified since it was cached, and it\
+    was cached by the same python and versionedobj versions, for a class with the same attribute\
+    names, value types and nested object classes. Classes that are not defined at the top level\
+    of a module file are never cached.
+
+    :ivar str directory: cache directory, or None if the cache is disabled
+    :ivar int hits: number of validators loaded from the cache
+    :ivar int misses: number of validators that could not be loaded from the cache
+    """
+    def __init__(self):
+        self.directory = None
+        self.hits = 0
+        self.misses = 0
+        self._reset()
+        atexit.register(self.flush)
+
+    def _reset(self):
+        # Maps module file names to dicts loaded from cache files, which map class names to tuples
+        # of the form (version, source file stats, class fingerprint, {filter key: validator data})
+        self._modules = {}
+
+        # (module name, module file name) tuples for modules with new validators that have not been written yet
+        self._dirty = set()
+
+        # Maps source file names to stats, each file is checked once per process
+        self._stats = {}
+
+    @property
+    def enabled(self):
+        """
+        True if the cache is enabled
+        """
+        return self.directory is not None
+
+    def enable(self, directory):
+        """
+        Start using a cache directory. The directory is created if it does not exist.
+
+        :param str directory: cache directory
+        """
+        self.flush()
+        os.makedirs(directory, exist_ok=True)
+        self.directory = os.path.abspath(directory)
+        self._reset()
+
+    def disable(self):
+        """
+        Write any new validators, and stop using the cache directory. Cached files are kept.
+        """
+        self.flush()
+        self.directory = None
+        self._reset()
+
+    def clear(self):
+        """
+        Delete all cached files from the cache directory, and forget validators not written yet
+        """
+        if self.directory is None:
+            return
+
+        for n in os.listdir(self.directory):
+            if n.endswith('.plan'):
+                try:
+                    os.remove(os.path.join(self.directory, n))
+                except OSError:
+                    pass
+
+        self._reset()
+
+    def flush(self):
+        """
+        Write all new validators to the cache directory. Called automatically when the process exits.
+        """
+        if self.directory is None:
+            return
+
+        for module_name, module_file in sorted(self._dirty):
+            # Keep classes cached by other processes since this process read the file
+            classes = self._read_file(module_name, module_file)
+            classes.update(self._modules[module_file])
+
+            data = marshal.dumps((self._header(module_name, module_file), classes))
+
+            try:
+                _atomic_write(self._filename(module_name, module_file), data)
+            except OSError:
+                # Cache is best-effort, compiled validators still work without it
+                pass
+
+        self._dirty.clear()
+
+    def _version(self):
+        import versionedobj
+
+        return versionedobj.__version__
+
+    def _header(self, module_name, module_file):
+        return (_PLAN_FORMAT, sys.implementation.cache_tag, self._version(), module_name, module_file)
+
+    def _filename(self, module_name, module_file):
+        import hashlib
+
+        digest = hashlib.sha1(module_file.encode('utf-8', 'surrogateescape')).hexdigest()[:16]
+        return os.path.join(self.directory, f"{module_name}.{digest}.plan")
+
+    def _stat(self, filename):
+        ret = self._stats.get(filename, False)
+        if ret is False:
+            try:
+                st = os.stat(filename)
+                ret = (st.st_mtime_ns, st.st_size)
+            except OSError:
+                ret = None
+
+            self._stats[filename] = ret
+
+        return ret
+
+    def _files(self, classes):
+        # Get sorted (file name, stats) tuples for the source files of classes, or None if any
+        # class can't be cached
+        files = set()
+        for c in classes:
+            filename = _module_file(c.__module__)
+            if (filename is None) or ('<' in c.__qualname__):
+                # Classes defined inside functions can't be told apart by name
+                return None
+
+            files.add(filename)
+
+        return tuple((f, self._stat(f)) for f in sorted(files))
+
+    def _read_file(self, module_name, module_file):
+        # Read the cached classes for a module from the cache file
+        try:
+            with open(self._filename(module_name, module_file), 'rb') as fh:
+                header, classes = marshal.loads(fh.read())
+        except (OSError, EOFError, ValueError, TypeError):
+            # Missing, unreadable or corrupt cache file
+            return {}
+
+        if (header != self._header(module_name, module_file)) or (not isinstance(classes, dict)):
+            return {}
+
+        return classes
+
+    def _read(self, module_name, module_file):
+        # Get the cached classes for a module, reading the cache file if not read yet
+        classes = self._modules.get(module_file, None)
+        if classes is None:
+            classes = self._read_file(module_name, module_file)
+            self._modules[module_file] = classes
+
+        return classes
+
+    def load(self, cls, key, fingerprint):
+        """
+        Load the cached data for a compiled validator
+
+        :param cls: VersionedObject class
+        :param key: filter key of the validator
+        :param tuple fingerprint: description of the attributes of the class and all nested\
+            classes, the cached data is only used if it was stored with the same fingerprint
+
+        :return: cached data, or None if not cached
+        """
+        module_file = _module_file(cls.__module__)
+        if ('<' in cls.__qualname__) or (module_file is None):
+            return None
+
+        data = None
+        cached = self._read(cls.__module__, module_file).get(cls.__qualname__, None)
+        if (cached is not None) and (cached[0] == repr(cls.__dict__.get('version', None))):
+            version, files, cached_fingerprint, entries = cached
+
+            # Entry must have been cached for a class defined in the same module file, with the same attributes
+            if ((cached_fingerprint == fingerprint) and any(f == module_file for f, _ in files) and
+                    all(self._stat(f) == st for f, st in files)):
+                data = entries.get(key, None)
+
+        if data is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+
+        return data
+
+    def store(self, cls, key, data, classes, fingerprint):
+        """
+        Add the data for a compiled validator to the cache. Data is written by flush.
+
+        :param cls: VersionedObject class
+        :param key: filter key of the validator
+        :param data: validator data, must be supported by the marshal module
+        :param classes: all VersionedObject classes the validator was compiled from, including cls
+        :param tuple fingerprint: description of the attributes of the class and all nested classes
+        """
+        files = self._files(classes)
+        if files is None:
+            return
+
+        module_file = _module_file(cls.__module__)
+        cached = self._read(cls.__module__, module_file)
+        version = repr(cls.__dict__.get('version', None))
+
+        entry = cached.get(cls.__qualname__, None)
+        if (entry is None) or (entry[:3] != (version, files, fingerprint)):
+            # Entries cached for an older class definition are discarded
+            entry = (version, files, fingerprint, {})
+            cached[cls.__qualname__] = entry
+
+        entry[3][key] = data
+        self._dirty.add((cls.__module__, module_file))
+
+
+# Cache used by all Serializer instances in the current process
+plan_cache = PlanCache()
+
+if os.environ.get('VERSIONEDOBJ_PLAN_CACHE', ''):
+    plan_cache.enable(os.environ['VERSIONEDOBJ_PLAN_CACHE'])
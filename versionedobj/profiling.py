@@ -0,0 +1,42 @@
+class ProfileEvent(object):
+    """
+    Describes a single phase of a Serializer operation, passed to the profile_hook of a Serializer
+
+    Phases, in the order they occur, are:
+
+    * 'read': reading a file (from_file). 'bytes' is the file size.
+    * 'decode': parsing a JSON string (from_json, from_file). 'bytes' is the length of the JSON string.
+    * 'migrate': migrating object data to the current version, only if a migration was performed.
+    * 'validate': validating object data. 'fields' is the number of fields to load.
+    * 'assign': loading field values into the object, not including CustomValue decoding.\
+        'fields' is the number of fields loaded.
+    * 'custom_decode': all CustomValue.from_dict calls while loading. 'fields' is the number of\
+        CustomValue fields loaded.
+    * 'walk': walking the object fields to build a dict, not including CustomValue encoding, or\
+        walking the dict fields when loading without validation. 'fields' is the number of fields\
+        serialized or found.
+    * 'custom_encode': all CustomValue.to_dict calls while building a dict. 'fields' is the number\
+        of CustomValue fields serialized.
+    * 'encode': generating a JSON string (to_json, to_file). 'bytes' is the length of the JSON string.
+    * 'write': writing a file (to_file). 'bytes' is the file size.
+
+    :ivar str operation: name of the Serializer method that was called, e.g. 'from_file'
+    :ivar str phase: name of the phase
+    :ivar cls: VersionedObject class of the object being serialized/deserialized
+    :ivar int duration_ns: wall-clock duration of the phase, in nanoseconds
+    :ivar int bytes: number of bytes read, written, decoded or encoded, or None if not applicable
+    :ivar int fields: number of fields processed, or None if not applicable
+    """
+    __slots__ = ('operation', 'phase', 'cls', 'duration_ns', 'bytes', 'fields')
+
+    def __init__(self, operation, phase, cls, duration_ns, nbytes=None, fields=None):
+        self.operation = operation
+        self.phase = phase
+        self.cls = cls
+        self.duration_ns = duration_ns
+        self.bytes = nbytes
+        self.fields = fields
+
+    def __repr__(self):
+        return (f"{self.__class__.__name__}({self.operation}, {self.phase}, {self.cls.__name__}, "
+                f"{self.duration_ns}ns, bytes={self.bytes}, fields={self.fields})")
@@ -1,10 +1,13 @@
 import os
-import inspect
-import json
-from json.decoder import JSONDecodeError
-
-from versionedobj.object import VersionedObject, CustomValue
-from versionedobj.utils import _ObjField, _walk_obj_attrs, _field_should_be_skipped, _obj_to_dict
+import time
+from collections import OrderedDict, deque
+
+from versionedobj.object import VersionedObject, CustomValue, MigrationEdgeStats
+from versionedobj.utils import (_ObjField, _walk_obj_attrs, _field_should_be_skipped, _obj_to_dict, _copy_json,
+                               _CopyOnWriteDict, _resolve, _atomic_write, _FileLock)
+from versionedobj.validation import _get_validator, _CheckResult
+from versionedobj.profiling import ProfileEvent
+from versionedobj.stats import runtime_stats
 from versionedobj.exceptions import InvalidFilterError, LoadObjectError, InputValidationError, InvalidVersionAttributeError
 
 
@@ -13,34 +16,294 @@ def _walk_dict_attrs(obj, parent_attrs, only=[], ignore=[]):
     Walk all fields (including nested fields) in a versioned object as a dict, and
     generate an _ObjField instance for each field
 
+    :param obj: VersionedObject instance matching the dict
     :param parent_attrs: Dict to walk
     :param list only: List of 'only' names
     :param list ignore: List of 'ignore' names
+
+    :return: generator yielding tuples of the form (object containing the field, _ObjField instance)
     """
-    attrs_stack = [(None, [], parent_attrs)]
+    attrs_queue = deque([([], obj, parent_attrs)])
+    filtered = bool(only or ignore)
 
-    while attrs_stack:
-        fieldname, parents, attrs = attrs_stack.pop(0)
+    while attrs_queue:
+        parents, parent_obj, attrs = attrs_queue.popleft()
 
         for n in attrs:
-            p = parents if fieldname is None else parents + [fieldname]
+            if (not parents) and (n == 'version'):
+                # Version number is not loaded into the object
+                continue
+
             value = attrs[n]
-            field = _ObjField(p, n, value)
-            field_value = field.get_obj_field(obj)
+            field_value = getattr(parent_obj, n)
 
             if (isinstance(field_value, VersionedObject) and (type(value) == dict)):
-                attrs_stack.append((n, p, value))
+                attrs_queue.append((parents + [n], field_value, value))
             else:
-                if not _field_should_be_skipped(field.dot_name(), only, ignore):
-                    yield field
+                # All fields at the same nesting level share the same parents list
+                field = _ObjField(parents, n, value)
+                if not (filtered and _field_should_be_skipped(field.dot_name(), only, ignore)):
+                    yield parent_obj, field
+
+
+def _detect_indent(jsonstr):
+    """
+    Detect the indentation level used in a JSON string, so that it can be written back\
+    with the same formatting
+
+    :param str jsonstr: JSON string
+
+    :return: indentation level in columns, indentation string if not indented with spaces,\
+        or None if everything is on one line
+    """
+    lines = jsonstr.strip().split('\n', 2)
+    if (len(lines) < 2) or lines[1].lstrip().startswith(('}', ']')):
+        # Everything is on one line, or an empty object or list
+        return None
+
+    indent = lines[1][:len(lines[1]) - len(lines[1].lstrip())]
+    if indent.strip(' '):
+        return indent
+
+    return len(indent)
+
+
+def _release_lock(file_lock):
+    if file_lock is not None:
+        file_lock.__exit__(None, None, None)
+
+
+def _check_executor(executor):
+    """
+    Check that an executor can be used by the asyncio methods. Functions passed to the executor\
+    are closures, and file locks can't be shared with other processes, so only thread pools work.
+
+    :raises ValueError: if the executor is not None, or a ThreadPoolExecutor
+    """
+    if executor is None:
+        return
+
+    from concurrent.futures import ThreadPoolExecutor
+
+    if not isinstance(executor, ThreadPoolExecutor):
+        raise ValueError(f"executor must be a concurrent.futures.ThreadPoolExecutor, not {type(executor).__name__}")
+
+
+async def _run_in_executor(executor, cleanup, func, *args):
+    """
+    Run a function in an executor, and wait for the result. If the waiting task is cancelled,\
+    the function keeps running until it is finished (so e.g. a file write is never left half\
+    done), and its result is passed to the cleanup function, if set, instead of being returned.\
+    Cleanup happens even if the event loop is closed before the function finishes.
+
+    :param executor: concurrent.futures.ThreadPoolExecutor to use, or None for the default\
+        executor of the event loop
+    :param callable cleanup: if set, called with the result of the function, if the waiting\
+        task is cancelled and the function succeeds
+    :param callable func: function to run
+
+    :return: return value of the function
+    """
+    import asyncio
+    import threading
+
+    mutex = threading.Lock()
+    state = {"cancelled": False, "done": False, "result": None}
+
+    def _call():
+        ret = func(*args)
+        with mutex:
+            cancelled = state["cancelled"]
+            state["done"] = True
+            state["result"] = ret
+
+        if cancelled and (cleanup is not None):
+            cleanup(ret)
+
+        return ret
+
+    fut = asyncio.get_running_loop().run_in_executor(executor, _call)
+    try:
+        return await asyncio.shield(fut)
+    except asyncio.CancelledError:
+        with mutex:
+            state["cancelled"] = True
+            done = state["done"]
+
+        # If the function has not finished yet, it does the cleanup itself
+        if done and (cleanup is not None):
+            cleanup(state["result"])
+
+        raise
 
 
 class Serializer(object):
     """
     Class for serializing/deserializing any VersionedObject types
+
+    :param obj: VersionedObject instance to use for all methods, when no object instance\
+        is passed to the method
+    :param int shape_cache_size: Maximum number of dict structures to remember per\
+        Serializer instance. When validating a dict, if a dict with exactly the same\
+        attribute names at every nesting level has already passed validation for the\
+        same object class and filters, then the validation is skipped. The least\
+        recently used structure is forgotten when the cache is full. 0 disables the cache.
+    :param bool check_types: If true, validation also checks the type of each attribute\
+        value in the dict, against the type annotation of the matching class attribute, or\
+        the type of the default value if there is no annotation. Attributes with a default\
+        value of None, CustomValue attributes, and unsupported annotations are not checked.
+    :param callable migration_hook: If set, called with a versionedobj.object.MigrationStep object\
+        after each migration function call performed while loading object data. The size of the\
+        object data before and after each call is only measured when a hook is set.
+    :param callable profile_hook: If set, called with a versionedobj.profiling.ProfileEvent object\
+        for each phase of every operation performed by this Serializer instance (e.g. JSON decoding,\
+        migration, validation), with the duration of the phase in nanoseconds. Phases are only\
+        timed when a hook is set.
+
+    :ivar int shape_cache_hits: number of times validation was skipped because the dict\
+        structure was found in the cache
+    :ivar int shape_cache_misses: number of times the dict structure was not found in the cache
+    :ivar dict migration_stats: maps (from_version, to_version) tuples to a\
+        versionedobj.object.MigrationEdgeStats object, for all migration steps performed\
+        by this Serializer instance
     """
-    def __init__(self, obj=None):
+    def __init__(self, obj=None, shape_cache_size=0, check_types=False, migration_hook=None, profile_hook=None):
         self.obj = obj
+        self.shape_cache_size = shape_cache_size
+        self.check_types = check_types
+        self.migration_hook = migration_hook
+        self.profile_hook = profile_hook
+        self.shape_cache_hits = 0
+        self.shape_cache_misses = 0
+        self.migration_stats = {}
+        self._shape_cache = OrderedDict()
+
+        # Value of the VersionedObject class generation when the shape cache was last used.
+        # Validator nodes are part of the cache keys, so entries for out of date nodes are dropped.
+        self._shape_cache_generation = 0
+
+        # True for Serializers used by ListField, MapField and ColumnarListField to convert their
+        # elements. Their work is timed as part of the containing operation, so they don't count
+        # operations or emit profiling events of their own.
+        self._nested = False
+
+    def _validate(self, attrs, obj, only, ignore, load):
+        """
+        Validate a dict, using the shape cache if enabled, and optionally collect values to load
+
+        :return: list of values to load, if 'load' is true
+        """
+        node = _get_validator(obj, only, ignore)
+
+        if (self.shape_cache_size > 0) and isinstance(attrs, dict):
+            generation = type(obj.__class__)._vobj__generation
+            if self._shape_cache_generation != generation:
+                self._shape_cache.clear()
+                self._shape_cache_generation = generation
+
+            # Values are collected, and types checked, in the same traversal that generates
+            # the fingerprint, so a cache hit needs no further traversal
+            result = _CheckResult(load, self.check_types)
+
+            # Validators are unique per object class and filters, so the validator node is part of the key
+            key = (node, node.collect_shape(attrs, result, obj))
+            if key in self._shape_cache:
+                self.shape_cache_hits += 1
+                self._shape_cache.move_to_end(key)
+                self._raise_errors(result)
+                return result.writes
+
+            self.shape_cache_misses += 1
+            result = _CheckResult(load, self.check_types)
+            node.check(attrs, result, obj, top=True)
+            self._raise_errors(result)
+
+            self._shape_cache[key] = True
+            if len(self._shape_cache) > self.shape_cache_size:
+                self._shape_cache.popitem(last=False)
+
+            return result.writes
+
+        try:
+            return node.validate(attrs, obj, load, self.check_types)
+        except InputValidationError:
+            if runtime_stats.enabled:
+                runtime_stats.validation_failures += 1
+
+            raise
+
+    def _raise_errors(self, result):
+        try:
+            result.raise_errors()
+        except InputValidationError:
+            if runtime_stats.enabled:
+                runtime_stats.validation_failures += 1
+
+            raise
+
+    def clear_shape_cache(self):
+        """
+        Forget all dict structures that have passed validation, and reset the cache hit/miss counters
+        """
+        self._shape_cache.clear()
+        self.shape_cache_hits = 0
+        self.shape_cache_misses = 0
+
+    def clear_migration_stats(self):
+        """
+        Reset the aggregate counters for all migration steps
+        """
+        self.migration_stats.clear()
+
+    def _record_migration(self, migration_result):
+        # Add all steps of a migration to the aggregate counters
+        for step in migration_result.steps:
+            key = (step.from_version, step.to_version)
+            stats = self.migration_stats.get(key, None)
+            if stats is None:
+                stats = MigrationEdgeStats()
+                self.migration_stats[key] = stats
+
+            stats.add(step)
+
+        if runtime_stats.enabled:
+            runtime_stats._add_migration(migration_result)
+
+    def _profiling(self):
+        # True if profiling events are needed, for either the profile hook or the runtime stats
+        return (self.profile_hook is not None) or (runtime_stats.enabled and not self._nested)
+
+    def _count(self, operation, obj):
+        # Count a call to a public method in the runtime stats
+        if runtime_stats.enabled and not self._nested:
+            runtime_stats._add_operation(obj.__class__, operation)
+
+    def _emit(self, operation, phase, obj, start, nbytes=None, fields=None, duration=None):
+        # Pass a profiling event to the profile hook and the runtime stats
+        if duration is None:
+            duration = time.perf_counter_ns() - start
+
+        event = ProfileEvent(operation, phase, obj.__class__, duration, nbytes, fields)
+        if runtime_stats.enabled:
+            runtime_stats._add_event(event)
+
+        if self.profile_hook is not None:
+            self.profile_hook(event)
+
+    def _to_dict(self, obj, only, ignore, operation, filename=None):
+        if not self._profiling():
+            return _obj_to_dict(obj, only, ignore, filename)
+
+        counts = [0, 0, 0]
+        start = time.perf_counter_ns()
+        ret = _obj_to_dict(obj, only, ignore, filename, counts)
+        duration = time.perf_counter_ns() - start
+
+        self._emit(operation, 'walk', obj, start, fields=counts[0], duration=duration - counts[2])
+        if counts[1]:
+            self._emit(operation, 'custom_encode', obj, start, fields=counts[1], duration=counts[2])
+
+        return ret
 
     def to_dict(self, obj=None, only=[], ignore=[]):
         """
@@ -53,7 +316,9 @@ class Serializer(object):
         :return: object data as a dict
         :rtype: dict
         """
-        return _obj_to_dict(obj if obj is not None else self.obj, only, ignore)
+        obj = obj if obj is not None else self.obj
+        self._count('to_dict', obj)
+        return self._to_dict(obj, only, ignore, 'to_dict')
 
     def validate_dict(self, attrs, obj=None, only=[], ignore=[]):
         """
@@ -67,7 +332,9 @@ class Serializer(object):
 
         :raises versionedobj.exceptions.InputValidationError: if the dict contains\
             fields that are not found in this object, or if the dict is missing\
-            fields that are found in this object.
+            fields that are found in this object, or if type checking is enabled and the\
+            dict contains values of the wrong type. All problems found in the dict are\
+            reported by a single exception.
 
         :raises versionedobj.exceptions.InvalidFilterError: if both 'only' and 'ignore' are provided.
         """
@@ -75,42 +342,16 @@ class Serializer(object):
             raise InvalidFilterError("Cannot use both 'only' and 'ignore'")
 
         obj = obj if obj is not None else self.obj
+        self._count('validate_dict', obj)
 
-        # Create a map of all object attribute names, to track which attributes have
-        # also been seen in the dict
-        obj_attrs_loaded = {}
-        for field in _walk_obj_attrs(obj, only, ignore):
-            dotname = field.dot_name()
-            if 'version' == dotname:
-                continue
-
-            obj_attrs_loaded[dotname] = False
-
-        # Now, walk through all attributes in the dict
-        try:
-            for field in _walk_dict_attrs(obj, attrs, only, ignore):
-                dotname = field.dot_name()
-
-                if 'version' == dotname:
-                    continue
-
-                if dotname not in obj_attrs_loaded:
-                    raise InputValidationError(f"Unrecognized attribute name '{dotname}' in dict")
-
-                obj_attrs_loaded[dotname] = True
-        except AttributeError as e:
-            raise InputValidationError(str(e))
-
-        # See if any fields were missing from the dict
-        missing = []
-        for n in obj_attrs_loaded:
-            if not obj_attrs_loaded[n]:
-                missing.append(n)
-
-        if missing:
-            raise InputValidationError(f"Attributes missing from dict: {','.join(missing)}")
+        if not self._profiling():
+            self._validate(attrs, obj, only, ignore, False)
+        else:
+            start = time.perf_counter_ns()
+            self._validate(attrs, obj, only, ignore, False)
+            self._emit('validate_dict', 'validate', obj, start)
 
-    def from_dict(self, attrs, obj=None, validate=True, only=[], ignore=[]):
+    def from_dict(self, attrs, obj=None, validate=True, only=[], ignore=[], preserve_input=False):
         """
         Populate instance attributes of a VersionedObjbect instance, with object data from a dict.
 
@@ -122,6 +363,11 @@ class Serializer(object):
             and don't want to mess with filtering.
         :param list only: Whitelist of field names to load (cannot be used with blacklist)
         :param list ignore: Blacklist of field names to ignore (cannot be used with whitelist)
+        :param bool preserve_input: If true, the dict passed in (and any dicts or lists inside it)\
+            will not be modified, and will not be shared with the object instance. Migration\
+            functions will receive a copy-on-write view of the dict instead of the dict itself,\
+            and dict/list attribute values are copied when they are loaded into the object.\
+            The dict itself is never copied.
 
         :raises versionedobj.exceptions.InputValidationError: if validation of input data fails.
         :raises versionedobj.exceptions.InvalidFilterError: if both 'only' and 'ignore' are provided.
@@ -130,29 +376,87 @@ class Serializer(object):
             None if no object migrations were required
         :rtype: MigrationResult
         """
+        self._count('from_dict', obj if obj is not None else self.obj)
+        return self._from_dict(attrs, obj, validate, only, ignore, preserve_input=preserve_input)
+
+    def _from_dict(self, attrs, obj, validate, only, ignore, filename=None, preserve_input=False, on_migrated=None,
+                   operation='from_dict'):
         if only and ignore:
             raise InvalidFilterError("Cannot use both 'only' and 'ignore'")
 
         obj = obj if obj is not None else self.obj
+        profiling = self._profiling()
 
         version = obj.__dict__.get('version', None)
-        migration_result, attrs = obj._vobj__migrate(version, attrs)
-        if (migration_result is not None) and (not migration_result.success):
-            return migration_result
-
+        if preserve_input and isinstance(attrs, dict) and (attrs.get('version', None) != version):
+            # Migrations modify a view of the dict, rather than the dict itself
+            attrs = _CopyOnWriteDict(attrs)
+
+        start = time.perf_counter_ns() if profiling else 0
+        migration_result, attrs = obj._vobj__migrate(version, attrs, self.migration_hook)
+        if migration_result is not None:
+            if profiling:
+                self._emit(operation, 'migrate', obj, start)
+
+            self._record_migration(migration_result)
+            if not migration_result.success:
+                return migration_result
+
+        if type(attrs) == _CopyOnWriteDict:
+            attrs = attrs.to_dict()
+        elif preserve_input and (migration_result is not None):
+            # Migration returned a new dict, which may contain views of the original dict
+            attrs = _resolve(attrs)
+
+        start = time.perf_counter_ns() if profiling else 0
         if validate:
-            self.validate_dict(attrs, obj, only, ignore)
+            # Validate and collect values in a single pass, then load values only if validation passed
+            writes = self._validate(attrs, obj, only, ignore, True)
+        else:
+            writes = [(parent, field.fieldname, field.value)
+                      for parent, field in _walk_dict_attrs(obj, attrs, only, ignore)]
+
+        if profiling:
+            self._emit(operation, 'validate' if validate else 'walk', obj, start, fields=len(writes))
+            start = time.perf_counter_ns()
 
-        # Delete version field from dict, if it exists
-        if 'version' in attrs:
-            del attrs['version']
+        custom_count = 0
+        custom_ns = 0
+
+        for parent, n, value in writes:
+            val = getattr(parent, n)
+            if not isinstance(val, CustomValue):
+                if preserve_input and (type(value) in (dict, list)):
+                    value = _copy_json(value)
+
+                setattr(parent, n, value)
+                continue
 
-        for field in _walk_dict_attrs(obj, attrs, only, ignore):
-            val = field.get_obj_field(obj)
-            if isinstance(val, CustomValue):
-                val.from_dict(field.value)
+            if profiling:
+                custom_start = time.perf_counter_ns()
+
+            if (filename is not None) and hasattr(val, '_vobj__load_journal'):
+                val._vobj__load_journal(filename, value)
             else:
-                field.set_obj_field(obj)
+                if preserve_input and (type(value) in (dict, list)):
+                    value = _copy_json(value)
+
+                val.from_dict(value)
+
+            if profiling:
+                custom_ns += time.perf_counter_ns() - custom_start
+                custom_count += 1
+
+        if profiling:
+            duration = time.perf_counter_ns() - start
+            self._emit(operation, 'assign', obj, start, fields=len(writes), duration=duration - custom_ns)
+            if custom_count:
+                self._emit(operation, 'custom_decode', obj, start, fields=custom_count, duration=custom_ns)
+
+        if (on_migrated is not None) and (migration_result is not None):
+            migrated = {'version': version}
+            migrated.update((k, v) for k, v in attrs.items() if k != 'version')
+            on_migrated(migrated)
 
         return migration_result
 
@@ -169,7 +473,22 @@ class Serializer(object):
         :return: Object data as a JSON string
         :rtype: str
         """
-        return json.dumps(self.to_dict(obj, only, ignore), indent=indent)
+        obj = obj if obj is not None else self.obj
+        self._count('to_json', obj)
+        attrs = self._to_dict(obj, only, ignore, 'to_json')
+        return self._encode(attrs, obj, indent, 'to_json')
+
+    def _encode(self, attrs, obj, indent, operation):
+        # json is imported when first needed, to keep 'import versionedobj' fast
+        import json
+
+        if not self._profiling():
+            return json.dumps(attrs, indent=indent)
+
+        start = time.perf_counter_ns()
+        ret = json.dumps(attrs, indent=indent)
+        self._emit(operation, 'encode', obj, start, nbytes=len(ret))
+        return ret
 
     def from_json(self, jsonstr, obj=None, validate=True, only=[], ignore=[]):
         """
@@ -192,14 +511,26 @@ class Serializer(object):
             None if no object migrations were required
         :rtype: MigrationResult
         """
+        self._count('from_json', obj if obj is not None else self.obj)
+        return self._from_json(jsonstr, obj, validate, only, ignore)
+
+    def _from_json(self, jsonstr, obj, validate, only, ignore, filename=None, on_migrated=None,
+                   operation='from_json'):
+        import json
+
+        profiling = self._profiling()
+        start = time.perf_counter_ns() if profiling else 0
         try:
             d = json.loads(jsonstr)
-        except JSONDecodeError:
+        except json.JSONDecodeError:
             raise LoadObjectError("JSON decode failure")
 
-        return self.from_dict(d, obj, validate, only, ignore)
+        if profiling:
+            self._emit(operation, 'decode', obj if obj is not None else self.obj, start, nbytes=len(jsonstr))
 
-    def to_file(self, filename, obj=None, indent=None, only=[], ignore=[]):
+        return self._from_dict(d, obj, validate, only, ignore, filename, on_migrated=on_migrated, operation=operation)
+
+    def to_file(self, filename, obj=None, indent=None, only=[], ignore=[], atomic=False, lock=False):
         """
         Save VersionedObject instance data to a JSON file
 
@@ -209,11 +540,40 @@ class Serializer(object):
         :param int indent: Indentation level to use, in columns. If None, everything will be on one line.
         :param list only: Whitelist of field names to serialize (cannot be used with blacklist)
         :param list ignore: Blacklist of field names to ignore (cannot be used with whitelist)
+        :param bool atomic: If true, data is written to a temporary file which then replaces the\
+            file, so that readers will see either the old or the new file contents, but never\
+            a partially written file.
+        :param bool lock: If true, an exclusive lock is held on the '<filename>.lock' file while\
+            writing, so that other processes using locked reads and writes of the same file\
+            wait until the write is complete. Implies 'atomic'.
+
+        :raises NotImplementedError: if 'lock' is true, and file locking is not available on\
+            this platform.
         """
-        with open(filename, 'w') as fh:
-            fh.write(self.to_json(obj, indent, only, ignore))
+        obj = obj if obj is not None else self.obj
+        self._count('to_file', obj)
+
+        if lock:
+            with _FileLock(filename, True):
+                self._write_file(filename, obj, indent, only, ignore, True)
+        else:
+            self._write_file(filename, obj, indent, only, ignore, atomic)
+
+    def _write_file(self, filename, obj, indent, only, ignore, atomic):
+        data = self._encode(self._to_dict(obj, only, ignore, 'to_file', filename), obj, indent, 'to_file')
+
+        profiling = self._profiling()
+        start = time.perf_counter_ns() if profiling else 0
+        if atomic:
+            _atomic_write(filename, data)
+        else:
+            with open(filename, 'w') as fh:
+                fh.write(data)
+
+        if profiling:
+            self._emit('to_file', 'write', obj, start, nbytes=os.path.getsize(filename))
 
-    def from_file(self, filename, obj=None, validate=True, only=[], ignore=[]):
+    def from_file(self, filename, obj=None, validate=True, only=[], ignore=[], write_back=False, lock=False):
         """
         Populate instance attributes of a VersionedObject instance with object data from a JSON file.
 
@@ -225,17 +585,244 @@ class Serializer(object):
             and don't want to mess with filtering.
         :param list only: Whitelist of field names to load (cannot be used with blacklist)
         :param list ignore: Blacklist of field names to ignore (cannot be used with whitelist)
+        :param bool write_back: If true, and the object data in the file was successfully migrated\
+            to the current version, then the migrated object data is written back to the file\
+            (atomically, with the same indentation), so that the migration does not need to be\
+            repeated the next time the file is loaded. All fields in the file are written back,\
+            including any fields excluded by 'only' or 'ignore'.
+        :param bool lock: If true, a shared lock is held on the '<filename>.lock' file while\
+            reading, so that reading waits for any locked write of the same file by another\
+            process to complete. Many processes can hold shared locks at the same time. If\
+            'write_back' is also true, an exclusive lock is held instead.
 
         :raises versionedobj.exceptions.InputValidationError: if validation of input data fails.
         :raises versionedobj.exceptions.LoadObjectError: if JSON parsing fails
         :raises versionedobj.exceptions.InvalidFilterError: if both 'only' and 'ignore' are provided.
+        :raises NotImplementedError: if 'lock' is true, and file locking is not available on\
+            this platform.
 
         :return: MigrationResult object describing the object migration that was peformed, or\
             None if no object migrations were required
         :rtype: MigrationResult
         """
+        self._count('from_file', obj if obj is not None else self.obj)
+
+        if lock:
+            with _FileLock(filename, write_back):
+                return self._read_file(filename, obj, validate, only, ignore, write_back)
+
+        return self._read_file(filename, obj, validate, only, ignore, write_back)
+
+    def _read_file(self, filename, obj, validate, only, ignore, write_back):
+        profiling = self._profiling()
+        start = time.perf_counter_ns() if profiling else 0
         with open(filename, 'r') as fh:
-            return self.from_json(fh.read(), obj, validate, only, ignore)
+            jsonstr = fh.read()
+            if profiling:
+                nbytes = os.fstat(fh.fileno()).st_size
+                self._emit('from_file', 'read', obj if obj is not None else self.obj, start, nbytes=nbytes)
+
+        on_migrated = None
+        if write_back:
+            def on_migrated(attrs):
+                import json
+
+                _atomic_write(filename, json.dumps(attrs, indent=_detect_indent(jsonstr)))
+
+        return self._from_json(jsonstr, obj, validate, only, ignore, filename, on_migrated, 'from_file')
+
+    async def from_file_async(self, filename, obj=None, validate=True, only=[], ignore=[], write_back=False,
+                              lock=False, executor=None):
+        """
+        Asynchronous version of from_file, for use in asyncio applications. Locking, reading\
+        and decoding the file, and writing migrated data back to the file, are done in an\
+        executor. Loading the decoded data into the object is done on the event loop thread,\
+        so the object is never modified by another thread. If the task is cancelled, the object\
+        is not modified, unless the object data was already loaded, and any file lock is released.
+
+        Limitation: journal files of journaled ListFields are not read in the executor. They are\
+        read synchronously on the event loop thread, which blocks the event loop while the\
+        journal file is read.
+
+        :param str filename: Name of file to load
+        :param obj: VersionedObject instance to populate. If unset, object passed to __init__ will\
+            be used instead
+        :param bool validate: If false, pre-validation will be skipped for the input data.
+        :param list only: Whitelist of field names to load (cannot be used with blacklist)
+        :param list ignore: Blacklist of field names to ignore (cannot be used with whitelist)
+        :param bool write_back: If true, migrated object data is written back to the file,\
+            as for from_file
+        :param bool lock: If true, the file is locked while reading, as for from_file
+        :param executor: concurrent.futures.ThreadPoolExecutor to run file I/O and decoding in.\
+            If unset, the default executor of the event loop is used. Process pools are not supported.
+
+        :raises versionedobj.exceptions.InputValidationError: if validation of input data fails.
+        :raises versionedobj.exceptions.LoadObjectError: if JSON parsing fails
+        :raises versionedobj.exceptions.InvalidFilterError: if both 'only' and 'ignore' are provided.
+        :raises NotImplementedError: if 'lock' is true, and file locking is not available on\
+            this platform.
+        :raises ValueError: if 'executor' is not a ThreadPoolExecutor
+
+        :return: MigrationResult object describing the object migration that was peformed, or\
+            None if no object migrations were required
+        :rtype: MigrationResult
+        """
+        _check_executor(executor)
+        obj = obj if obj is not None else self.obj
+        self._count('from_file_async', obj)
+
+        file_lock, jsonstr, attrs, timings = await _run_in_executor(
+            executor, lambda ret: _release_lock(ret[0]), self._read_decode, filename, lock, write_back)
+
+        try:
+            if self._profiling():
+                read_ns, nbytes, decode_ns = timings
+                self._emit('from_file_async', 'read', obj, 0, nbytes=nbytes, duration=read_ns)
+                self._emit('from_file_async', 'decode', obj, 0, nbytes=len(jsonstr), duration=decode_ns)
+
+            migrated = []
+            ret = self._from_dict(attrs, obj, validate, only, ignore, filename,
+                                  on_migrated=migrated.append if write_back else None,
+                                  operation='from_file_async')
+
+            if migrated:
+                # Lock is released by the executor, after writing
+                held_lock, file_lock = file_lock, None
+                await _run_in_executor(executor, None, self._write_back, filename, migrated[0],
+                                       _detect_indent(jsonstr), held_lock)
+        finally:
+            _release_lock(file_lock)
+
+        return ret
+
+    def _read_decode(self, filename, lock, exclusive):
+        """
+        Lock (if enabled), read and decode a file, for from_file_async
+
+        :return: tuple of the form (file lock, JSON string, decoded data, timings), where 'file lock'\
+            is a _FileLock that must be released, or None, and 'timings' is a tuple of the form\
+            (read nanoseconds, file size, decode nanoseconds)
+        """
+        import json
+
+        file_lock = None
+        if lock:
+            file_lock = _FileLock(filename, exclusive)
+            file_lock.__enter__()
+
+        try:
+            start = time.perf_counter_ns()
+            with open(filename, 'r') as fh:
+                jsonstr = fh.read()
+                nbytes = os.fstat(fh.fileno()).st_size
+
+            read_ns = time.perf_counter_ns() - start
+
+            start = time.perf_counter_ns()
+            try:
+                attrs = json.loads(jsonstr)
+            except json.JSONDecodeError:
+                raise LoadObjectError("JSON decode failure")
+
+            decode_ns = time.perf_counter_ns() - start
+        except BaseException:
+            _release_lock(file_lock)
+            raise
+
+        return file_lock, jsonstr, attrs, (read_ns, nbytes, decode_ns)
+
+    def _write_back(self, filename, attrs, indent, file_lock):
+        # Write migrated object data back to a file, for from_file_async, and release the file lock
+        import json
+
+        try:
+            _atomic_write(filename, json.dumps(attrs, indent=indent))
+        finally:
+            _release_lock(file_lock)
+
+    async def to_file_async(self, filename, obj=None, indent=None, only=[], ignore=[], atomic=False, lock=False,
+                            executor=None):
+        """
+        Asynchronous version of to_file, for use in asyncio applications. The object data is\
+        converted to a dict on the event loop thread, so the saved data is a consistent snapshot\
+        of the object at the time of the call. Encoding the dict, locking, and writing the file,\
+        are done in an executor. If the task is cancelled after the write has started, the write\
+        still completes, so an atomic write never leaves a partially written file.
+
+        Limitation: journal files of journaled ListFields are not written in the executor. They\
+        are written synchronously on the event loop thread, while the object data is converted\
+        to a dict, which blocks the event loop while the journal file is written.
+
+        :param str filename: Name of file to write
+        :param obj: VersionedObject instance to serialize. If unset, object passed to __init__\
+            will be used instead.
+        :param int indent: Indentation level to use, in columns. If None, everything will be on one line.
+        :param list only: Whitelist of field names to serialize (cannot be used with blacklist)
+        :param list ignore: Blacklist of field names to ignore (cannot be used with whitelist)
+        :param bool atomic: If true, the file is written atomically, as for to_file
+        :param bool lock: If true, the file is locked while writing, as for to_file. Implies 'atomic'.
+        :param executor: concurrent.futures.ThreadPoolExecutor to run encoding and file I/O in.\
+            If unset, the default executor of the event loop is used. Process pools are not supported.
+
+        :raises NotImplementedError: if 'lock' is true, and file locking is not available on\
+            this platform.
+        :raises ValueError: if 'executor' is not a ThreadPoolExecutor
+        """
+        _check_executor(executor)
+        obj = obj if obj is not None else self.obj
+        self._count('to_file_async', obj)
+        await self._to_file_async(filename, obj, indent, only, ignore, atomic or lock, lock, executor, None)
+
+    async def _to_file_async(self, filename, obj, indent, only, ignore, atomic, lock, executor, held_lock):
+        try:
+            # Values may be modified by the event loop thread while encoding, so encode a copy
+            attrs = _copy_json(self._to_dict(obj, only, ignore, 'to_file_async', filename))
+        except BaseException:
+            _release_lock(held_lock)
+            raise
+
+        timings = await _run_in_executor(executor, None, self._encode_write, filename, attrs, indent, atomic, lock,
+                                         held_lock)
+
+        if self._profiling():
+            encode_ns, length, write_ns, nbytes = timings
+            self._emit('to_file_async', 'encode', obj, 0, nbytes=length, duration=encode_ns)
+            self._emit('to_file_async', 'write', obj, 0, nbytes=nbytes, duration=write_ns)
+
+    def _encode_write(self, filename, attrs, indent, atomic, lock, held_lock):
+        """
+        Encode object data, lock (if enabled) and write a file, for to_file_async. If 'held_lock'\
+        is set, it is a _FileLock that is already held, and is released after writing.
+
+        :return: tuple of the form (encode nanoseconds, JSON string length, write nanoseconds, file size)
+        """
+        import json
+
+        try:
+            start = time.perf_counter_ns()
+            data = json.dumps(attrs, indent=indent)
+            encode_ns = time.perf_counter_ns() - start
+
+            file_lock = _FileLock(filename, True) if lock else None
+            if file_lock is not None:
+                file_lock.__enter__()
+
+            try:
+                start = time.perf_counter_ns()
+                if atomic:
+                    _atomic_write(filename, data)
+                else:
+                    with open(filename, 'w') as fh:
+                        fh.write(data)
+
+                write_ns = time.perf_counter_ns() - start
+                nbytes = os.path.getsize(filename)
+            finally:
+                _release_lock(file_lock)
+        finally:
+            _release_lock(held_lock)
+
+        return encode_ns, len(data), write_ns, nbytes
 
     def reset_to_defaults(self, obj=None):
         """
@@ -254,23 +841,122 @@ class FileLoader(object):
     Context manager for modifying object data saved to a JSON file. Deserializes
     the object on entry, if it exists, allowing you to modify the deserialized object, and
     serializes the changed object data back to the same file on exit.
+
+    :param instance_or_class: VersionedObject instance, or VersionedObject class to create an instance of
+    :param str filename: Name of file to load and save
+    :param bool write_back: If true, and the object data in the file needs to be migrated,\
+        then the migrated object data is written back to the file on entry, before the\
+        deserialized object is modified.
+    :param bool lock: If true, an exclusive lock is held on the '<filename>.lock' file from\
+        entry to exit, so that no other process using locked reads or writes can read or\
+        modify the file until the changes are saved, and the file is written atomically.
+
+    :raises NotImplementedError: on entry, if 'lock' is true and file locking is not\
+        available on this platform.
     """
-    def __init__(self, instance_or_class, filename):
+    def __init__(self, instance_or_class, filename, write_back=False, lock=False):
         if isinstance(instance_or_class, VersionedObject):
             self.obj = instance_or_class
-        elif inspect.isclass(instance_or_class) and issubclass(instance_or_class, VersionedObject):
+        elif isinstance(instance_or_class, type) and issubclass(instance_or_class, VersionedObject):
             self.obj = instance_or_class()
         else:
             raise ValueError("First argument must be a VersionedObject instance or class object")
 
         self.filename = filename
+        self.write_back = write_back
+        self.lock = lock
         self.serializer = Serializer(self.obj)
+        self._lock = None
 
     def __enter__(self):
-        if os.path.isfile(self.filename):
-            self.serializer.from_file(self.filename)
+        if self.lock:
+            self._lock = _FileLock(self.filename, True)
+            self._lock.__enter__()
+
+        try:
+            if os.path.isfile(self.filename):
+                self.serializer.from_file(self.filename, write_back=self.write_back)
+        except BaseException:
+            self._release()
+            raise
 
         return self.obj
 
     def __exit__(self, exc_type, exc_value, exc_traceback):
-        self.serializer.to_file(self.filename)
+        try:
+            self.serializer.to_file(self.filename, atomic=self.lock)
+        finally:
+            self._release()
+
+    def _release(self):
+        if self._lock is not None:
+            self._lock.__exit__(None, None, None)
+            self._lock = None
+
+
+class AsyncFileLoader(object):
+    """
+    Asynchronous version of FileLoader, for use in asyncio applications. Deserializes the object\
+    with Serializer.from_file_async on entry, if the file exists, and serializes the changed object\
+    data with Serializer.to_file_async on exit. As for those methods, journal files of journaled\
+    ListFields are read and written synchronously on the event loop thread.
+
+    .. code:: python
+
+        async with AsyncFileLoader(UserConfig, "user_config.json") as cfg:
+            cfg.volume = 11
+
+    :param instance_or_class: VersionedObject instance, or VersionedObject class to create an instance of
+    :param str filename: Name of file to load and save
+    :param bool write_back: If true, and the object data in the file needs to be migrated,\
+        then the migrated object data is written back to the file on entry
+    :param bool lock: If true, an exclusive lock is held on the '<filename>.lock' file from\
+        entry to exit, and the file is written atomically, as for FileLoader. The lock is\
+        taken in the executor, so waiting for the lock does not block the event loop.
+    :param executor: concurrent.futures.ThreadPoolExecutor to run file I/O in. If unset, the\
+        default executor of the event loop is used. Process pools are not supported.
+
+    :raises ValueError: if the executor is not a ThreadPoolExecutor
+    """
+    def __init__(self, instance_or_class, filename, write_back=False, lock=False, executor=None):
+        if isinstance(instance_or_class, VersionedObject):
+            self.obj = instance_or_class
+        elif isinstance(instance_or_class, type) and issubclass(instance_or_class, VersionedObject):
+            self.obj = instance_or_class()
+        else:
+            raise ValueError("First argument must be a VersionedObject instance or class object")
+
+        _check_executor(executor)
+        self.filename = filename
+        self.write_back = write_back
+        self.lock = lock
+        self.executor = executor
+        self.serializer = Serializer(self.obj)
+        self._lock = None
+
+    def _acquire(self):
+        file_lock = _FileLock(self.filename, True)
+        file_lock.__enter__()
+        return file_lock
+
+    async def __aenter__(self):
+        if self.lock:
+            self._lock = await _run_in_executor(self.executor, _release_lock, self._acquire)
+
+        try:
+            if await _run_in_executor(self.executor, None, os.path.isfile, self.filename):
+                await self.serializer.from_file_async(self.filename, write_back=self.write_back,
+                                                      executor=self.executor)
+        except BaseException:
+            _release_lock(self._lock)
+            self._lock = None
+            raise
+
+        return self.obj
+
+    async def __aexit__(self, exc_type, exc_value, exc_traceback):
+        # Lock is released by the executor, after writing
+        held_lock, self._lock = self._lock, None
+        self.serializer._count('to_file_async', self.obj)
+        await self.serializer._to_file_async(self.filename, self.obj, None, [], [], self.lock, False,
+                                             self.executor, held_lock)
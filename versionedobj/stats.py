@@ -0,0 +1,114 @@
+import os
+
+
+class RuntimeStats(object):
+    """
+    Cumulative counters for all VersionedObject serialization and deserialization performed
+    by all Serializer instances in the current process. Disabled by default; when disabled,
+    nothing is counted and there is no overhead. Can also be enabled by setting the
+    VERSIONEDOBJ_STATS environment variable to 1 before versionedobj is imported.
+
+    :ivar bool enabled: True if counting is enabled
+    :ivar dict classes: maps names of object classes to a dict with an 'operations' dict (mapping\
+        Serializer method names to the number of calls) and a 'time_ns' total, for all operations\
+        on objects of that class
+    :ivar dict time_ns: maps phase names (see versionedobj.profiling.ProfileEvent) to the total\
+        time spent in that phase, in nanoseconds. Time spent converting ListField, MapField and\
+        ColumnarListField elements is part of the 'custom_encode' and 'custom_decode' phases of\
+        the containing operation, and is not counted again.
+    :ivar int fields_walked: number of fields serialized, validated or loaded. Fields of ListField,\
+        MapField and ColumnarListField elements are not included.
+    :ivar int listfield_elements_decoded: number of ListField, MapField and ColumnarListField elements\
+        loaded from dict form
+    :ivar int validation_failures: number of times validation of input data failed
+    :ivar int migrations: number of object migrations performed
+    :ivar int migration_steps: number of migration function calls performed
+    :ivar int bytes_read: number of bytes read by from_file (including FileLoader)
+    :ivar int bytes_written: number of bytes written by to_file (including FileLoader)
+    """
+    def __init__(self):
+        self.enabled = False
+        self.reset()
+
+    def enable(self):
+        """
+        Start counting
+        """
+        self.enabled = True
+
+    def disable(self):
+        """
+        Stop counting. Counters keep their current values.
+        """
+        self.enabled = False
+
+    def reset(self):
+        """
+        Reset all counters to zero
+        """
+        self.classes = {}
+        self.time_ns = {}
+        self.fields_walked = 0
+        self.listfield_elements_decoded = 0
+        self.validation_failures = 0
+        self.migrations = 0
+        self.migration_steps = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+
+    def _class_stats(self, cls):
+        name = f"{cls.__module__}.{cls.__qualname__}"
+        ret = self.classes.get(name, None)
+        if ret is None:
+            ret = {"operations": {}, "time_ns": 0}
+            self.classes[name] = ret
+
+        return ret
+
+    def _add_operation(self, cls, operation):
+        ops = self._class_stats(cls)["operations"]
+        ops[operation] = ops.get(operation, 0) + 1
+
+    def _add_event(self, event):
+        self.time_ns[event.phase] = self.time_ns.get(event.phase, 0) + event.duration_ns
+        self._class_stats(event.cls)["time_ns"] += event.duration_ns
+
+        if event.phase == 'read':
+            self.bytes_read += event.bytes
+        elif event.phase == 'write':
+            self.bytes_written += event.bytes
+        elif (event.phase in ('walk', 'validate')) and (event.fields is not None):
+            # Each operation walks the fields once, in either a 'walk' or a 'validate' phase
+            self.fields_walked += event.fields
+
+    def _add_migration(self, migration_result):
+        self.migrations += 1
+        self.migration_steps += len(migration_result.steps)
+
+    def as_dict(self):
+        """
+        Get the current values of all counters
+
+        :return: all counters, suitable for passing to the json library
+        :rtype: dict
+        """
+        return {
+            "enabled": self.enabled,
+            "classes": {name: {"operations": dict(c["operations"]), "time_ns": c["time_ns"]}
+                        for name, c in self.classes.items()},
+            "time_ns": dict(self.time_ns),
+            "fields_walked": self.fields_walked,
+            "listfield_elements_decoded": self.listfield_elements_decoded,
+            "validation_failures": self.validation_failures,
+            "migrations": self.migrations,
+            "migration_steps": self.migration_steps,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+        }
+
+
+# Counters for the current process
+runtime_stats = RuntimeStats()
+
+if os.environ.get('VERSIONEDOBJ_STATS', '') == '1':
+    runtime_stats.enable()
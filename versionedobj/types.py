@@ -1,106 +1,322 @@
-import inspect
+import os
+import array
 
 from versionedobj.object import CustomValue, VersionedObject
 from versionedobj.serializer import Serializer
+from versionedobj.exceptions import InputValidationError, LoadObjectError
+from versionedobj.utils import _iter_obj_attrs, _atomic_write
+from versionedobj.stats import runtime_stats
 
 
-class ListField(CustomValue):
+# Maps python types to array.array typecodes, for ColumnarListField columns
+_ARRAY_TYPECODES = {int: 'q', float: 'd'}
+_ARRAY_TYPES = {'q': int, 'd': float}
+
+
+def _parse_list_arg(arg, typename):
+    """
+    Parse the first argument passed to a list type constructor, which may be either
+    a VersionedObject class, or an iterable of VersionedObject instances
+
+    :param arg: argument to parse
+    :param str typename: name of list type, for error messages
+
+    :return: tuple of the form (obj_class, values)
+    """
+    obj_class = None
+    values = []
+
+    if isinstance(arg, type) and issubclass(arg, VersionedObject):
+        # Arg is the object class for this list
+        obj_class = arg
+    else:
+        # Arg is an interable of instance values
+        iterable = True
+        try:
+            _ = [i for i in arg]
+        except TypeError:
+            iterable = False
+
+        if iterable:
+            for i in arg:
+                if not isinstance(i, VersionedObject):
+                    raise ValueError(f"{typename} may only contain VersionedObject instances")
+
+                if obj_class is None:
+                    obj_class = i.__class__
+                else:
+                    if obj_class != i.__class__:
+                        raise ValueError(f"{typename} may only contain objects of the same class")
+
+                values.append(i)
+
+    if obj_class is None:
+        raise ValueError("Invalid argument, provide a VersionedObject class or a list of VersionedObject instances")
+
+    return obj_class, values
+
+
+class _ObjectContainer(CustomValue):
+    """
+    Base class for CustomValue types that hold multiple VersionedObject instances
+    of the same class, in the '_values' attribute
+    """
+    container_name = "container"
+
+    def __init__(self, obj_class, lazy):
+        self._obj_class = obj_class
+        self._lazy = lazy
+
+        # Created when first needed, so that defining a class with a container attribute,
+        # and copying the container for each new object instance, stays cheap
+        self._element_serializer = None
+
+    @property
+    def _serializer(self):
+        if self._element_serializer is None:
+            self._element_serializer = Serializer(self._obj_class)
+            self._element_serializer._nested = True
+
+        return self._element_serializer
+
+    def _check_value(self, v):
+        if not isinstance(v, self._obj_class):
+            raise ValueError(f"Only instances of the {self._obj_class.__name__} class can be added to this {self.container_name}")
+
+    def _load_element(self, attrs):
+        if runtime_stats.enabled:
+            runtime_stats.listfield_elements_decoded += 1
+
+        ins = self._obj_class()
+        self._serializer.from_dict(attrs, ins)
+        return ins
+
+    def _dump_element(self, v):
+        if not isinstance(v, VersionedObject):
+            # Raw element data that was never accessed, pass it straight through
+            return v
+
+        return self._serializer.to_dict(v)
+
+    def _materialize(self, key):
+        v = self._values[key]
+        if not isinstance(v, VersionedObject):
+            # Raw element data stored by a lazy from_dict, load it now
+            v = self._load_element(v)
+            self._values[key] = v
+
+        return v
+
+
+class ListField(_ObjectContainer):
     """
     List class that allows putting a sequence of VersionedObject instances in a
     single VersionedObject field. Behaves like a regular python list, except that it
     can only contain VersionedObject instances, and can only contain instances of
     the same VersionedObject class.
+
+    :param arg: VersionedObject class for the list elements, or an iterable of\
+        VersionedObject instances to populate the list with
+    :param bool lazy: If true, from_dict will only store the raw element data, and\
+        each VersionedObject element will be created the first time it is accessed\
+        by index or iteration. Raw elements that have not been accessed are passed\
+        through to to_dict unchanged. Note that this means invalid element data is not\
+        detected until the element is accessed.
+    :param list index: List of element field names (full dot names, e.g. 'profile.region')\
+        to maintain hash indexes for. Indexed fields can be searched in constant time\
+        using find_by and filter_by. Indexes are updated whenever elements are added to\
+        or removed from the list; if you change an indexed field of an element that is\
+        already in the list, call reindex afterwards. Cannot be used with 'lazy'.
+    :param bool journal: If true, when the containing object is saved with Serializer.to_file\
+        or FileLoader, the list elements are stored in a separate append-only JSON Lines file\
+        next to the main file, instead of in the main file. After the first save, each save only\
+        appends records for the elements that were added, replaced or deleted since the last\
+        save, instead of rewriting the whole list. Note that changes made to an element that\
+        is already in the list are only recorded if the element is assigned to the list\
+        again, e.g. ``lst[i] = lst[i]``.
+    :param int compact_after: If 'journal' is true, the journal file is rewritten to contain\
+        only the current list elements, when a save would leave more than this many\
+        replacement and deletion records in the journal file.
     """
-    def __init__(self, arg):
-        self._obj_class = None
-        self._values = []
+    container_name = "list"
 
-        if inspect.isclass(arg) and issubclass(arg, VersionedObject):
-            # Arg is the object class for this list
-            self._obj_class = arg
-        else:
-            # Arg is an interable of instance values
-            iterable = True
-            try:
-                _ = [i for i in arg]
-            except TypeError:
-                iterable = False
+    def __init__(self, arg, lazy=False, index=None, journal=False, compact_after=1000):
+        obj_class, self._values = _parse_list_arg(arg, self.__class__.__name__)
+        super(ListField, self).__init__(obj_class, lazy)
 
-            if iterable:
-                for i in arg:
-                    if not isinstance(i, VersionedObject):
-                        raise ValueError("ListField may only contain VersionedObject instances")
+        self._journal = journal
+        self._journal_compact_after = compact_after
+        self._journal_path = None
+        self._journal_ops = []
+        self._journal_tombstones = 0
 
-                    if self._obj_class is None:
-                        self._obj_class = i.__class__
-                    else:
-                        if self._obj_class != i.__class__:
-                            raise ValueError("ListField may only contain objects of the same class")
+        self._index_names = list(index) if index else []
+        self._index_paths = {}
+        self._indexes = {}
 
-                    self._values.append(i)
+        # Maps element ids to their lowest list position, used to return index matches in list order.
+        # Only built when an index lookup finds more than one match, and None until then, or after
+        # elements are moved by an insertion or deletion
+        self._index_positions = None
 
-        if self._obj_class is None:
-            raise ValueError("Invalid argument, provide a VersionedObject class or a list of VersionedObject instances")
+        if self._index_names:
+            if lazy:
+                raise ValueError("'lazy' and 'index' cannot be used together")
 
-        self._serializer = Serializer(self._obj_class)
+            proto = obj_class()
+            for name in self._index_names:
+                try:
+                    proto[name]
+                except KeyError:
+                    raise ValueError(f"{obj_class.__name__} object has no attribute '{name}'") from None
 
-    def _check_value(self, v):
-        if not isinstance(v, self._obj_class):
-            raise ValueError(f"Only instances of the {self._obj_class.__name__} class can be added to this list")
+                self._index_paths[name] = name.split('.')
+
+            self.reindex()
 
     def _check_index(self, i):
         if i >= len(self._values):
             raise IndexError("List index out of bounds")
 
+    def _index_key(self, v, name):
+        for pname in self._index_paths[name]:
+            v = getattr(v, pname)
+
+        return v
+
+    def _index_keys(self, v):
+        keys = []
+        for name in self._index_names:
+            key = self._index_key(v, name)
+            try:
+                hash(key)
+            except TypeError:
+                raise ValueError(f"Cannot index unhashable value of '{name}'") from None
+
+            keys.append(key)
+
+        return keys
+
+    def _index_add(self, v, keys):
+        for name, key in zip(self._index_names, keys):
+            bucket = self._indexes[name].get(key, None)
+            if bucket is None:
+                self._indexes[name][key] = [v]
+            else:
+                bucket.append(v)
+
+    def _index_remove(self, v):
+        for name in self._index_names:
+            key = self._index_key(v, name)
+            bucket = self._indexes[name].get(key, [])
+            for j, e in enumerate(bucket):
+                if e is v:
+                    del bucket[j]
+                    break
+
+            if not bucket:
+                self._indexes[name].pop(key, None)
+
+    def _by_position(self, func, matches):
+        # Call min or sorted for elements found in an index, with their list positions as the key
+        positions = self._index_positions
+        if positions is not None:
+            try:
+                return func(matches, key=lambda v: positions[id(v)])
+            except KeyError:
+                # Position of an element replaced by __setitem__ is not known, record all positions again
+                pass
+
+        positions = {}
+        for i, v in enumerate(self._values):
+            positions.setdefault(id(v), i)
+
+        self._index_positions = positions
+        return func(matches, key=lambda v: positions[id(v)])
+
+    def _index_matches(self, name, value):
+        try:
+            return self._indexes[name].get(value, [])
+        except TypeError:
+            # Unhashable value, can't be in the index
+            return []
+
     def __str__(self):
-        return str(self._values)
+        return str(list(self))
 
     def __repr__(self):
         return self.__str__()
 
     def __getitem__(self, i):
         self._check_index(i)
+        if self._lazy:
+            return self._materialize(i)
+
         return self._values[i]
 
     def __setitem__(self, i, v):
         self._check_index(i)
         self._check_value(v)
+        if self._index_names:
+            keys = self._index_keys(v)
+            old = self._values[i]
+            self._index_remove(old)
+            self._index_add(v, keys)
+
+            positions = self._index_positions
+            if positions is not None:
+                # Old element may still be in the list at a later position, which is found on the next lookup
+                if positions.get(id(old), None) == i:
+                    del positions[id(old)]
+
+                if positions.get(id(v), i) >= i:
+                    positions[id(v)] = i
+
         self._values[i] = v
+        if self._journal_path is not None:
+            self._journal_ops.append(('s', i, v))
 
     def __delitem__(self, i):
         self._check_index(i)
+        if self._index_names:
+            self._index_remove(self._values[i])
+            self._index_positions = None
+
         del self._values[i]
+        if self._journal_path is not None:
+            self._journal_ops.append(('d', i))
 
     def __len__(self):
         return len(self._values)
 
     def __iter__(self):
+        if self._lazy:
+            return (self._materialize(i) for i in range(len(self._values)))
+
         return (i for i in self._values)
 
     def __add__(self, other):
-        if isinstance(other, ListField):
-            othervals = other._values
-        else:
-            othervals = other
-
-        return ListField(self._values + list(othervals))
+        return ListField(list(self) + list(other), index=self._index_names)
 
     def __iadd__(self, other):
-        if isinstance(other, ListField):
-            othervals = other._values
-        else:
-            othervals = other
+        othervals = list(other)
+        if self._index_names:
+            all_keys = [self._index_keys(v) for v in othervals]
+            for v, keys in zip(othervals, all_keys):
+                self._index_add(v, keys)
+
+            if self._index_positions is not None:
+                for i, v in enumerate(othervals, len(self._values)):
+                    self._index_positions.setdefault(id(v), i)
+
+        self._values += othervals
+        if self._journal_path is not None:
+            self._journal_ops.extend(('a', v) for v in othervals)
 
-        self._values += list(othervals)
         return self
 
     def __eq__(self, other):
-        if isinstance(other, ListField):
-            othervals = other._values
-        else:
-            othervals = other
-
-        return list(self._values) == list(othervals)
+        return list(self) == list(other)
 
     def append(self, v):
         """
@@ -110,7 +326,14 @@ class ListField(CustomValue):
         :raises ValueError: if v is not an instance of a VersionedObject
         """
         self._check_value(v)
+        if self._index_names:
+            self._index_add(v, self._index_keys(v))
+            if self._index_positions is not None:
+                self._index_positions.setdefault(id(v), len(self._values))
+
         self._values.append(v)
+        if self._journal_path is not None:
+            self._journal_ops.append(('a', v))
 
     def insert(self, i, v):
         """
@@ -123,7 +346,73 @@ class ListField(CustomValue):
         """
         self._check_index(i)
         self._check_value(v)
+        if self._index_names:
+            self._index_add(v, self._index_keys(v))
+            self._index_positions = None
+
         self._values.insert(i, v)
+        if self._journal_path is not None:
+            self._journal_ops.append(('i', i, v))
+
+    def reindex(self):
+        """
+        Rebuild all indexes for this list. Only needs to be called if an indexed field
+        was changed on an element that is already in the list.
+
+        :raises ValueError: if an indexed field contains an unhashable value
+        """
+        all_keys = [self._index_keys(v) for v in self._values]
+        self._indexes = {name: {} for name in self._index_names}
+        self._index_positions = None
+        for v, keys in zip(self._values, all_keys):
+            self._index_add(v, keys)
+
+    def find_by(self, name, value):
+        """
+        Find the first element with a specific field value, i.e. the matching element with\
+        the lowest list position. Uses an index if one was created for the field, otherwise\
+        searches the list.
+
+        :param str name: full dot name of element field to match, e.g. 'profile.region'
+        :param value: field value to match
+
+        :return: matching element, or None if no element matches
+        """
+        if name in self._indexes:
+            matches = self._index_matches(name, value)
+            if len(matches) > 1:
+                return self._by_position(min, matches)
+
+            return matches[0] if matches else None
+
+        for v in self:
+            if v[name] == value:
+                return v
+
+        return None
+
+    def filter_by(self, name, value):
+        """
+        Find all elements with a specific field value, in list order. Uses an index if\
+        one was created for the field, otherwise searches the list. When an index finds\
+        more than one match, the list positions of all elements are recorded the first\
+        time, and again after elements are moved by insert or del, so that the matches\
+        can be sorted without searching the list.
+
+        :param str name: full dot name of element field to match, e.g. 'profile.region'
+        :param value: field value to match
+
+        :return: list of matching elements
+        :rtype: list
+        """
+        if name in self._indexes:
+            matches = self._index_matches(name, value)
+            if len(matches) > 1:
+                return self._by_position(sorted, matches)
+
+            return list(matches)
+
+        return [v for v in self if v[name] == value]
 
     def to_dict(self):
         """
@@ -131,14 +420,686 @@ class ListField(CustomValue):
 
         :return: serialized dict
         """
+        if self._lazy:
+            return [self._dump_element(i) for i in self._values]
+
         return [self._serializer.to_dict(i) for i in self._values]
 
     def from_dict(self, attrs):
         """
         Populate the list with data from a dict
+
+        :raises versionedobj.exceptions.LoadObjectError: if the data refers to a journal file.\
+            Journal file names are relative to the main file, so list data saved in a journal\
+            file can only be loaded with Serializer.from_file or FileLoader.
+        """
+        if isinstance(attrs, dict) and ('journal' in attrs):
+            raise LoadObjectError(f"List data is stored in journal file '{attrs['journal']}', which can only be "
+                                  "loaded with Serializer.from_file or FileLoader")
+
+        self._set_raw_values(list(attrs))
+
+        # Next save must write all list elements
+        self._journal_path = None
+        self._journal_ops = []
+
+    def __deepcopy__(self, memo):
+        import copy
+
+        ret = self.__class__.__new__(self.__class__)
+        memo[id(self)] = ret
+        for k, v in self.__dict__.items():
+            ret.__dict__[k] = copy.deepcopy(v, memo)
+
+        # The copy must not append to the journal file of this list, so its next save writes all elements
+        ret._journal_path = None
+        ret._journal_ops = []
+        ret._journal_tombstones = 0
+
+        # Positions are keyed by the ids of the original elements
+        ret._index_positions = None
+        return ret
+
+    def _set_raw_values(self, values):
+        if self._lazy:
+            # Elements are loaded on first access
+            self._values = values
+            return
+
+        self._values = [self._load_element(d) for d in values]
+        if self._index_names:
+            self.reindex()
+
+    def _journal_record(self, op):
+        # Convert a pending journal operation to a JSON Lines record
+        import json
+
+        kind = op[0]
+        if kind == 'a':
+            return json.dumps([kind, self._dump_element(op[1])]) + '\n'
+        elif kind == 'd':
+            return json.dumps([kind, op[1]]) + '\n'
+
+        return json.dumps([kind, op[1], self._dump_element(op[2])]) + '\n'
+
+    def _load_journal(self, path):
+        import json
+
+        values = []
+        tombstones = 0
+        complete = True
+
+        try:
+            with open(path, 'r') as fh:
+                for line in fh:
+                    if not line.endswith('\n'):
+                        # Incomplete record from an interrupted save, next save must rewrite the file
+                        complete = False
+                        break
+
+                    record = json.loads(line)
+                    kind = record[0]
+                    if kind == 'a':
+                        values.append(record[1])
+                    elif kind == 'i':
+                        values.insert(record[1], record[2])
+                        tombstones += 1
+                    elif kind == 's':
+                        values[record[1]] = record[2]
+                        tombstones += 1
+                    elif kind == 'd':
+                        del values[record[1]]
+                        tombstones += 1
+                    else:
+                        raise LoadObjectError(f"Invalid record in journal file {path}")
+        except (ValueError, IndexError, TypeError) as e:
+            raise LoadObjectError(f"Failed to load journal file {path}: {e}")
+
+        self._set_raw_values(values)
+        self._journal_path = os.path.abspath(path) if (self._journal and complete) else None
+        self._journal_ops = []
+        self._journal_tombstones = tombstones
+
+    def _write_journal(self, path):
+        import json
+
+        _atomic_write(path, ''.join(json.dumps(['a', self._dump_element(v)]) + '\n' for v in self._values))
+        self._journal_path = os.path.abspath(path)
+        self._journal_ops = []
+        self._journal_tombstones = 0
+
+    def _vobj__save_journal(self, filename, dotname):
+        """
+        Save list data to the journal file for a specific field in a specific file
+
+        :param str filename: name of main file the containing object is being saved to
+        :param str dotname: full dot name of the list field in the containing object
+
+        :return: value to store for the list field in the main file
+        :rtype: dict
+        """
+        journal_name = f"{os.path.basename(filename)}.{dotname}.jsonl"
+        path = os.path.join(os.path.dirname(filename), journal_name)
+
+        tombstones = self._journal_tombstones + sum(1 for op in self._journal_ops if op[0] != 'a')
+
+        if ((self._journal_path is None) or (os.path.abspath(path) != self._journal_path) or
+                (not os.path.isfile(path)) or (tombstones > self._journal_compact_after)):
+            # Write all list elements
+            self._write_journal(path)
+        elif self._journal_ops:
+            # Only append changes since the last save
+            records = ''.join(self._journal_record(op) for op in self._journal_ops)
+            with open(path, 'a') as fh:
+                fh.write(records)
+
+            self._journal_ops = []
+            self._journal_tombstones = tombstones
+
+        return {'journal': journal_name}
+
+    def _vobj__load_journal(self, filename, attrs):
+        """
+        Populate the list with data from the value stored for the list field in a file,
+        which may refer to a journal file
+
+        :param str filename: name of main file the containing object is being loaded from
+        :param attrs: value stored for the list field in the main file
+        """
+        if isinstance(attrs, dict) and ('journal' in attrs):
+            self._load_journal(os.path.join(os.path.dirname(filename), attrs['journal']))
+        else:
+            self.from_dict(attrs)
+
+    def compact_journal(self):
+        """
+        Rewrite the journal file for this list so that it only contains the current list\
+        elements. Has no effect if the list has not been saved to, or loaded from, a\
+        journal file.
+        """
+        if self._journal_path is not None:
+            self._write_journal(self._journal_path)
+
+
+class MapField(_ObjectContainer):
+    """
+    Dict class that allows putting a collection of VersionedObject instances, stored
+    under string keys, in a single VersionedObject field. Behaves like a regular python
+    dict, except that keys must be strings, and values can only be instances of the
+    same VersionedObject class. Serialized as a JSON object.
+
+    :param arg: VersionedObject class for the map values, or a dict mapping string keys\
+        to VersionedObject instances, to populate the map with
+    :param bool lazy: If true, from_dict will only store the raw value data, and\
+        each VersionedObject value will be created the first time it is accessed by key\
+        or iteration. Raw values that have not been accessed are passed through to\
+        to_dict unchanged. Note that this means invalid value data is not detected\
+        until the value is accessed.
+    """
+    container_name = "map"
+
+    def __init__(self, arg, lazy=False):
+        self._values = {}
+
+        if isinstance(arg, dict):
+            # Arg is a dict of instance values
+            obj_class, values = _parse_list_arg(list(arg.values()), self.__class__.__name__)
+            for k, v in zip(arg, values):
+                self._check_key(k)
+                self._values[k] = v
+        elif isinstance(arg, type) and issubclass(arg, VersionedObject):
+            # Arg is the object class for this map
+            obj_class = arg
+        else:
+            raise ValueError("Invalid argument, provide a VersionedObject class or a dict of VersionedObject instances")
+
+        super(MapField, self).__init__(obj_class, lazy)
+
+    def _check_key(self, k):
+        if not isinstance(k, str):
+            raise ValueError(f"{self.__class__.__name__} keys must be strings")
+
+    def __str__(self):
+        return str(dict(self.items()))
+
+    def __repr__(self):
+        return self.__str__()
+
+    def __getitem__(self, k):
+        if self._lazy:
+            return self._materialize(k)
+
+        return self._values[k]
+
+    def __setitem__(self, k, v):
+        self._check_key(k)
+        self._check_value(v)
+        self._values[k] = v
+
+    def __delitem__(self, k):
+        del self._values[k]
+
+    def __contains__(self, k):
+        return k in self._values
+
+    def __len__(self):
+        return len(self._values)
+
+    def __iter__(self):
+        return iter(self._values)
+
+    def __eq__(self, other):
+        if isinstance(other, MapField):
+            other = dict(other.items())
+
+        return dict(self.items()) == other
+
+    def keys(self):
+        """
+        Get all keys in the map
+
+        :return: view of map keys
+        """
+        return self._values.keys()
+
+    def values(self):
+        """
+        Get all values in the map
+
+        :return: list of map values
+        :rtype: list
+        """
+        return [self[k] for k in self._values]
+
+    def items(self):
+        """
+        Get all key/value pairs in the map
+
+        :return: list of (key, value) tuples
+        :rtype: list
         """
-        self._values = []
-        for d in attrs:
-            ins = self._obj_class()
-            self._serializer.from_dict(d, ins)
-            self._values.append(ins)
+        return [(k, self[k]) for k in self._values]
+
+    def get(self, k, default=None):
+        """
+        Get the value for a key, or a default value if the key is not in the map
+
+        :param str k: key to look up
+        :param default: value to return if k is not in the map
+
+        :return: value for k, or default
+        """
+        if k not in self._values:
+            return default
+
+        return self[k]
+
+    def pop(self, k, *args):
+        """
+        Remove a key from the map, and return its value
+
+        :param str k: key to remove
+        :param default: value to return if k is not in the map. If unset, KeyError\
+            is raised when k is not in the map.
+
+        :return: value for k, or default
+        """
+        if (k not in self._values) and args:
+            return args[0]
+
+        v = self[k]
+        del self._values[k]
+        return v
+
+    def update(self, other):
+        """
+        Add all key/value pairs from another dict or MapField to the map
+
+        :param other: dict or MapField to add items from
+        :raises ValueError: if any value is not an instance of the map value class
+        """
+        items = other.items()
+        for k, v in items:
+            self._check_key(k)
+            self._check_value(v)
+
+        for k, v in items:
+            self._values[k] = v
+
+    def clear(self):
+        """
+        Remove all items from the map
+        """
+        self._values.clear()
+
+    def to_dict(self):
+        """
+        Convert the map to JSON-serializable dict
+
+        :return: serialized dict
+        """
+        return {k: self._dump_element(v) for k, v in self._values.items()}
+
+    def from_dict(self, attrs):
+        """
+        Populate the map with data from a dict
+
+        :raises versionedobj.exceptions.InputValidationError: if the data is not a dict
+        """
+        if not isinstance(attrs, dict):
+            raise InputValidationError(f"{self.__class__.__name__} data must be a dict")
+
+        if self._lazy:
+            # Values are loaded on first access
+            self._values = dict(attrs)
+            return
+
+        self._values = {k: self._load_element(v) for k, v in attrs.items()}
+
+
+class _ColumnarRow(object):
+    """
+    Lightweight view of a single element in a ColumnarListField. Reading and writing
+    attributes on a row reads and writes the matching columns of the list directly.
+
+    Rows refer to a list position, so a row obtained before inserting or deleting
+    elements in the list may refer to a different element afterwards.
+    """
+    __slots__ = ('_vobj__list', '_vobj__index')
+
+    def __init__(self, lst, index):
+        object.__setattr__(self, '_vobj__list', lst)
+        object.__setattr__(self, '_vobj__index', index)
+
+    def __getattr__(self, name):
+        if name.startswith('_vobj__'):
+            raise AttributeError(name)
+
+        try:
+            column = self._vobj__list._columns[name]
+        except KeyError:
+            raise AttributeError(f"{self._vobj__list._obj_class.__name__} object has no attribute '{name}'") from None
+
+        return column[self._vobj__index]
+
+    def __setattr__(self, name, value):
+        if name not in self._vobj__list._columns:
+            raise AttributeError(f"{self._vobj__list._obj_class.__name__} object has no attribute '{name}'")
+
+        self._vobj__list._set_cell(name, self._vobj__index, value)
+
+    def __getitem__(self, name):
+        try:
+            return self.__getattr__(name)
+        except AttributeError as e:
+            raise KeyError(str(e)) from None
+
+    def __setitem__(self, name, value):
+        try:
+            self.__setattr__(name, value)
+        except AttributeError as e:
+            raise KeyError(str(e)) from None
+
+    def __iter__(self):
+        return iter(self._vobj__list._names)
+
+    def __eq__(self, other):
+        if isinstance(other, _ColumnarRow):
+            return self.to_dict() == other.to_dict()
+
+        if isinstance(other, VersionedObject):
+            return self.to_object() == other
+
+        return False
+
+    def __str__(self):
+        return f"{self._vobj__list._obj_class.__name__}Row({self.to_dict()})"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def to_dict(self):
+        """
+        Get the values of this row as a dict
+
+        :return: row data as a dict
+        :rtype: dict
+        """
+        i = self._vobj__index
+        return {n: c[i] for n, c in self._vobj__list._columns.items()}
+
+    def to_object(self):
+        """
+        Create a new VersionedObject instance containing the values of this row
+
+        :return: new object instance
+        """
+        lst = self._vobj__list
+        ins = lst._obj_class()
+        for n, c in lst._columns.items():
+            setattr(ins, n, c[self._vobj__index])
+
+        return ins
+
+
+class ColumnarListField(CustomValue):
+    """
+    List class for storing a large sequence of VersionedObject instances of the same
+    class in a single VersionedObject field. Unlike ListField, the list elements are not
+    stored as object instances; each field of the element class is stored as a single
+    column, which requires much less memory for long lists. Columns for fields with int
+    or float default values are stored as array.array, and all other columns are stored
+    as python lists.
+
+    Reading an element by index or iteration returns a lightweight row object, which
+    reads and writes the columns directly. Use the 'to_object' method of a row to get
+    a real VersionedObject instance.
+
+    The element class must only contain plain values; nested VersionedObject and
+    CustomValue fields are not supported.
+
+    :param arg: VersionedObject class for the list elements, or an iterable of\
+        VersionedObject instances to populate the list with
+    :param str layout: Data layout produced by to_dict. 'rows' produces a list of\
+        dicts, in the same format as ListField. 'columns' produces a single dict,\
+        mapping each field name to a list of values. from_dict accepts both layouts.
+    """
+    def __init__(self, arg, layout='rows'):
+        if layout not in ('rows', 'columns'):
+            raise ValueError(f"Invalid layout '{layout}', must be 'rows' or 'columns'")
+
+        self._layout = layout
+        self._obj_class, values = _parse_list_arg(arg, self.__class__.__name__)
+
+        proto = self._obj_class()
+        self._names = []
+        self._defaults = {}
+        for n in _iter_obj_attrs(proto):
+            value = proto.__dict__[n]
+            if isinstance(value, (VersionedObject, CustomValue)):
+                raise ValueError(f"{self.__class__.__name__} element classes cannot contain "
+                                 f"VersionedObject or CustomValue fields ('{n}')")
+
+            self._names.append(n)
+            self._defaults[n] = value
+
+        self._names_set = frozenset(self._names)
+        self._columns = {}
+        self._clear()
+
+        for v in values:
+            self.append(v)
+
+    def _clear(self):
+        for n in self._names:
+            typecode = _ARRAY_TYPECODES.get(type(self._defaults[n]), None)
+            self._columns[n] = [] if typecode is None else array.array(typecode)
+
+    def _make_column(self, name, values):
+        typecode = _ARRAY_TYPECODES.get(type(self._defaults[name]), None)
+        if typecode is not None:
+            column_type = _ARRAY_TYPES[typecode]
+            if all(type(v) is column_type for v in values):
+                try:
+                    return array.array(typecode, values)
+                except OverflowError:
+                    pass
+
+        return values
+
+    def _make_list_column(self, name):
+        # Value does not fit in an array column, fall back to a regular list
+        column = self._columns[name]
+        if isinstance(column, array.array):
+            column = column.tolist()
+            self._columns[name] = column
+
+        return column
+
+    def _fits(self, column, value):
+        return (not isinstance(column, array.array)) or (type(value) is _ARRAY_TYPES[column.typecode])
+
+    def _set_cell(self, name, i, value):
+        column = self._columns[name]
+        if not self._fits(column, value):
+            column = self._make_list_column(name)
+
+        try:
+            column[i] = value
+        except OverflowError:
+            self._make_list_column(name)[i] = value
+
+    def _insert_cell(self, name, i, value):
+        column = self._columns[name]
+        if not self._fits(column, value):
+            column = self._make_list_column(name)
+
+        try:
+            column.insert(i, value)
+        except OverflowError:
+            self._make_list_column(name).insert(i, value)
+
+    def _row_values(self, v):
+        if isinstance(v, _ColumnarRow):
+            if v._vobj__list._obj_class is not self._obj_class:
+                raise ValueError(f"Only rows of the {self._obj_class.__name__} class can be added to this list")
+
+            return v.to_dict()
+
+        if not isinstance(v, self._obj_class):
+            raise ValueError(f"Only instances of the {self._obj_class.__name__} class can be added to this list")
+
+        return {n: v.__dict__[n] for n in self._names}
+
+    def _check_index(self, i):
+        if (i >= len(self)) or (i < -len(self)):
+            raise IndexError("List index out of bounds")
+
+        return i if i >= 0 else len(self) + i
+
+    def __len__(self):
+        if not self._names:
+            return 0
+
+        return len(self._columns[self._names[0]])
+
+    def __getitem__(self, i):
+        return _ColumnarRow(self, self._check_index(i))
+
+    def __setitem__(self, i, v):
+        i = self._check_index(i)
+        values = self._row_values(v)
+        for n in self._names:
+            self._set_cell(n, i, values[n])
+
+    def __delitem__(self, i):
+        i = self._check_index(i)
+        for n in self._names:
+            del self._columns[n][i]
+
+    def __iter__(self):
+        return (_ColumnarRow(self, i) for i in range(len(self)))
+
+    def __iadd__(self, other):
+        for v in other:
+            self.append(v)
+
+        return self
+
+    def __eq__(self, other):
+        if isinstance(other, ColumnarListField):
+            return self.to_rows() == other.to_rows()
+
+        try:
+            other = list(other)
+        except TypeError:
+            return False
+
+        if len(other) != len(self):
+            return False
+
+        return all(row == v for row, v in zip(self, other))
+
+    def __str__(self):
+        return f"{self.__class__.__name__}({self.to_rows()})"
+
+    def __repr__(self):
+        return self.__str__()
+
+    def column(self, name):
+        """
+        Get all values for a single field of the list elements. The returned column
+        is the actual storage for the field values, and should not be resized.
+
+        :param str name: field name
+
+        :return: column values
+        :rtype: array.array or list
+        """
+        try:
+            return self._columns[name]
+        except KeyError:
+            raise KeyError(f"{self._obj_class.__name__} object has no attribute '{name}'") from None
+
+    def append(self, v):
+        """
+        Append a value to the list
+
+        :param v: VersionedObject instance or row to append
+        :raises ValueError: if v is not an instance of the list element class
+        """
+        values = self._row_values(v)
+        i = len(self)
+        for n in self._names:
+            self._insert_cell(n, i, values[n])
+
+    def insert(self, i, v):
+        """
+        Insert a value at a specific position in the list
+
+        :param int i: list position to insert new item at
+        :param v: VersionedObject instance or row to insert
+        :raises ValueError: if v is not an instance of the list element class
+        :raises IndexError: if i is not a valid index in the list
+        """
+        i = self._check_index(i)
+        values = self._row_values(v)
+        for n in self._names:
+            self._insert_cell(n, i, values[n])
+
+    def to_rows(self):
+        """
+        Convert the list to a list of dicts, one dict per element
+
+        :return: serialized list
+        :rtype: list
+        """
+        columns = [self._columns[n] for n in self._names]
+        return [dict(zip(self._names, values)) for values in zip(*columns)]
+
+    def to_columns(self):
+        """
+        Convert the list to a dict of lists, one list per element field
+
+        :return: serialized dict
+        :rtype: dict
+        """
+        return {n: list(c) for n, c in self._columns.items()}
+
+    def to_dict(self):
+        """
+        Convert the list to JSON-serializable data, using the layout passed to __init__
+
+        :return: serialized list or dict
+        """
+        if self._layout == 'columns':
+            return self.to_columns()
+
+        return self.to_rows()
+
+    def from_dict(self, attrs):
+        """
+        Populate the list with data from a list of dicts (row layout), or a dict of lists
+        (column layout)
+
+        :raises versionedobj.exceptions.InputValidationError: if the data does not\
+            match the fields of the list element class
+        """
+        if isinstance(attrs, dict):
+            if attrs.keys() != self._names_set:
+                raise InputValidationError(f"Columns do not match {self._obj_class.__name__} fields")
+
+            columns = {n: list(c) for n, c in attrs.items()}
+            if len(set(len(c) for c in columns.values())) > 1:
+                raise InputValidationError("Columns must all be the same length")
+        else:
+            rows = list(attrs)
+            for row in rows:
+                if (not isinstance(row, dict)) or (row.keys() != self._names_set):
+                    raise InputValidationError(f"List element does not match {self._obj_class.__name__} fields")
+
+            columns = {n: [row[n] for row in rows] for n in self._names}
+
+        self._columns = {n: self._make_column(n, columns[n]) for n in self._names}
+        if runtime_stats.enabled:
+            runtime_stats.listfield_elements_decoded += len(self)
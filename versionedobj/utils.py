@@ -1,3 +1,8 @@
+import os
+import time
+from collections import deque
+from collections.abc import MutableMapping
+
 from versionedobj.exceptions import InvalidFilterError
 
 
@@ -140,38 +145,353 @@ def _walk_obj_attrs(parent_obj, only=[], ignore=[]):
     :param list only: List of 'only' names
     :param list ignore: List of 'ignore' names
     """
-    obj_stack = [(None, [], parent_obj)]
+    obj_queue = deque([([], parent_obj)])
+    filtered = bool(only or ignore)
 
-    while obj_stack:
-        fieldname, parents, obj = obj_stack.pop(0)
+    while obj_queue:
+        parents, obj = obj_queue.popleft()
 
         for n in _iter_obj_attrs(obj):
-            p = parents if fieldname is None else parents + [fieldname]
             value = obj.__dict__[n]
-            field = _ObjField(p, n, value)
 
             if isinstance(value, _ObjField.obj_class):
-                obj_stack.append((n, p, value))
+                obj_queue.append((parents + [n], value))
             else:
-                if not _field_should_be_skipped(field.dot_name(), only, ignore):
+                # All fields at the same nesting level share the same parents list
+                field = _ObjField(parents, n, value)
+                if not (filtered and _field_should_be_skipped(field.dot_name(), only, ignore)):
                     yield field
 
 
-def _obj_to_dict(obj, only=[], ignore=[]):
+def _obj_to_dict(obj, only=[], ignore=[], filename=None, counts=None):
     """
     Serialize an object instance to a dict
     :param parent_obj: Versioned object to convert to dict
     :param list only: List of 'only' names
     :param list ignore: List of 'ignore' names
+    :param str filename: Name of the file that the dict will be written to, if any.\
+        Allows journaled ListFields to write their data to a side file.
+    :param list counts: If set, a list of the form [fields, custom fields, custom nanoseconds],\
+        which will be incremented with the number of fields serialized, the number of CustomValue\
+        fields serialized, and the time spent in CustomValue.to_dict calls.
     """
     if only and ignore:
         raise InvalidFilterError("Cannot use both 'only' and 'ignore'")
 
+    filtered = bool(only or ignore)
     ret = {}
-    for field in _walk_obj_attrs(obj, only, ignore):
-        if hasattr(field.value, 'to_dict'):
-            field.value = field.value.to_dict()
 
-        ret = field.set_dict_field(ret)
+    # Each entry is a list of the form [dotname prefix, object, output dict, parent entry, attribute name].
+    # Output dicts for nested objects are only added to the parent output dict when the first
+    # field is written to them, so nested objects with no fields written are left out.
+    obj_queue = deque([['', obj, ret, None, None]])
+
+    while obj_queue:
+        entry = obj_queue.popleft()
+        prefix, obj, attrs, _, _ = entry
+
+        for n in _iter_obj_attrs(obj):
+            value = obj.__dict__[n]
+
+            if isinstance(value, _ObjField.obj_class):
+                obj_queue.append([prefix + n + '.', value, {}, entry, n])
+                continue
+
+            if filtered and _field_should_be_skipped(prefix + n, only, ignore):
+                continue
+
+            if counts is not None:
+                counts[0] += 1
+
+            if (filename is not None) and getattr(value, '_journal', False):
+                value = value._vobj__save_journal(filename, prefix + n)
+            elif hasattr(value, 'to_dict'):
+                if counts is None:
+                    value = value.to_dict()
+                else:
+                    start = time.perf_counter_ns()
+                    value = value.to_dict()
+                    counts[1] += 1
+                    counts[2] += time.perf_counter_ns() - start
+
+            # Add output dicts for this object, and any parent objects, if not added already
+            parent = entry
+            while (parent[3] is not None) and (parent[4] not in parent[3][2]):
+                parent[3][2][parent[4]] = parent[2]
+                parent = parent[3]
+
+            attrs[n] = value
 
     return ret
+
+
+def _fsync_dir(dirname):
+    """
+    Flush a directory to disk, so that a file created or renamed in the directory is still there\
+    after a crash. Has no effect on platforms where directories can't be opened, e.g. Windows.
+
+    :param str dirname: name of directory to flush
+    """
+    try:
+        fd = os.open(dirname, os.O_RDONLY)
+    except OSError:
+        return
+
+    try:
+        os.fsync(fd)
+    except OSError:
+        # Some filesystems don't support flushing directories
+        pass
+    finally:
+        os.close(fd)
+
+
+class _AtomicWriter(object):
+    """
+    Context manager that opens a temporary file for writing, next to the file being written,\
+    and replaces the file with the temporary file on exit, such that readers will either see\
+    the old file contents or the new file contents, but never a partially written file. If an\
+    exception is raised, the temporary file is deleted, and the file is left unchanged. The\
+    temporary file is flushed to disk before it replaces the file, and the directory is flushed\
+    after, so that after a crash the file also has either the old or the new contents.
+
+    :param str filename: name of file to write
+    :param bool binary: if true, the temporary file is opened in binary mode
+    """
+    def __init__(self, filename, binary=False):
+        self.filename = filename
+        self.binary = binary
+        self._fh = None
+        self._tmpname = None
+
+    def __enter__(self):
+        import tempfile
+
+        dirname = os.path.dirname(os.path.abspath(self.filename))
+        fd, self._tmpname = tempfile.mkstemp(dir=dirname, prefix=os.path.basename(self.filename) + '.',
+                                             suffix='.tmp')
+        try:
+            self._fh = os.fdopen(fd, 'wb' if self.binary else 'w')
+        except BaseException:
+            os.close(fd)
+            os.remove(self._tmpname)
+            raise
+
+        return self._fh
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        import shutil
+
+        try:
+            if exc_type is None:
+                self._fh.flush()
+                os.fsync(self._fh.fileno())
+
+            self._fh.close()
+            if exc_type is not None:
+                return
+
+            if os.path.exists(self.filename):
+                # Preserve permissions of the existing file
+                shutil.copymode(self.filename, self._tmpname)
+            else:
+                # mkstemp creates files readable only by the owner, use the default permissions instead
+                umask = os.umask(0)
+                os.umask(umask)
+                os.chmod(self._tmpname, 0o666 & ~umask)
+
+            os.replace(self._tmpname, self.filename)
+            self._tmpname = None
+        finally:
+            if self._tmpname is not None:
+                self._fh.close()
+                os.remove(self._tmpname)
+
+        _fsync_dir(os.path.dirname(os.path.abspath(self.filename)))
+
+
+def _atomic_write(filename, data):
+    """
+    Write a string to a file, such that readers will either see the old file contents
+    or the new file contents, but never a partially written file
+
+    :param str filename: name of file to write
+    :param data: data to write, str or bytes
+    """
+    with _AtomicWriter(filename, isinstance(data, bytes)) as fh:
+        fh.write(data)
+
+
+class _FileLock(object):
+    """
+    Context manager that holds an fcntl lock on a sidecar lock file, named by adding '.lock'\
+    to the name of the file being protected. A sidecar file is used because atomic writes\
+    replace the protected file, and a lock on the replaced file would not be seen by processes\
+    that open the new file. The sidecar file is never deleted, since deleting it would allow\
+    two processes to hold exclusive locks on different lock files at the same time.
+
+    :param str filename: name of file to protect
+    :param bool exclusive: if true, take an exclusive (writer) lock, otherwise take a shared\
+        (reader) lock
+
+    :raises NotImplementedError: if the fcntl module is not available on this platform
+    """
+    def __init__(self, filename, exclusive):
+        self.filename = filename + '.lock'
+        self.exclusive = exclusive
+        self._fd = None
+
+    def __enter__(self):
+        try:
+            import fcntl
+        except ImportError:
+            raise NotImplementedError("File locking requires the fcntl module, which is not available on this platform")
+
+        fd = os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o666)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+        except BaseException:
+            os.close(fd)
+            raise
+
+        self._fd = fd
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        import fcntl
+
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
+def _copy_json(value):
+    """
+    Copy all dicts and lists in a value returned by json.load, so that the copy can be\
+    modified without modifying the original value
+
+    :param value: value to copy
+
+    :return: copied value
+    """
+    if type(value) == dict:
+        return {k: _copy_json(v) for k, v in value.items()}
+    elif type(value) == list:
+        return [_copy_json(v) for v in value]
+
+    return value
+
+
+def _overlay(value):
+    # Wrap a dict value in a copy-on-write overlay, and overlay the contents of a list value
+    if type(value) == dict:
+        return _CopyOnWriteDict(value)
+    elif type(value) == list:
+        return [_overlay(v) for v in value]
+
+    return value
+
+
+def _resolve(value):
+    # Convert a value that may contain copy-on-write overlays back to plain dicts and lists
+    if type(value) == _CopyOnWriteDict:
+        return value.to_dict()
+    elif type(value) == dict:
+        return {k: _resolve(v) for k, v in value.items()}
+    elif type(value) == list:
+        return [_resolve(v) for v in value]
+
+    return value
+
+
+class _CopyOnWriteDict(MutableMapping):
+    """
+    Mutable view of a dict, which records all changes in the view instead of modifying
+    the dict. Nested dicts are wrapped in their own view when they are read, and lists
+    are copied when they are read, so the wrapped dict is never modified. Used for
+    running object migrations without modifying, or copying, the caller's dict.
+
+    :param dict base: dict to wrap
+    """
+    __slots__ = ('_base', '_changes', '_deleted')
+
+    def __init__(self, base):
+        self._base = base
+
+        # Maps keys to values that were set, or read and wrapped/copied, in this view
+        self._changes = {}
+
+        # Keys of the wrapped dict that were deleted in this view
+        self._deleted = set()
+
+    def __getitem__(self, key):
+        if key in self._changes:
+            return self._changes[key]
+
+        if key in self._deleted:
+            raise KeyError(key)
+
+        value = self._base[key]
+        if type(value) in (dict, list):
+            value = _overlay(value)
+            self._changes[key] = value
+
+        return value
+
+    def __setitem__(self, key, value):
+        self._changes[key] = value
+        self._deleted.discard(key)
+
+    def __delitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+
+        self._changes.pop(key, None)
+        if key in self._base:
+            self._deleted.add(key)
+
+    def __contains__(self, key):
+        return (key in self._changes) or ((key in self._base) and (key not in self._deleted))
+
+    def __iter__(self):
+        for key in self._base:
+            if key not in self._deleted:
+                yield key
+
+        for key in self._changes:
+            if key not in self._base:
+                yield key
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.to_dict()})"
+
+    def copy(self):
+        return _CopyOnWriteDict(self.to_dict())
+
+    def to_dict(self):
+        """
+        Get the contents of this view as a plain dict. Values that were not changed in this\
+        view are not copied, and if nothing was changed then the wrapped dict itself is returned.
+
+        :return: contents of this view
+        :rtype: dict
+        """
+        ret = {}
+        changed = bool(self._deleted)
+
+        for key in self:
+            if key in self._changes:
+                value = _resolve(self._changes[key])
+                if (key not in self._base) or (value is not self._base[key]):
+                    changed = True
+            else:
+                value = self._base[key]
+
+            ret[key] = value
+
+        return ret if changed else self._base
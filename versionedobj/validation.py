@@ -0,0 +1,468 @@
+from versionedobj.object import VersionedObject, CustomValue
+from versionedobj.utils import _iter_obj_attrs, _field_should_be_skipped
+from versionedobj.plancache import plan_cache
+from versionedobj.exceptions import InputValidationError
+
+
+# Value types that are accepted from a dict for each declared attribute type. JSON has
+# no tuple type, and whole numbers are loaded as ints, so lists and ints are also accepted
+_ACCEPTED_TYPES = {
+    int: frozenset([int]),
+    float: frozenset([float, int]),
+    bool: frozenset([bool]),
+    str: frozenset([str]),
+    list: frozenset([list]),
+    tuple: frozenset([list, tuple]),
+    dict: frozenset([dict]),
+    type(None): frozenset([type(None)]),
+}
+
+# Names of types that may be used in string annotations
+_TYPE_NAMES = {'int': int, 'float': float, 'bool': bool, 'str': str, 'list': list, 'tuple': tuple,
+               'dict': dict, 'None': type(None)}
+
+# Maps names of accepted types to types, for validators loaded from the plan cache
+_CACHED_TYPES = {t.__name__: t for t in _ACCEPTED_TYPES}
+
+# Maps tuples of type names to sets of accepted types, for validators loaded from the plan cache
+_CACHED_TYPE_SETS = {}
+
+
+def _annotation_types(annotation):
+    """
+    Get the set of value types accepted for a type annotation
+
+    :param annotation: type annotation
+
+    :return: set of accepted types, or None if values should not be type checked
+    :rtype: frozenset
+    """
+    if isinstance(annotation, str):
+        annotation = _TYPE_NAMES.get(annotation.strip(), None)
+        if annotation is None:
+            # Unknown type name
+            return None
+
+    if annotation is None:
+        annotation = type(None)
+
+    if annotation in _ACCEPTED_TYPES:
+        return _ACCEPTED_TYPES[annotation]
+
+    # Only needed for annotations created with the typing module, which is already imported by then
+    import typing
+
+    origin = getattr(annotation, '__origin__', None)
+    args = getattr(annotation, '__args__', None)
+
+    if (origin is typing.Union) or ((origin is None) and args and (type(annotation).__name__ == 'UnionType')):
+        # typing.Optional/typing.Union, or X | Y on python 3.10+
+        ret = frozenset()
+        for arg in args:
+            types = _annotation_types(arg)
+            if types is None:
+                return None
+
+            ret |= types
+
+        return ret
+
+    if origin in _ACCEPTED_TYPES:
+        # Generic alias, e.g. typing.List[int]. Only the container type is checked
+        return _ACCEPTED_TYPES[origin]
+
+    return None
+
+
+def _attr_types(cls, name):
+    """
+    Get the set of value types accepted for a class attribute, from the annotation for\
+    the attribute if there is one, otherwise from the type of the default value
+
+    :param cls: VersionedObject class
+    :param str name: attribute name
+
+    :return: set of accepted types, or None if values should not be type checked
+    :rtype: frozenset
+    """
+    annotations = cls.__dict__.get('__annotations__', {})
+    if name in annotations:
+        return _annotation_types(annotations[name])
+
+    default = cls.__dict__.get(name, None)
+    if default is None:
+        return None
+
+    return _ACCEPTED_TYPES.get(type(default), None)
+
+
+class _CheckResult(object):
+    """
+    Problems found, and values collected, while checking a dict against a _ValidatorNode
+    """
+    __slots__ = ('unrecognized', 'missing', 'wrong_types', 'writes', 'check_types')
+
+    def __init__(self, load=False, check_types=False):
+        # Full dot names of unrecognized attributes
+        self.unrecognized = []
+
+        # Full dot names of missing attributes
+        self.missing = []
+
+        # Tuples of the form (full dot name, accepted types, value) for each value of the wrong type
+        self.wrong_types = []
+
+        # Tuples of the form (object, attribute name, value) for each attribute value that should
+        # be loaded, or None if values are not being collected
+        self.writes = [] if load else None
+
+        self.check_types = check_types
+
+    def raise_errors(self):
+        """
+        Raise a single InputValidationError describing all problems found, if any were found
+        """
+        if not (self.unrecognized or self.missing or self.wrong_types):
+            return
+
+        messages = [f"Unrecognized attribute name '{n}' in dict" for n in self.unrecognized]
+        errors = list(messages)
+
+        if self.missing:
+            messages.append(f"Attributes missing from dict: {','.join(self.missing)}")
+            errors.extend(f"Attribute missing from dict: '{n}'" for n in self.missing)
+
+        for n, types, value in self.wrong_types:
+            expected = ' or '.join(sorted(t.__name__ for t in types))
+            msg = f"Invalid type for attribute '{n}': expected {expected}, got {type(value).__name__}"
+            messages.append(msg)
+            errors.append(msg)
+
+        raise InputValidationError('; '.join(messages), errors)
+
+
+class _ValidatorNode(object):
+    """
+    Compiled description of the attribute names expected at a single nesting level
+    of a VersionedObject in dict form, for a specific combination of 'only' and 'ignore'
+    filters. Allows validating a dict with a few set operations per nesting level.
+    """
+    __slots__ = ('prefix', 'attrs', 'required', 'required_order', 'required_dotnames', 'leaves', 'types',
+                 'nested', 'nested_skipped')
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+
+        # All attribute names that may appear at this level
+        self.attrs = frozenset()
+
+        # Attribute names that must appear at this level
+        self.required = frozenset()
+        self.required_order = ()
+
+        # Full dot names of all required leaf attributes at this level and below
+        self.required_dotnames = ()
+
+        # Names of leaf attributes at this level that should be loaded
+        self.leaves = frozenset()
+
+        # Maps names of leaf attributes at this level to the set of accepted value types,
+        # for attributes that can be type checked
+        self.types = {}
+
+        # Maps names of nested VersionedObject attributes to their _ValidatorNode
+        self.nested = {}
+
+        # Maps names of nested VersionedObject attributes to True, if the attribute name
+        # itself is excluded by the filters
+        self.nested_skipped = {}
+
+    def _check_leaves(self, attrs, result, obj):
+        leaves = self.leaves
+        writes = result.writes
+        types = self.types if result.check_types else None
+
+        for n in attrs:
+            if n not in leaves:
+                continue
+
+            value = attrs[n]
+            if types and (n in types) and (type(value) not in types[n]):
+                result.wrong_types.append((self.prefix + n, types[n], value))
+
+            if writes is not None:
+                writes.append((obj, n, value))
+
+    def check(self, attrs, result, obj=None, top=False):
+        """
+        Check a dict against this node, and all nested nodes. Optionally, also collect\
+        the attribute values that should be loaded from the dict.
+
+        :param dict attrs: dict to check
+        :param _CheckResult result: object to add problems found, and values to load, to
+        :param obj: object instance to load values into, if values are being collected
+        :param bool top: True if this is the top-level node
+        """
+        keys = attrs.keys()
+
+        if not (keys <= self.attrs):
+            for n in keys:
+                if (n not in self.attrs) and not (top and (n == 'version')):
+                    result.unrecognized.append(self.prefix + n)
+
+        if (result.writes is not None) or result.check_types:
+            self._check_leaves(attrs, result, obj)
+
+        for n, child in self.nested.items():
+            if n not in attrs:
+                continue
+
+            value = attrs[n]
+            if type(value) == dict:
+                child_obj = None if result.writes is None else getattr(obj, n)
+                child.check(value, result, child_obj)
+            else:
+                # Nested object data is not a dict
+                if not self.nested_skipped[n]:
+                    result.unrecognized.append(self.prefix + n)
+
+                result.missing.extend(child.required_dotnames)
+
+        if not (self.required <= keys):
+            for n in self.required_order:
+                if n in attrs:
+                    continue
+
+                if n in self.nested:
+                    result.missing.extend(self.nested[n].required_dotnames)
+                else:
+                    result.missing.append(self.prefix + n)
+
+    def collect_shape(self, attrs, result, obj=None):
+        """
+        Collect the attribute values that should be loaded from a dict, and generate a\
+        fingerprint of the structure of the dict, in the same traversal. Does not check for\
+        unrecognized or missing attributes, so the fingerprint must already be known to\
+        belong to a valid dict before the collected values are used. Value types are still\
+        checked, if enabled. The fingerprint only depends on the attribute names at each\
+        nesting level that is described by this node or a nested node.
+
+        :param dict attrs: dict to collect values from
+        :param _CheckResult result: object to add problems found, and values to load, to
+        :param obj: object instance to load values into, if values are being collected
+
+        :return: hashable fingerprint
+        :rtype: tuple
+        """
+        if (result.writes is not None) or result.check_types:
+            self._check_leaves(attrs, result, obj)
+
+        fingerprint = [tuple(attrs)]
+        for n, child in self.nested.items():
+            if n in attrs:
+                value = attrs[n]
+                if type(value) == dict:
+                    child_obj = None if result.writes is None else getattr(obj, n)
+                    fingerprint.append(child.collect_shape(value, result, child_obj))
+                else:
+                    fingerprint.append(None)
+
+        return tuple(fingerprint)
+
+    def validate(self, attrs, obj=None, load=False, check_types=False):
+        """
+        Validate a dict against this node, and all nested nodes. Optionally, also collect\
+        all attribute values that should be loaded from the dict, in the same traversal.
+
+        :param dict attrs: dict to validate
+        :param obj: object instance that values will be loaded into, if 'load' is true
+        :param bool load: if true, collect the attribute values that should be loaded
+        :param bool check_types: if true, also check the type of each leaf attribute value
+
+        :raises versionedobj.exceptions.InputValidationError: if the dict contains\
+            fields that are not found in the object, or if the dict is missing\
+            fields that are found in the object, or if type checking is enabled and\
+            the dict contains values of the wrong type.
+
+        :return: list of tuples of the form (object, attribute name, value), one for each\
+            attribute value that should be loaded, if 'load' is true
+        :rtype: list
+        """
+        if not isinstance(attrs, dict):
+            raise InputValidationError(f"Expected a dict, got {type(attrs).__name__}")
+
+        result = _CheckResult(load, check_types)
+        self.check(attrs, result, obj, top=True)
+
+        result.raise_errors()
+        return result.writes
+
+
+def _compile_node(obj, prefix, only, ignore):
+    node = _ValidatorNode(prefix)
+    attrs = []
+    required = []
+    required_dotnames = []
+    leaves = []
+
+    for n in _iter_obj_attrs(obj):
+        value = obj.__dict__[n]
+        dotname = prefix + n
+        attrs.append(n)
+
+        if isinstance(value, VersionedObject):
+            child = _compile_node(value, dotname + '.', only, ignore)
+            node.nested[n] = child
+            node.nested_skipped[n] = bool(_field_should_be_skipped(dotname, only, ignore))
+
+            if child.required_dotnames:
+                required.append(n)
+                required_dotnames.extend(child.required_dotnames)
+        else:
+            if dotname == 'version':
+                continue
+
+            if not _field_should_be_skipped(dotname, only, ignore):
+                required.append(n)
+                required_dotnames.append(dotname)
+                leaves.append(n)
+
+                if not isinstance(value, CustomValue):
+                    types = _attr_types(obj.__class__, n)
+                    if types is not None:
+                        node.types[n] = types
+
+    node.attrs = frozenset(attrs)
+    node.required = frozenset(required)
+    node.required_order = tuple(required)
+    node.required_dotnames = tuple(required_dotnames)
+    node.leaves = frozenset(leaves)
+    return node
+
+
+def _node_to_data(node):
+    # Convert a validator node to data that can be stored in the plan cache
+    types = {n: tuple(sorted(t.__name__ for t in ts)) for n, ts in node.types.items()}
+    nested = {n: _node_to_data(child) for n, child in node.nested.items()}
+    return (node.prefix, node.attrs, node.required_order, node.leaves, types, nested, node.nested_skipped)
+
+
+def _node_from_data(data):
+    # Create a validator node from data loaded from the plan cache
+    prefix, attrs, required_order, leaves, types, nested, nested_skipped = data
+
+    node = _ValidatorNode(prefix)
+    node.attrs = attrs
+    node.required = frozenset(required_order)
+    node.required_order = required_order
+    node.leaves = leaves
+    node.types = {}
+    for n, names in types.items():
+        ts = _CACHED_TYPE_SETS.get(names, None)
+        if ts is None:
+            ts = frozenset(_CACHED_TYPES[t] for t in names)
+            _CACHED_TYPE_SETS[names] = ts
+
+        node.types[n] = ts
+
+    node.nested = {n: _node_from_data(child) for n, child in nested.items()}
+    node.nested_skipped = nested_skipped
+
+    # Dot names are not cached, since every level would repeat the dot names of all levels below it
+    required_dotnames = []
+    for n in required_order:
+        if n in node.nested:
+            required_dotnames.extend(node.nested[n].required_dotnames)
+        else:
+            required_dotnames.append(prefix + n)
+
+    node.required_dotnames = tuple(required_dotnames)
+    return node
+
+
+def _tree_classes(obj):
+    # Get the classes of a VersionedObject instance, and all nested VersionedObject instances
+    ret = [obj.__class__]
+    for n in _iter_obj_attrs(obj):
+        value = obj.__dict__[n]
+        if isinstance(value, VersionedObject):
+            ret.extend(_tree_classes(value))
+
+    return ret
+
+
+def _type_name(t):
+    return f"{getattr(t, '__module__', '')}.{getattr(t, '__qualname__', repr(t))}"
+
+
+def _plan_fingerprint(obj):
+    """
+    Describe the attributes of a VersionedObject instance, and of all nested VersionedObject\
+    instances, for the plan cache. The attributes of a class defined in an unmodified source\
+    file may still depend on runtime state (e.g. environment variables), so cached validators\
+    are only used if the fingerprint matches.
+
+    :param obj: VersionedObject instance
+
+    :return: tuple of the form (attribute name, annotation, value type, nested fingerprint)\
+        for each attribute. 'nested fingerprint' is None for values that are not VersionedObject\
+        instances.
+    :rtype: tuple
+    """
+    annotations = getattr(obj.__class__, '__annotations__', {})
+    ret = []
+    for n in _iter_obj_attrs(obj):
+        value = obj.__dict__[n]
+        annotation = _type_name(annotations[n]) if n in annotations else None
+        nested = _plan_fingerprint(value) if isinstance(value, VersionedObject) else None
+        ret.append((n, annotation, _type_name(type(value)), nested))
+
+    return tuple(ret)
+
+
+def _get_validator(obj, only, ignore):
+    """
+    Get the compiled validator for a VersionedObject instance and filter combination.
+    Validators are compiled once, and cached on the object class, and in the plan cache\
+    if it is enabled. Cached validators are compiled again if the attributes of any\
+    VersionedObject class are changed at runtime.
+
+    :param obj: VersionedObject instance
+    :param list only: List of 'only' names
+    :param list ignore: List of 'ignore' names
+
+    :return: top-level validator node
+    :rtype: _ValidatorNode
+    """
+    key = (tuple(only), tuple(ignore))
+    cls = obj.__class__
+    generation = type(cls)._vobj__generation
+
+    if cls._vobj__validators_generation != generation:
+        # Attributes of this class, or of a nested class, were changed after the validators were compiled
+        cls._vobj__validators = {}
+        cls._vobj__validators_generation = generation
+
+    validators = cls._vobj__validators
+    node = validators.get(key, None)
+    if node is not None:
+        return node
+
+    classes = _tree_classes(obj) if plan_cache.enabled else None
+
+    # The plan cache describes classes as they are defined in their source files,
+    # so it can't be used for classes that were changed at runtime
+    if (classes is not None) and not any(b.__dict__.get('_vobj__modified', False)
+                                         for c in classes for b in c.__mro__):
+        fingerprint = _plan_fingerprint(obj)
+        data = plan_cache.load(cls, key, fingerprint)
+        if data is not None:
+            node = _node_from_data(data)
+        else:
+            node = _compile_node(obj, '', only, ignore)
+            plan_cache.store(cls, key, _node_to_data(node), classes, fingerprint)
+    else:
+        node = _compile_node(obj, '', only, ignore)
+
+    validators[key] = node
+    return node